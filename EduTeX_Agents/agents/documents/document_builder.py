@@ -34,8 +34,32 @@ class DocumentBuilder:
              self.llm = None
 
     def build_document(self, content, title="Document", output_filename="output.tex"):
-        # Legacy method (kept for potential script usage)
-        return self.build("article", title, content)
+        """
+        Builds an article and compiles it to a PDF (through the shared PDF
+        cache, see compile_pdf). Returns build()'s result plus "status"
+        ("success" or "error"), "tex_path" and "pdf_path" (None on failure).
+        """
+        result = self.build("article", title, content)
+        pdf_path = self.compile_pdf(result["latex"], output_filename)
+        return {
+            **result,
+            "status": "success" if pdf_path else "error",
+            "tex_path": os.path.abspath(output_filename),
+            "pdf_path": pdf_path,
+        }
+
+    def compile_pdf(self, latex: str, output_filename: str = "output.tex") -> Optional[str]:
+        """
+        Writes the LaTeX to output_filename and compiles it; a document built
+        before comes straight from the shared PDF cache. Returns the PDF path
+        (in the current directory, where the engine writes it) or None.
+        """
+        with open(output_filename, 'w', encoding='utf-8') as f:
+            f.write(latex)
+        if not compile_latex(output_filename):
+            return None
+        pdf_path = os.path.abspath(os.path.splitext(os.path.basename(output_filename))[0] + ".pdf")
+        return pdf_path if os.path.exists(pdf_path) else None
 
     def _load_agent_definition(self) -> str:
         """
@@ -73,7 +73,7 @@ class TableFormatter:
                 return {
                     "latex": latex_code,
                     "type": "table",
-                    "metadata": {"style": style, "rows": len(data)}
+                    "metadata": {"style": style, "rows": len(data), "generator": "AI"}
                 }
             except Exception as e:
                 print(f"LLM generation failed: {e}")
@@ -90,7 +90,7 @@ class TableFormatter:
         return {
             "latex": latex_code,
             "type": "table",
-            "metadata": {"style": style, "rows": len(data)}
+            "metadata": {"style": style, "rows": len(data), "generator": "Template"}
         }
 
     def _generate_manual(self, data, caption="My Table"):
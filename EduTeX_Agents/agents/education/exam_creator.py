@@ -27,6 +27,12 @@ except ImportError:
     TemplateRegistry = None
     build_llm_context = None
 
+from config import Config
+from core.concurrency import fan_out
+from core.exercise_bank import check_duplicate, get_bank, mark_reused, save_exercises
+from core.pipeline import PipelineError, build_pipeline
+from core.telemetry import span
+
 try:
     from agents.education.exercise_generator import ExerciseGenerator  # type: ignore[no-redef]
     from agents.education.difficulty_calibrator import DifficultyCalibrator  # type: ignore[no-redef]
@@ -34,6 +40,26 @@ except ImportError:
     from exercise_generator import ExerciseGenerator  # type: ignore[no-redef]
     from difficulty_calibrator import DifficultyCalibrator  # type: ignore[no-redef]
 
+# Focus of each part of the exam, from first to last question
+SLOT_FOCUS = [
+    "definitions and basic understanding",
+    "routine computation",
+    "application to a concrete problem",
+    "multi-step synthesis or proof",
+]
+DIFFICULTY_LEVELS = ["easy", "medium", "hard"]
+
+# Exam flow (core.pipeline): calibration and LaTeX assembly only depend on
+# the generated exercises, so they run concurrently.
+EXAM_FLOW = [
+    {"node": "exercises", "inputs": ["topic", "num_questions", "difficulty", "api_key", "parallel", "concurrency", "reuse"]},
+    {"node": "calibration", "inputs": ["exercises"]},
+    {"node": "exam_latex", "inputs": ["exercises", "topic", "difficulty", "template_style", "maincolor"]},
+    # Reused bank exercises count as used once the exam is assembled
+    {"node": "bank_usage", "inputs": ["exercises", "exam_latex"], "optional": True},
+]
+
+
 class ExamCreator:
     """
     Role: The "Exam Creator"
@@ -62,20 +88,10 @@ class ExamCreator:
             print(f"Error loading agent definition: {e}")
             return ""
 
-    def create_exam(
-        self,
-        topic: str,
-        num_questions: int = 3,
-        difficulty: str = "medium",
-        template_style: str = "scientific",
-        maincolor: str = "#1285cc",
-        api_key: Optional[str] = None,
-    ) -> Dict[str, Any]:
+    def _build_prompts(self, topic: str, num_questions: int, difficulty: str):
         """
-        Creates a full exam with 'num_questions' on 'topic' using LLM.
+        Builds the (system, user) prompts for generating a full exam.
         """
-        print(f"Agent {self.role}: Assembling exam on '{topic}'...")
-
         # Build LaTeX context for LLM
         latex_context = ''
         if build_llm_context:
@@ -90,18 +106,14 @@ class ExamCreator:
                 f'  - {info["description"]}' for info in cmds.values()
             )
 
-        # Use LLM Service
-        from core.llm import LLMService
         from core.workflow_loader import load_workflow
         from core.skill_loader import load_skill
-        llm = LLMService(api_key=api_key)
 
         # Load Workflow Specification
         workflow_spec = load_workflow("exam")
         latex_skill = load_skill("latex_core")
         agent_definition = self._load_agent_definition()
         
-        # 1. Generate Questions via LLM
         system_prompt = f"""You are an expert mathematics educator creating a test.
         
         === AGENT DEFINITION & RULES ===
@@ -136,12 +148,163 @@ class ExamCreator:
 
         user_prompt = f"Generate {num_questions} {difficulty} exercises for {topic}."
 
-        try:
+        return system_prompt, user_prompt
+
+    def _plan_exam(self, topic: str, num_questions: int, difficulty: str) -> List[Dict[str, Any]]:
+        """
+        Plans one slot per question: a difficulty ramp around the target level
+        and a distinct focus, so independently generated questions do not overlap.
+        """
+        center = DIFFICULTY_LEVELS.index(difficulty) if difficulty in DIFFICULTY_LEVELS else 1
+        plan = []
+        for i in range(num_questions):
+            offset = 0
+            if num_questions >= 3:
+                # First question one level easier, last one level harder
+                offset = round(2 * i / (num_questions - 1) - 1)
+            level = DIFFICULTY_LEVELS[min(max(center + offset, 0), len(DIFFICULTY_LEVELS) - 1)]
+            focus = SLOT_FOCUS[min(i * len(SLOT_FOCUS) // num_questions, len(SLOT_FOCUS) - 1)]
+            plan.append({"index": i, "topic": topic, "difficulty": level, "focus": focus})
+        return plan
+
+    def _generate_slot(self, llm, slot: Dict[str, Any], plan: List[Dict[str, Any]], system_prompt: str) -> Dict[str, Any]:
+        """
+        Generates the single exercise of one planned slot.
+        """
+        others = "; ".join(
+            f"Q{p['index'] + 1}: {p['difficulty']}, {p['focus']}" for p in plan if p["index"] != slot["index"]
+        )
+        user_prompt = (
+            f"Generate exactly 1 {slot['difficulty']} exercise for {slot['topic']}. "
+            f"It is question {slot['index'] + 1} of {len(plan)} and should focus on {slot['focus']}."
+        )
+        if others:
+            user_prompt += f" The other questions are: {others}. Do not overlap with them."
+
+        with span("exam.slot", index=slot["index"], difficulty=slot["difficulty"]):
             result = llm.generate_json(user_prompt, system_instruction=system_prompt)
-            exercises = result.get("exercises", [])
-            
+        exercises = result.get("exercises") if isinstance(result, dict) else None
+        exercise = exercises[0] if isinstance(exercises, list) and exercises else None
+        if not isinstance(exercise, dict) or not exercise.get("latex"):
+            raise ValueError(f"LLM returned no usable exercise for question {slot['index'] + 1}")
+
+        metadata = exercise.setdefault("metadata", {})
+        metadata.setdefault("difficulty", slot["difficulty"])
+        metadata.setdefault("tags", [slot["topic"]])
+        return exercise
+
+    def _generate_parallel(self, llm, plan: List[Dict[str, Any]], slots: List[int],
+                           concurrency: int, retries: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Generates the given plan slots concurrently, retrying only the failed
+        ones. Returns {slot index: exercise}.
+        """
+        topic = plan[0]["topic"]
+        with span("exam.prompt_assembly", topic=topic, num_questions=len(slots)):
+            # One system prompt per difficulty level needed
+            system_prompts = {
+                level: self._build_prompts(topic, 1, level)[0] for level in {plan[i]["difficulty"] for i in slots}
+            }
+
+        exercises: Dict[int, Dict[str, Any]] = {}
+        errors: Dict[int, str] = {}
+        pending = list(slots)
+        with span("exam.llm_generate", provider=llm.provider, mode="parallel") as s:
+            for attempt in range(1 + max(0, retries)):
+                if not pending:
+                    break
+                if attempt:
+                    print(f"Agent {self.role}: Retrying questions {[i + 1 for i in pending]}...")
+                outcomes = fan_out(
+                    lambda i: self._generate_slot(llm, plan[i], plan, system_prompts[plan[i]["difficulty"]]),
+                    pending,
+                    max_workers=concurrency,
+                )
+                failed = []
+                for slot_index, outcome in zip(pending, outcomes):
+                    if outcome["ok"]:
+                        exercises[slot_index] = outcome["result"]
+                        errors.pop(slot_index, None)
+                    else:
+                        errors[slot_index] = outcome["error"]
+                        failed.append(slot_index)
+                pending = failed
+            s.set_attribute("exercises", len(exercises))
+            s.set_attribute("failed_slots", len(pending))
+
+        if pending:
+            detail = "; ".join(f"Q{i + 1}: {errors[i]}" for i in pending)
+            raise ValueError(f"{len(pending)} of {len(slots)} questions failed: {detail}")
+        return exercises
+
+    def _fill_from_bank(self, plan: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Fills plan slots with stored exercises of the same topic and
+        difficulty (least used first). Returns {slot index: exercise}.
+        """
+        bank = get_bank()
+        if bank is None:
+            return {}
+        filled: Dict[int, Dict[str, Any]] = {}
+        with span("exam.bank_lookup", slots=len(plan)) as s:
+            for slot in plan:
+                used = [ex["metadata"]["bank_id"] for ex in filled.values()]
+                found = bank.search(slot["topic"], slot["difficulty"], limit=1, exclude_ids=used)
+                if found:
+                    filled[slot["index"]] = found[0]
+            s.set_attribute("reused", len(filled))
+        return filled
+
+    def generate_exercises(
+        self,
+        topic: str,
+        num_questions: int = 3,
+        difficulty: str = "medium",
+        api_key: Optional[str] = None,
+        parallel: Optional[bool] = None,
+        concurrency: Optional[int] = None,
+        reuse: Optional[bool] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Generates the exam exercises (single prompt, or one call per question
+        when 'parallel'). With 'reuse' (default Config.EXAM_REUSE_FIRST) slots
+        are first filled from the exercise bank and only the gaps are
+        generated. Raises RuntimeError if the LLM produced nothing usable.
+        """
+        if parallel is None:
+            parallel = Config.EXAM_PARALLEL
+        if reuse is None:
+            reuse = Config.EXAM_REUSE_FIRST
+
+        plan = self._plan_exam(topic, num_questions, difficulty)
+        reused = self._fill_from_bank(plan) if reuse else {}
+        gaps = [slot["index"] for slot in plan if slot["index"] not in reused]
+        if not gaps:
+            print(f"Agent {self.role}: All {num_questions} questions reused from the exercise bank")
+            return [reused[slot["index"]] for slot in plan]
+
+        # Use LLM Service
+        from core.llm import LLMService
+        llm = LLMService(api_key=api_key)
+
+        concurrency = concurrency or Config.EXAM_CONCURRENCY
+        try:
+            if parallel and len(gaps) > 1:
+                generated = self._generate_parallel(
+                    llm, plan, gaps, concurrency=concurrency, retries=Config.EXAM_SLOT_RETRIES,
+                )
+            else:
+                with span("exam.prompt_assembly", topic=topic, num_questions=len(gaps)):
+                    system_prompt, user_prompt = self._build_prompts(topic, len(gaps), difficulty)
+
+                with span("exam.llm_generate", provider=llm.provider) as s:
+                    result = llm.generate_json(user_prompt, system_instruction=system_prompt)
+                    new_exercises = [ex for ex in result.get("exercises", []) if isinstance(ex, dict)]
+                    s.set_attribute("exercises", len(new_exercises))
+                generated = dict(zip(gaps, new_exercises))
+
             # Additional check: If LLM returns empty list (e.g. safety filter or error)
-            if not exercises:
+            if not generated:
                 raise ValueError("LLM returned empty exercise list")
                 
         except Exception as e:
@@ -149,24 +312,113 @@ class ExamCreator:
             # User requested NO MOCK FALLBACK. Re-raising exception to notify frontend.
             raise RuntimeError(f"Failed to generate exam via AI: {e}")
 
-        # 2. Calibrate
-        calibration = self.calibrator.calibrate_exam(exercises)
+        exercises = {**reused, **generated}
+        self._check_duplicates(llm, plan, exercises, sorted(generated), concurrency)
+        save_exercises([exercises[i] for i in sorted(generated)], topic, difficulty, source="exam_creator")
+        # Reused and generated exercises in plan order
+        return [exercises[slot["index"]] for slot in plan if slot["index"] in exercises]
 
-        # 3. Assemble LaTeX using template
-        exam_latex = self._assemble_latex(
-            exercises, topic, difficulty, template_style, maincolor
-        )
+    def _check_duplicates(self, llm, plan: List[Dict[str, Any]], exercises: Dict[int, Dict[str, Any]],
+                          fresh: List[int], concurrency: int):
+        """
+        Flags generated questions that nearly duplicate an earlier question of
+        the exam or a bank exercise (metadata.near_duplicate). With
+        DEDUP_MODE=reject they are regenerated first, up to DEDUP_RETRIES
+        rounds; whatever is still a duplicate stays in the exam, flagged.
+        """
+        def find() -> Dict[int, Dict[str, Any]]:
+            found = {}
+            for i in fresh:
+                earlier = [j for j in sorted(exercises) if j != i and (j not in fresh or j < i)]
+                match = check_duplicate(exercises[i], [exercises[j] for j in earlier])
+                if match is not None:
+                    if match["source"] == "exam":
+                        match = {"source": "exam", "question": earlier[match.pop("index")] + 1, **match}
+                    found[i] = match
+            return found
+
+        with span("exam.dedup", questions=len(fresh)) as s:
+            found = find()
+            rounds = Config.DEDUP_RETRIES if Config.DEDUP_MODE == "reject" else 0
+            for _ in range(rounds):
+                if not found:
+                    break
+                print(f"Agent {self.role}: Regenerating near-duplicate questions {[i + 1 for i in found]}...")
+                try:
+                    exercises.update(self._generate_parallel(llm, plan, sorted(found), concurrency, retries=0))
+                except ValueError as e:
+                    print(f"Warning: Could not regenerate near-duplicates: {e}")
+                    break
+                found = find()
+            for i, match in found.items():
+                exercises[i].setdefault("metadata", {})["near_duplicate"] = match
+            s.set_attribute("near_duplicates", len(found))
+
+    def pipeline_steps(self) -> Dict[str, Any]:
+        """Step functions for EXAM_FLOW (and flows that extend it)."""
+        return {
+            "exercises": self.generate_exercises,
+            "calibration": self.calibrator.calibrate_exam,
+            "exam_latex": lambda exercises, topic, difficulty="medium", template_style="scientific",
+                                 maincolor="#1285cc": self._assemble_latex(exercises, topic, difficulty, template_style, maincolor),
+            "bank_usage": lambda exercises, exam_latex: mark_reused(exercises),
+        }
+
+    def create_exam(
+        self,
+        topic: str,
+        num_questions: int = 3,
+        difficulty: str = "medium",
+        template_style: str = "scientific",
+        maincolor: str = "#1285cc",
+        api_key: Optional[str] = None,
+        parallel: Optional[bool] = None,
+        concurrency: Optional[int] = None,
+        reuse: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        Creates a full exam with 'num_questions' on 'topic' using LLM.
+
+        parallel=True plans the exam and generates each question in its own
+        LLM call (at most 'concurrency' at once), so latency follows the
+        slowest question and a malformed question only retries its own slot.
+        Defaults to Config.EXAM_PARALLEL. reuse=True fills questions from the
+        exercise bank first (default Config.EXAM_REUSE_FIRST).
+
+        Runs EXAM_FLOW: calibration and LaTeX assembly both start as soon as
+        the exercises exist.
+        """
+        print(f"Agent {self.role}: Assembling exam on '{topic}'...")
+
+        pipeline = build_pipeline("exam", EXAM_FLOW, self.pipeline_steps())
+        try:
+            run = pipeline.run({
+                "topic": topic,
+                "num_questions": num_questions,
+                "difficulty": difficulty,
+                "template_style": template_style,
+                "maincolor": maincolor,
+                "api_key": api_key,
+                "parallel": parallel,
+                "concurrency": concurrency,
+                "reuse": reuse,
+            }, max_workers=concurrency or Config.EXAM_CONCURRENCY)  # the run's call budget caps fan_out too
+        except PipelineError as e:
+            # Surface the agent's own error (e.g. RuntimeError from generation)
+            raise e.cause
 
+        outputs = run["outputs"]
         return {
-            "exam_latex": exam_latex,
-            "exercises": exercises,
-            "calibration": calibration,
+            "exam_latex": outputs["exam_latex"],
+            "exercises": outputs["exercises"],
+            "calibration": outputs["calibration"],
             "metadata": {
                 "created_at": datetime.now().isoformat(),
                 "topic": topic,
                 "difficulty": difficulty,
                 "template_style": template_style,
                 "maincolor": maincolor,
+                "pipeline": run["nodes"],
             }
         }
 
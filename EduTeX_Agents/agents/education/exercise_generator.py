@@ -2,7 +2,7 @@ import os
 import sys
 import json
 import argparse
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 # Add project root to path
 # Project root is ../../ from agents/education/
@@ -10,12 +10,20 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
-# Attempt to import skills
-try:
-    from skills.clean_numbers.scripts.verify import is_clean_number, verify_expression  # type: ignore
-except ImportError:
-    # Fallback or mock if running in isolation
-    pass
+from config import Config  # type: ignore
+
+SINGLE_EXERCISE_SCHEMA = """
+        Output MUST be a single JSON object representing ONE exercise.
+        Schema:
+        {
+            "latex": "The LaTeX code for the exercise body (no preamble).",
+            "solution": "The LaTeX code for the solution.",
+            "metadata": { "points": 10, "difficulty": "difficulty", "tags": ["topic"] }
+        }
+        """
+
+# Clean-gate outcome of one exercise: (ok, retries), None when it was not checked
+GateOutcome = Optional[Tuple[Optional[bool], int]]
 
 class ExerciseGenerator:
     """
@@ -42,30 +50,17 @@ class ExerciseGenerator:
             print(f"Error loading agent definition: {e}")
             return ""
 
-    def generate(self, topic: str, difficulty: str = "medium", **kwargs) -> Dict[str, Any]:
+    def _build_system_prompt(self, topic: str, difficulty: str, mistakes=None) -> str:
         """
-        Generates a math exercise based on the topic.
+        Builds the shared system prompt (agent definition, skills, workflow).
         """
-        print(f"Agent {self.role}: Generating {difficulty} exercise for '{topic}'...")
-        
-        mistakes = kwargs.get("mistakes")
+        from core.workflow_loader import load_workflow  # type: ignore
+        from core.skill_loader import load_skill # type: ignore
+
         agent_definition = self._load_agent_definition()
-        
-        # Load LLM, Workflow, and Skills
-        try:
-            from core.llm import LLMService  # type: ignore
-            from core.workflow_loader import load_workflow  # type: ignore
-            from core.skill_loader import load_skill # type: ignore
-            
-            api_key = kwargs.get("api_key")
-            llm = LLMService(api_key=api_key)
-            workflow_spec = load_workflow("worksheet")
-            latex_skill = load_skill("latex_core")
-        except ImportError:
-            print("Warning: Core modules not found. Using fallback.")
-            return self._fallback_response(topic, difficulty)
+        workflow_spec = load_workflow("worksheet")
+        latex_skill = load_skill("latex_core")
 
-        # Build Prompts
         system_prompt = f"""You are an expert mathematics educator creating exercises.
         
         === AGENT DEFINITION & RULES ===
@@ -88,25 +83,184 @@ class ExerciseGenerator:
         
         if mistakes:
             system_prompt += f"\nFocus on addressing these student mistakes: {', '.join(mistakes)}"
-        
-        system_prompt += """
-        Output MUST be a single JSON object representing ONE exercise.
-        Schema:
-        {
-            "latex": "The LaTeX code for the exercise body (no preamble).",
-            "solution": "The LaTeX code for the solution.",
-            "metadata": { "points": 10, "difficulty": "difficulty", "tags": ["topic"] }
-        }
+
+        return system_prompt
+
+    def generate(self, topic: str, difficulty: str = "medium", **kwargs) -> Dict[str, Any]:
+        """
+        Generates a math exercise based on the topic.
         """
+        print(f"Agent {self.role}: Generating {difficulty} exercise for '{topic}'...")
+        
+        # Load LLM, Workflow, and Skills
+        try:
+            from core.llm import LLMService  # type: ignore
+            
+            api_key = kwargs.get("api_key")
+            llm = LLMService(api_key=api_key)
+            system_prompt = self._build_system_prompt(topic, difficulty, kwargs.get("mistakes"))
+        except ImportError:
+            print("Warning: Core modules not found. Using fallback.")
+            return self._fallback_response(topic, difficulty)
+
+        system_prompt += SINGLE_EXERCISE_SCHEMA
         
         user_prompt = f"Generate a unique {difficulty} exercise for {topic}."
 
         try:
-            return llm.generate_json(user_prompt, system_instruction=system_prompt)
+            exercise, gate = self._clean_gate(llm, user_prompt, system_prompt,
+                                              llm.generate_json(user_prompt, system_instruction=system_prompt))
+            duplicate = self._near_duplicate(exercise)
+            if duplicate is not None and Config.DEDUP_MODE == "reject":
+                for _ in range(Config.DEDUP_RETRIES):
+                    print(f"Agent {self.role}: Near-duplicate ({duplicate['source']}, "
+                          f"similarity {duplicate['similarity']}), regenerating...")
+                    avoid = f" It must clearly differ from this exercise:\n{exercise['latex'][:400]}"
+                    exercise, gate = self._clean_gate(llm, user_prompt + avoid, system_prompt,
+                                                      llm.generate_json(user_prompt + avoid, system_instruction=system_prompt))
+                    duplicate = self._near_duplicate(exercise)
+                    if duplicate is None:
+                        break
+                if duplicate is not None:
+                    raise ValueError(f"Generated exercise is a near-duplicate ({duplicate['source']}, "
+                                     f"similarity {duplicate['similarity']})")
         except Exception as e:
             print(f"LLM Error in ExerciseGenerator: {e}")
             raise e # User requested no mock fallback
 
+        if duplicate is not None:
+            exercise.setdefault("metadata", {})["near_duplicate"] = duplicate
+        self._record_gate(topic, gate)
+        self._save_to_bank([exercise], topic, difficulty)
+        return exercise
+
+    def generate_batch(self, topic: str, difficulty: str = "medium", count: int = 3, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Generates 'count' distinct exercises with a single multi-item prompt.
+        May return fewer items than requested; callers top up the gap.
+        """
+        print(f"Agent {self.role}: Generating {count} {difficulty} exercises for '{topic}' in one prompt...")
+
+        try:
+            from core.llm import LLMService  # type: ignore
+
+            llm = LLMService(api_key=kwargs.get("api_key"))
+            system_prompt = self._build_system_prompt(topic, difficulty, kwargs.get("mistakes"))
+        except ImportError:
+            print("Warning: Core modules not found. Using fallback.")
+            return [self._fallback_response(topic, difficulty) for _ in range(count)]
+
+        system_prompt += f"""
+        Output MUST be a JSON object with a list 'exercises' of exactly {count} distinct exercises.
+        Each exercise follows this schema:
+        {{
+            "latex": "The LaTeX code for the exercise body (no preamble).",
+            "solution": "The LaTeX code for the solution.",
+            "metadata": {{ "points": 10, "difficulty": "{difficulty}", "tags": ["{topic}"] }}
+        }}
+        """
+
+        user_prompt = f"Generate {count} different {difficulty} exercises for {topic}."
+
+        try:
+            result = llm.generate_json(user_prompt, system_instruction=system_prompt)
+        except Exception as e:
+            print(f"LLM Error in ExerciseGenerator: {e}")
+            raise e
+
+        exercises = result.get("exercises", []) if isinstance(result, dict) else []
+        gated = self._clean_gate_batch(llm, topic, difficulty, kwargs.get("mistakes"),
+                                       [ex for ex in exercises if isinstance(ex, dict)][:count])
+        kept: List[Dict[str, Any]] = []
+        for exercise, gate in gated:
+            duplicate = self._near_duplicate(exercise, kept)
+            if duplicate is not None:
+                if Config.DEDUP_MODE == "reject":
+                    print(f"Agent {self.role}: Dropping near-duplicate exercise ({duplicate['source']}, "
+                          f"similarity {duplicate['similarity']})")
+                    continue
+                exercise.setdefault("metadata", {})["near_duplicate"] = duplicate
+            self._record_gate(topic, gate)
+            kept.append(exercise)
+        self._save_to_bank(kept, topic, difficulty)
+        return kept
+
+    def _clean_gate(self, llm, user_prompt: str, system_prompt: str, exercise: Any) -> Tuple[Any, GateOutcome]:
+        """
+        Solves the exercise's equations locally. In CLEAN_CHECK_MODE=reject a
+        messy exercise is re-prompted with the reason, up to CLEAN_CHECK_RETRIES
+        times; one still messy after that carries metadata.clean_check.
+        Returns (exercise, (ok, retries) or None if unchecked); the outcome is
+        recorded with _record_gate once the exercise is kept.
+        """
+        from core.clean_gate import check_exercise, failure_reason, retry_prompt  # type: ignore
+
+        report = check_exercise(exercise)
+        if report is None:
+            return exercise, None
+        retries = 0
+        while report["ok"] is False and Config.CLEAN_CHECK_MODE == "reject" and retries < Config.CLEAN_CHECK_RETRIES:
+            retries += 1
+            print(f"Agent {self.role}: Clean-number check failed ({failure_reason(report)}), "
+                  f"regenerating ({retries}/{Config.CLEAN_CHECK_RETRIES})...")
+            candidate = llm.generate_json(retry_prompt(user_prompt, exercise, report), system_instruction=system_prompt)
+            candidate_report = check_exercise(candidate)
+            if candidate_report is None:
+                continue
+            exercise, report = candidate, candidate_report
+        if report["ok"] is False:
+            exercise.setdefault("metadata", {})["clean_check"] = {
+                "ok": False, "reason": failure_reason(report), "retries": retries,
+            }
+        return exercise, (report["ok"], retries)
+
+    @staticmethod
+    def _record_gate(topic: str, gate: GateOutcome):
+        """Counts a kept exercise's clean-gate outcome in clean_gate.STATS."""
+        if gate is None:
+            return
+        from core.clean_gate import STATS  # type: ignore
+        STATS.record(topic, *gate)
+
+    def _clean_gate_batch(self, llm, topic: str, difficulty: str, mistakes,
+                          exercises: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], GateOutcome]]:
+        """
+        _clean_gate for a batch: every exercise is checked concurrently and
+        only the failing ones are re-prompted, one exercise per prompt.
+        """
+        if Config.CLEAN_CHECK_MODE == "off" or not exercises:
+            return [(exercise, None) for exercise in exercises]
+        from core.concurrency import fan_out  # type: ignore
+
+        system_prompt = self._build_system_prompt(topic, difficulty, mistakes) + SINGLE_EXERCISE_SCHEMA
+        user_prompt = f"Generate a unique {difficulty} exercise for {topic}."
+        outcomes = fan_out(
+            lambda exercise: self._clean_gate(llm, user_prompt, system_prompt, exercise),
+            exercises, max_workers=Config.EXERCISE_CONCURRENCY,
+        )
+        return [o["result"] if o["ok"] else (exercises[o["index"]], None) for o in outcomes]
+
+    def _near_duplicate(self, exercise: Dict[str, Any], others: List[Dict[str, Any]] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Near-duplicate match of a new exercise against 'others' and the
+        exercise bank, or None.
+        """
+        try:
+            from core.exercise_bank import check_duplicate  # type: ignore
+        except ImportError:
+            return None
+        return check_duplicate(exercise, others)
+
+    def _save_to_bank(self, exercises: List[Dict[str, Any]], topic: str, difficulty: str):
+        """
+        Writes generated exercises through to the exercise bank (best effort).
+        """
+        try:
+            from core.exercise_bank import save_exercises  # type: ignore
+        except ImportError:
+            return
+        save_exercises(exercises, topic, difficulty, source="exercise_generator")
+
     def _fallback_response(self, topic, difficulty):
         return {
             "type": "Algebra",
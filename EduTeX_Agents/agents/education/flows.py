@@ -0,0 +1,85 @@
+"""
+Declarative multi-agent flows (see workflows/education/full-package.md).
+
+Each flow is a list of nodes for core.pipeline.build_pipeline: a node names
+its step and the values it reads. The executor runs every node as soon as
+its inputs exist, so solutions, hints, pitfalls, rubrics and calibration
+all start together once the exercises are generated. Their per-exercise
+calls share the run's call budget (max_workers) with the other nodes.
+"""
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from config import Config
+from core.concurrency import fan_out
+from core.pipeline import Pipeline, build_pipeline
+
+try:
+    from agents.education.exam_creator import EXAM_FLOW, ExamCreator
+except ImportError:
+    from exam_creator import EXAM_FLOW, ExamCreator  # type: ignore[no-redef]
+
+
+def _real_prerequisites(inputs: Dict[str, Any], output: Any) -> bool:
+    """memoize predicate: keep LLM answers, not the offline fallback."""
+    from agents.education.prerequisite_checker import PrerequisiteChecker
+    return not PrerequisiteChecker.is_fallback(inputs.get("topic", ""), output)
+
+
+def _real_mindmap(inputs: Dict[str, Any], output: Any) -> bool:
+    """memoize predicate: keep LLM mindmaps, not the mock structure."""
+    from agents.education.mindmap_generator import MindmapGenerator
+    return not MindmapGenerator.is_fallback(inputs.get("topic", ""), output)
+
+
+FULL_PACKAGE_FLOW: List[Dict[str, Any]] = [
+    {"node": "prerequisites", "inputs": ["topic"], "optional": True, "memoize": _real_prerequisites},
+    *EXAM_FLOW,
+    {"node": "mindmap", "inputs": ["topic"], "optional": True, "memoize": _real_mindmap, "when": "include_mindmap"},
+    {"node": "solutions", "inputs": ["exercises"], "optional": True, "when": "include_solutions"},
+    {"node": "hints", "inputs": ["exercises"], "optional": True, "when": "include_hints"},
+    {"node": "pitfalls", "inputs": ["exercises"], "optional": True, "when": "include_pitfalls"},
+    {"node": "rubrics", "inputs": ["exercises"], "optional": True, "when": "include_rubric"},
+]
+
+
+def _per_exercise(method: Callable[[Dict[str, Any]], Any]) -> Callable[..., List[Optional[Any]]]:
+    """Step that applies an agent method to every exercise concurrently (None where it failed)."""
+    def step(exercises: List[Dict[str, Any]]) -> List[Optional[Any]]:
+        outcomes = fan_out(method, exercises, max_workers=Config.EXAM_CONCURRENCY)
+        for outcome in outcomes:
+            if not outcome["ok"]:
+                print(f"Warning: {getattr(method, '__qualname__', method)} failed for exercise "
+                      f"{outcome['index'] + 1}: {outcome['error']}")
+        return [outcome.get("result") for outcome in outcomes]
+    return step
+
+
+def full_package_steps(creator: Optional[ExamCreator] = None) -> Dict[str, Callable[..., Any]]:
+    from agents.education.hint_generator import HintGenerator
+    from agents.education.mindmap_generator import MindmapGenerator
+    from agents.education.pitfall_detector import PitfallDetector
+    from agents.education.prerequisite_checker import PrerequisiteChecker
+    from agents.education.rubric_designer import RubricDesigner
+    from agents.education.solution_writer import SolutionWriter
+
+    creator = creator or ExamCreator()
+    steps = creator.pipeline_steps()
+    steps.update({
+        "prerequisites": PrerequisiteChecker().check,
+        "mindmap": MindmapGenerator().generate_mindmap_data,
+        "solutions": _per_exercise(SolutionWriter().solve),
+        "hints": _per_exercise(HintGenerator().generate_hints),
+        "pitfalls": _per_exercise(PitfallDetector().detect_pitfalls),
+        "rubrics": _per_exercise(RubricDesigner().create_rubric),
+    })
+    return steps
+
+
+def full_package_pipeline(creator: Optional[ExamCreator] = None) -> Pipeline:
+    return build_pipeline("full_package", FULL_PACKAGE_FLOW, full_package_steps(creator))
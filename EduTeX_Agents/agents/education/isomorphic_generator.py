@@ -40,18 +40,33 @@ class IsomorphicGenerator:
             print(f"Error loading agent definition: {e}")
             return ""
 
-    def generate_variations(self, input_exercise, count=1):
+    def generate_variations(self, input_exercise, count=1, seed=0):
         """
         Generates 'count' variations based on the input exercise's metadata.
+        Exercises with a parametrisable equation get deterministic local
+        variants (same structure, clean solutions, per 'seed'); the LLM
+        writes the rest (all of them when the engine finds none, the
+        shortfall when it finds fewer than 'count').
         """
         print(f"Agent IsomorphicGenerator: Creating {count} variations...")
         
         data = input_exercise if isinstance(input_exercise, dict) else json.loads(input_exercise)
+
+        variations = (self._parametric_variations(data, count, seed) or [])[:count]
+        if len(variations) == count:
+            print(f"Agent IsomorphicGenerator: {count} parametric variations (no LLM call)")
+            return variations
+        if variations:
+            print(f"Agent IsomorphicGenerator: {len(variations)} parametric variations, "
+                  f"asking the LLM for the other {count - len(variations)}")
+        return variations + self._llm_variations(data, count - len(variations), variations)
+
+    def _llm_variations(self, data, count, existing):
+        """'count' variations written by the LLM, different from the 'existing' ones."""
         metadata = data.get("metadata", {})
         topic = metadata.get("topic", "")
         difficulty = metadata.get("difficulty", "medium")
-        
-        
+
         try:
             from core.llm import LLMService
             from core.workflow_loader import load_workflow
@@ -60,10 +75,10 @@ class IsomorphicGenerator:
             workflow_spec = load_workflow("variant")
             latex_skill = load_skill("latex_core")
         except ImportError:
-            return self._fallback_variations(input_exercise, count)
+            return self._fallback_variations(data, count)
 
         # Extract context
-        latex_content = input_exercise.get("latex", "")
+        latex_content = data.get("latex", "")
         agent_definition = self._load_agent_definition()
         
         system_prompt = f"""You are an expert mathematics educator creating isomorphic variations of exercises.
@@ -97,13 +112,38 @@ class IsomorphicGenerator:
         """
         
         user_prompt = f"Create {count} isomorphic variations."
+        if existing:
+            user_prompt += " They must differ from these existing variations:\n" + "\n".join(
+                str(variation.get("latex", ""))[:400] for variation in existing)
         
         try:
             result = llm.generate_json(user_prompt, system_instruction=system_prompt)
-            return result.get("variations", [])
+            variations = [v for v in result.get("variations", []) if isinstance(v, dict)][:count]
         except Exception as e:
             print(f"LLM Error in IsomorphicGenerator: {e}")
-            return self._fallback_variations(input_exercise, count)
+            return self._fallback_variations(data, count)
+
+        try:
+            from core.exercise_bank import save_exercises
+            save_exercises(variations, topic, difficulty, source="isomorphic_generator")
+        except ImportError:
+            pass
+        return variations
+
+    def _parametric_variations(self, exercise, count, seed):
+        """
+        Local variants from the parametric engine; None (or empty) when the
+        exercise has no parametrisable equation or no clean variant was found.
+        """
+        try:
+            from skills.clean_numbers.scripts.variants import make_variants
+        except ImportError:
+            return None
+        try:
+            return make_variants(exercise, count, seed=seed)
+        except Exception as e:
+            print(f"Warning: Parametric variant engine failed: {e}")
+            return None
 
     def _fallback_variations(self, input_exercise, count):
         variations = []
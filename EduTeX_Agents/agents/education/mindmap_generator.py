@@ -91,6 +91,10 @@ class MindmapGenerator:
             except Exception as e:
                 print(f"Error generating mindmap: {e}")
 
+        return self._fallback_mindmap(topic)
+
+    @staticmethod
+    def _fallback_mindmap(topic):
         # Fallback (Mock structure)
         if "quadratic" in topic.lower():
              return {
@@ -103,6 +107,14 @@ class MindmapGenerator:
             }
         return {"root": topic, "branches": []}
 
+    @classmethod
+    def is_fallback(cls, topic, data) -> bool:
+        """
+        True if data is the mock structure returned when the LLM is unavailable
+        or failed (callers should not cache it).
+        """
+        return data == cls._fallback_mindmap(topic)
+
 if __name__ == "__main__":
     gen = MindmapGenerator()
     print(gen.generate_mindmap_data("Quadratic Equations"))
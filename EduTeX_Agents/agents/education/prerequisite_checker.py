@@ -96,7 +96,16 @@ class PrerequisiteChecker:
             print(f"LLM Error in PrerequisiteChecker: {e}")
             return self._fallback_check(topic)
 
-    def _fallback_check(self, topic):
+    @classmethod
+    def is_fallback(cls, topic, result) -> bool:
+        """
+        True if result is the offline answer returned when the LLM is unavailable
+        or failed (callers should not cache it).
+        """
+        return result == cls._fallback_check(topic)
+
+    @staticmethod
+    def _fallback_check(topic):
         if "calculus" in topic.lower():
              return {
                  "status": "warning",
@@ -0,0 +1,47 @@
+import sys
+import os
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import core.llm
+import core.exercise_bank
+from agents.education.isomorphic_generator import IsomorphicGenerator
+
+
+class FakeLLM:
+    prompts = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def generate_json(self, prompt, system_instruction="", **kwargs):
+        FakeLLM.prompts.append(prompt)
+        return {"variations": [{"latex": f"LLM variation {i}", "metadata": {}} for i in range(5)]}
+
+
+def test_parametric_shortfall_is_topped_up_by_the_llm(monkeypatch):
+    monkeypatch.setattr(core.llm, "LLMService", FakeLLM)
+    monkeypatch.setattr(core.exercise_bank, "save_exercises", lambda *args, **kwargs: None)
+    FakeLLM.prompts = []
+    exercise = {"latex": "Δίνεται η $f(x) = x^2 - 4$.", "metadata": {"topic": "Συναρτήσεις"}}
+
+    variations = IsomorphicGenerator().generate_variations(exercise, count=4)
+
+    assert len(variations) == 4
+    assert not variations[0]["latex"].startswith("LLM")  # the parametric variant comes first
+    assert [v["latex"] for v in variations[1:]] == ["LLM variation 0", "LLM variation 1", "LLM variation 2"]
+    assert len(FakeLLM.prompts) == 1
+    assert FakeLLM.prompts[0].startswith("Create 3 isomorphic variations.")
+    assert variations[0]["latex"][:40] in FakeLLM.prompts[0]
+
+
+def test_enough_parametric_variants_skip_the_llm(monkeypatch):
+    monkeypatch.setattr(core.llm, "LLMService", FakeLLM)
+    FakeLLM.prompts = []
+    exercise = {"latex": "Να λυθεί η $x^2 - 5x + 6 = 0$.", "metadata": {}}
+
+    variations = IsomorphicGenerator().generate_variations(exercise, count=3)
+
+    assert len(variations) == 3
+    assert FakeLLM.prompts == []
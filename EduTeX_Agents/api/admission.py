@@ -0,0 +1,354 @@
+"""
+Per-tenant admission control and weighted fair queueing.
+
+A tenant is the caller's X-Gemini-API-Key (hashed, never stored raw) or,
+without a key, the client address. Agent requests pass through a shared
+pool of executor slots:
+
+- each tenant may hold at most 'tenant_limit' slots at once,
+- waiting requests are served in weighted fair order (stride scheduling),
+  so a bulk script cannot starve other schools,
+- a tenant whose queue is full, or whose request waited longer than
+  'queue_timeout', gets 429 with a Retry-After estimate.
+
+Idle tenants (nothing active or queued) are kept for their counters, up to
+'max_tenants'; beyond that the least recently seen idle ones are dropped.
+
+With several worker processes, pass a shared store as 'leases' so the
+per-tenant limit holds across workers: each running request also holds a
+lease. Store calls run in worker threads, never on the event loop. A
+tenant whose leases are all held by other workers hands its local slot
+back and asks the store again after a back-off (poll_interval, doubling
+up to max_poll_interval); releases in this worker wake it at once.
+"""
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, Optional, Set, Tuple
+
+from starlette.datastructures import Headers  # type: ignore
+from starlette.responses import JSONResponse  # type: ignore
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, tenant: str, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.tenant = tenant
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def tenant_id(api_key: Optional[str], client_host: Optional[str]) -> str:
+    """Stable, non-reversible tenant identifier."""
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    return f"ip:{client_host or 'unknown'}"
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parses 'key:abc123=2,ip:10.0.0.5=0.5' into {tenant: weight}."""
+    weights: Dict[str, float] = {}
+    for item in spec.split(","):
+        name, sep, value = item.strip().rpartition("=")
+        if not sep or not name:
+            continue
+        try:
+            weights[name.strip()] = max(float(value), 0.01)
+        except ValueError:
+            print(f"Warning: Ignoring invalid tenant weight '{item}'")
+    return weights
+
+
+class _Tenant:
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        self.active = 0
+        self.waiting: Deque[asyncio.Future] = deque()
+        self.pass_value = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.wait_total = 0.0
+        self.retry_at = 0.0  # shared leases held elsewhere: no local grant before this (monotonic)
+        self.backoff = 0.0
+
+
+class AdmissionController:
+    def __init__(self, global_limit: int = 8, tenant_limit: int = 2, max_queue: int = 20,
+                 queue_timeout: float = 30.0, weights: Optional[Dict[str, float]] = None,
+                 leases=None, lease_ttl: float = 600.0, poll_interval: float = 0.25, max_poll_interval: float = 2.0,
+                 max_tenants: int = 1024):
+        self.global_limit = max(1, global_limit)
+        self.tenant_limit = max(1, tenant_limit)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.weights = weights or {}
+        self.leases = leases
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(poll_interval, max_poll_interval)
+        self.max_tenants = max(1, max_tenants)
+        self.active = 0
+        self._tenants: "OrderedDict[str, _Tenant]" = OrderedDict()
+        self._virtual_time = 0.0
+        self._service_ewma = 5.0  # seconds; refined from observed request durations
+        self._lease_tasks: Set[asyncio.Future] = set()
+
+    def _tenant(self, name: str) -> _Tenant:
+        t = self._tenants.get(name)
+        if t is None:
+            self._prune()
+            t = self._tenants[name] = _Tenant(name, self.weights.get(name, 1.0))
+            t.pass_value = self._virtual_time  # what an evicted tenant would get back from idle anyway
+        else:
+            self._tenants.move_to_end(name)
+        return t
+
+    def _prune(self):
+        """Makes room for a new tenant by dropping the least recently seen idle ones."""
+        excess = len(self._tenants) + 1 - self.max_tenants
+        if excess <= 0:
+            return
+        idle = [name for name, t in self._tenants.items() if not t.active and not t.waiting]
+        for name in idle[:excess]:
+            del self._tenants[name]
+
+    def _eligible(self, t: _Tenant, now: float) -> bool:
+        return bool(t.waiting) and t.active < self.tenant_limit and t.retry_at <= now
+
+    def _grant(self, t: _Tenant):
+        t.active += 1
+        t.admitted += 1
+        self.active += 1
+        self._virtual_time = t.pass_value
+        t.pass_value += 1.0 / t.weight
+
+    def _ungrant(self, t: _Tenant):
+        """Hands back a slot granted locally whose shared lease was refused."""
+        t.active -= 1
+        t.admitted -= 1
+        self.active -= 1
+        t.pass_value -= 1.0 / t.weight
+
+    def _acquire_lease(self, name: str) -> Tuple[bool, Optional[str]]:
+        """Blocking store call (worker thread); always granted when the store is unavailable."""
+        try:
+            lease = self.leases.acquire_lease("tenant:" + name, self.tenant_limit, self.lease_ttl)
+        except Exception as e:
+            print(f"Warning: Shared lease store unavailable, admitting locally: {e}")
+            return True, None
+        return lease is not None, lease
+
+    def _release_lease(self, name: str, lease: str):
+        try:
+            self.leases.release_lease("tenant:" + name, lease)
+        except Exception as e:
+            print(f"Warning: Could not release shared lease: {e}")
+
+    def _in_thread(self, func, *args, then=None) -> asyncio.Future:
+        """Runs a store call off the event loop; then(result) runs back on the loop."""
+        task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        self._lease_tasks.add(task)
+
+        def done(f: asyncio.Future):
+            self._lease_tasks.discard(f)
+            if then is not None and not f.cancelled() and f.exception() is None:
+                then(f.result())
+        task.add_done_callback(done)
+        return task
+
+    async def _take_lease(self, t: _Tenant) -> Tuple[bool, Optional[str]]:
+        """
+        Cross-worker tenant slot for a locally granted request (always granted
+        without a shared store). When other workers hold all of the tenant's
+        leases, the local slot is handed back and the tenant backs off
+        (poll_interval, doubling up to max_poll_interval) before the store is
+        asked again.
+        """
+        if self.leases is None:
+            return True, None
+        task = self._in_thread(self._acquire_lease, t.name)
+        try:
+            ok, lease = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # The thread still runs; give back whatever lease it gets
+            task.add_done_callback(
+                lambda f: not f.cancelled() and f.exception() is None and f.result()[1] is not None
+                and self._in_thread(self._release_lease, t.name, f.result()[1])
+            )
+            raise
+        if ok:
+            t.backoff = 0.0
+            return True, lease
+        self._ungrant(t)
+        t.backoff = min(max(2 * t.backoff, self.poll_interval), self.max_poll_interval)
+        t.retry_at = time.monotonic() + t.backoff
+        self._dispatch()
+        return False, None
+
+    def _dispatch(self):
+        """Hands free slots to backlogged tenants, lowest pass value first (no store I/O)."""
+        now = time.monotonic()
+        while self.active < self.global_limit:
+            eligible = [t for t in self._tenants.values() if self._eligible(t, now)]
+            if not eligible:
+                return
+            t = min(eligible, key=lambda x: x.pass_value)
+            fut = t.waiting.popleft()
+            self._grant(t)
+            fut.set_result(None)
+
+    def _retry_after(self, t: _Tenant) -> int:
+        backlog = len(t.waiting) + t.active + 1
+        return max(1, math.ceil(self._service_ewma * backlog / self.tenant_limit))
+
+    def _reject(self, name: str, t: _Tenant, reason: str) -> AdmissionRejected:
+        t.rejected += 1
+        return AdmissionRejected(name, reason, self._retry_after(t))
+
+    async def acquire(self, name: str) -> Optional[str]:
+        """
+        Waits for an executor slot; raises AdmissionRejected when over budget.
+        Returns the shared lease id (None without a shared store).
+        """
+        t = self._tenant(name)
+        start = time.monotonic()
+        backlogged = any(self._eligible(x, start) for x in self._tenants.values())
+        if (not backlogged and self.active < self.global_limit and t.active < self.tenant_limit
+                and t.retry_at <= start):
+            t.pass_value = max(t.pass_value, self._virtual_time)
+            self._grant(t)
+            try:
+                ok, lease = await self._take_lease(t)
+            except asyncio.CancelledError:
+                self._release_slot(t)
+                raise
+            if ok:
+                return lease
+
+        if len(t.waiting) >= self.max_queue:
+            raise self._reject(name, t, "Too many queued requests for this tenant")
+
+        if not t.waiting:
+            # Returning from idle: do not let banked credit jump the queue
+            t.pass_value = max(t.pass_value, self._virtual_time)
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        t.waiting.append(fut)
+        self._dispatch()
+
+        deadline = start + self.queue_timeout
+        try:
+            while True:
+                while not fut.done():
+                    now = time.monotonic()
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        break
+                    if t.retry_at > now:
+                        # Leases released by other workers do not wake us up: look again after the back-off
+                        remaining = min(remaining, t.retry_at - now)
+                    await asyncio.wait({fut}, timeout=remaining)
+                    if not fut.done():
+                        self._dispatch()
+                if not fut.done():
+                    self._abandon(t, fut)
+                    raise self._reject(name, t, "Timed out waiting for an executor slot")
+                ok, lease = await self._take_lease(t)
+                if ok:
+                    t.wait_total += time.monotonic() - start
+                    return lease
+                # Slot handed back; keep our place at the head of the tenant's queue
+                fut = loop.create_future()
+                t.waiting.appendleft(fut)
+        except asyncio.CancelledError:
+            self._abandon(t, fut)
+            raise
+
+    def _abandon(self, t: _Tenant, fut: asyncio.Future):
+        if fut.done():
+            # Slot was granted just as the waiter gave up
+            self._release_slot(t)
+        else:
+            t.waiting.remove(fut)
+            fut.cancel()
+
+    def release(self, name: str, duration: Optional[float] = None, lease: Optional[str] = None):
+        t = self._tenants.get(name)
+        if t is None:
+            return
+        if duration is not None:
+            self._service_ewma = 0.8 * self._service_ewma + 0.2 * duration
+        t.completed += 1
+        self._release_slot(t, lease)
+
+    def _release_slot(self, t: _Tenant, lease: Optional[str] = None):
+        if lease is not None and self.leases is not None:
+            # Drop the shared lease off the event loop, then free the local slot
+            self._in_thread(self._release_lease, t.name, lease, then=lambda _: self._free(t))
+            return
+        self._free(t)
+
+    def _free(self, t: _Tenant):
+        t.active -= 1
+        self.active -= 1
+        t.retry_at = 0.0  # our own lease is free again
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "global_limit": self.global_limit,
+            "tenant_limit": self.tenant_limit,
+            "max_queue": self.max_queue,
+            "tenants": {
+                name: {
+                    "weight": t.weight,
+                    "active": t.active,
+                    "queued": len(t.waiting),
+                    "admitted": t.admitted,
+                    "completed": t.completed,
+                    "rejected": t.rejected,
+                    "avg_wait_ms": round(1000 * t.wait_total / t.admitted, 1) if t.admitted else 0.0,
+                }
+                for name, t in self._tenants.items()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that gates agent calls (POST /api/*) through the controller.
+    """
+    def __init__(self, app, controller: AdmissionController, exempt_paths: Iterable[str] = ()):
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = set(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "POST"
+                or not scope["path"].startswith("/api/") or scope["path"] in self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        name = tenant_id(Headers(scope=scope).get("x-gemini-api-key"), client[0] if client else None)
+        try:
+            lease = await self.controller.acquire(name)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": e.reason, "tenant": e.tenant},
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name, time.monotonic() - start, lease)
@@ -0,0 +1,107 @@
+"""
+Lazy agent loading.
+
+Agent modules are imported on first use instead of at API import time
+(several pull in the LLM clients, SymPy, the template registry...).
+Availability can still be reported cheaply: importlib.util.find_spec
+locates a module without executing it.
+"""
+import importlib
+import importlib.util
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+# class name -> module path
+AGENT_MODULES: Dict[str, str] = {
+    # Education Agents
+    "ExamCreator": "agents.education.exam_creator",
+    "ExerciseGenerator": "agents.education.exercise_generator",
+    "SolutionWriter": "agents.education.solution_writer",
+    "IsomorphicGenerator": "agents.education.isomorphic_generator",
+    "DifficultyCalibrator": "agents.education.difficulty_calibrator",
+    "HintGenerator": "agents.education.hint_generator",
+    "PitfallDetector": "agents.education.pitfall_detector",
+    "RubricDesigner": "agents.education.rubric_designer",
+    "MindmapGenerator": "agents.education.mindmap_generator",
+    "PrerequisiteChecker": "agents.education.prerequisite_checker",
+    "MultiMethodSolver": "agents.education.multi_method_solver",
+    "PanhellenicFormatter": "agents.education.panhellenic_formatter",
+    # Document Agents
+    "DocumentBuilder": "agents.documents.document_builder",
+    "TikZExpert": "agents.documents.tikz_expert",
+    "TableFormatter": "agents.documents.table_formatter",
+    "BeamerCreator": "agents.documents.beamer_creator",
+    "BibliographyManager": "agents.documents.bibliography_manager",
+    "TemplateCurator": "agents.documents.template_curator",
+    "FixAgent": "agents.documents.fix_agent",
+}
+
+_loaded: Dict[str, Any] = {}
+_failed: Dict[str, str] = {}
+_load_times: Dict[str, float] = {}
+_lock = threading.RLock()
+
+
+def load_agent(class_name: str) -> Optional[Any]:
+    """Imports (once) and returns the agent class, or None on import errors."""
+    agent = _loaded.get(class_name)
+    if agent is not None or class_name in _failed:
+        return agent
+
+    with _lock:
+        if class_name in _loaded or class_name in _failed:
+            return _loaded.get(class_name)
+        module_path = AGENT_MODULES.get(class_name)
+        if module_path is None:
+            _failed[class_name] = "unknown agent"
+            return None
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(module_path)
+            agent = getattr(module, class_name)
+        except (ImportError, AttributeError) as e:
+            print(f"Warning: Could not import {class_name} from {module_path}: {e}")
+            _failed[class_name] = str(e)
+            return None
+        _load_times[class_name] = time.perf_counter() - start
+        _loaded[class_name] = agent
+        return agent
+
+
+def agent_available(class_name: str) -> bool:
+    """True if the agent is loaded or its module can be found (without importing it)."""
+    if class_name in _loaded:
+        return True
+    if class_name in _failed:
+        return False
+    module_path = AGENT_MODULES.get(class_name)
+    if module_path is None:
+        return False
+    try:
+        return importlib.util.find_spec(module_path) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def warmup(class_names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Imports the given agents (default: all) ahead of the first request.
+    Returns per-agent load time in ms, or the import error.
+    """
+    report: Dict[str, Any] = {}
+    for name in (class_names or AGENT_MODULES):
+        if load_agent(name) is None:
+            report[name] = {"error": _failed.get(name, "unavailable")}
+        else:
+            report[name] = {"ms": round(1000 * _load_times.get(name, 0.0), 1)}
+    return report
+
+
+def load_report() -> Dict[str, Any]:
+    """Current lazy-loading state (for diagnostics)."""
+    return {
+        "loaded": {name: round(1000 * _load_times.get(name, 0.0), 1) for name in _loaded},
+        "failed": dict(_failed),
+        "pending": [name for name in AGENT_MODULES if name not in _loaded and name not in _failed],
+    }
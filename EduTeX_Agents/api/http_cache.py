@@ -0,0 +1,145 @@
+"""
+HTTP response caching for deterministic endpoints.
+
+- Strong ETags computed from the exact serialized JSON body.
+- If-None-Match -> 304 Not Modified on GET/HEAD (no body re-download);
+  on other methods a matching ETag is a failed precondition (412, RFC 9110
+  §13.1.2), so revalidating clients use the GET form of an endpoint.
+- Per-endpoint Cache-Control policies.
+- A small TTL/LRU store so identical inputs skip the agent call (shared
+  across workers when STATE_BACKEND=sqlite).
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response  # type: ignore
+from fastapi.encoders import jsonable_encoder  # type: ignore
+
+from api.serialization import JSON_RESPONSE_CLASS  # type: ignore
+from core.shared_store import get_store  # type: ignore
+
+# Cache-Control per endpoint. These endpoints ask clients to revalidate with
+# the ETag (If-None-Match on the GET form) instead of reusing a stored copy.
+CACHE_POLICIES: Dict[str, str] = {
+    "/api/agents": "public, max-age=60",
+    "/api/format-table": "private, no-cache",
+    "/api/check-prerequisites": "private, no-cache",
+    "/api/generate-mindmap": "private, no-cache",
+}
+DEFAULT_POLICY = "no-store"
+
+
+class ResponseCache:
+    """
+    TTL + LRU store for serialized response bodies, backed by the process
+    store (per-process dict, or SQLite shared by all workers).
+    """
+    NAMESPACE = "response"
+
+    def __init__(self, max_entries: int = 512, ttl: float = 300.0, store=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store if store is not None else get_store()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        body = self.store.get(self.NAMESPACE, key)
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def set(self, key: str, body: bytes):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        self.store.set(self.NAMESPACE, key, body, self.ttl, max_entries=self.max_entries)
+
+    def clear(self):
+        self.store.clear(self.NAMESPACE)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {"entries": self.store.count(self.NAMESPACE), "hits": hits, "misses": misses}
+
+
+def cache_key(endpoint: str, payload: Any) -> str:
+    """
+    Stable key for an endpoint + request payload (key order independent).
+    """
+    canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{endpoint}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def json_body(content: Any) -> bytes:
+    """
+    Serializes content exactly as the app's JSON response class would.
+    """
+    return JSON_RESPONSE_CLASS(jsonable_encoder(content)).body
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluates an If-None-Match header (RFC 9110: weak comparison for GET/HEAD).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def etag_response(http_request: Request, body: bytes, cache_control: Optional[str] = None) -> Response:
+    """
+    Returns 304 if the client already holds this body (412 instead for
+    methods other than GET/HEAD), else the JSON body, with ETag and
+    Cache-Control headers in all cases.
+    """
+    etag = make_etag(body)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control or CACHE_POLICIES.get(http_request.url.path, DEFAULT_POLICY),
+    }
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        if http_request.method in ("GET", "HEAD"):
+            return Response(status_code=304, headers=headers)
+        return Response(status_code=412, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def memoized_response(
+    http_request: Request,
+    cache: ResponseCache,
+    key: str,
+    producer: Callable[[], Any],
+    should_store: Optional[Callable[[Any], bool]] = None,
+) -> Response:
+    """
+    Serves 'key' from the cache, or calls producer() and stores its result
+    (unless should_store(result) is False), then applies ETag handling.
+    """
+    body = cache.get(key)
+    if body is None:
+        result = producer()
+        body = json_body(result)
+        if should_store is None or should_store(result):
+            cache.set(key, body)
+    return etag_response(http_request, body)
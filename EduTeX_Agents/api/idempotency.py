@@ -0,0 +1,193 @@
+"""
+Idempotency-Key support for expensive generation endpoints.
+
+A client that retries a POST with the same Idempotency-Key header gets the
+result of a single execution:
+
+- the first request runs the pipeline,
+- duplicates arriving while it runs wait for that execution (in-process
+  via a Future, across workers by polling the shared store) for up to
+  wait_timeout, then get 409,
+- duplicates within the TTL get the stored response, marked with
+  'Idempotent-Replayed: true'.
+
+Keys are scoped per endpoint and tenant. Reusing a key with a different
+request body is rejected with 422. Failed executions are not stored, so a
+retry after an error runs again.
+
+The running execution's claim in the shared store is a short lease
+(claim_ttl) renewed while the producer runs, however long that takes; if
+the worker dies, the claim lapses and a retry runs the request again.
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response  # type: ignore
+
+from api.admission import tenant_id  # type: ignore
+from api.http_cache import cache_key, json_body  # type: ignore
+from core.shared_store import get_store  # type: ignore
+
+PENDING = b"pending"
+
+
+class IdempotencyStore:
+    NAMESPACE = "idempotency"
+
+    def __init__(self, ttl: float = 3600.0, wait_timeout: float = 300.0, poll_interval: float = 0.5, store=None,
+                 claim_ttl: float = 30.0):
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.claim_ttl = claim_ttl
+        self.store = store if store is not None else get_store()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.attached = 0
+        self.replayed = 0
+
+    @staticmethod
+    def _encode(fingerprint: str, body: bytes) -> bytes:
+        return fingerprint.encode("ascii") + b"\n" + body
+
+    @staticmethod
+    def _decode(record: bytes) -> Tuple[str, bytes]:
+        fingerprint, _, body = record.partition(b"\n")
+        return fingerprint.decode("ascii"), body
+
+    def _check(self, record: bytes, fingerprint: str) -> bytes:
+        stored_fp, body = self._decode(record)
+        if stored_fp != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        return body
+
+    def _await_other_worker(self, key: str, fingerprint: str) -> Optional[bytes]:
+        """Polls until another worker stores the result; None if its claim disappears."""
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            record = self.store.get(self.NAMESPACE, key)
+            if record is None:
+                return None  # failed (or expired); the caller may run it
+            if not record.startswith(PENDING + b"\n"):
+                return self._check(record, fingerprint)
+        raise self._in_progress()
+
+    @staticmethod
+    def _in_progress() -> HTTPException:
+        return HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+
+    def _renew_claim(self, key: str, claim: bytes, done: threading.Event):
+        """Re-sets the PENDING claim every claim_ttl / 3 until done is set."""
+        while not done.wait(self.claim_ttl / 3):
+            try:
+                self.store.set(self.NAMESPACE, key, claim, self.claim_ttl)
+            except Exception as e:
+                print(f"Warning: Could not renew idempotency claim: {e}")
+
+    def run(self, key: str, fingerprint: str, producer: Callable[[], Any]) -> Tuple[bytes, bool]:
+        """
+        Returns (JSON body, replayed) for the single execution of 'key'.
+        """
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+        if not owner:
+            self.attached += 1
+            try:
+                stored_fp, body = fut.result(timeout=self.wait_timeout)  # re-raises the execution's error
+            except FutureTimeout:
+                raise self._in_progress()
+            if stored_fp != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            return body, True
+
+        try:
+            result = self._run_owned(key, fingerprint, producer)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        fut.set_result((fingerprint, result[0]))
+        return result
+
+    def _run_owned(self, key: str, fingerprint: str, producer: Callable[[], Any]) -> Tuple[bytes, bool]:
+        claim = PENDING + b"\n" + fingerprint.encode("ascii")
+        while True:
+            if self.store.add(self.NAMESPACE, key, claim, self.claim_ttl):
+                break
+            record = self.store.get(self.NAMESPACE, key)
+            if record is None:
+                continue
+            if not record.startswith(PENDING + b"\n"):
+                body = self._check(record, fingerprint)
+                self.replayed += 1
+                return body, True
+            if record.partition(b"\n")[2].decode("ascii") != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            body = self._await_other_worker(key, fingerprint)
+            if body is not None:
+                self.attached += 1
+                return body, True
+
+        done = threading.Event()
+        renewer = threading.Thread(target=self._renew_claim, args=(key, claim, done),
+                                   name="idempotency-claim", daemon=True)
+        renewer.start()
+        try:
+            body = json_body(producer())
+        except BaseException:
+            done.set()
+            renewer.join()
+            self.store.delete(self.NAMESPACE, key)
+            raise
+        done.set()
+        renewer.join()  # a late renewal must not overwrite the result
+        self.store.set(self.NAMESPACE, key, self._encode(fingerprint, body), self.ttl)
+        self.executed += 1
+        return body, False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executed": self.executed,
+            "attached": self.attached,
+            "replayed": self.replayed,
+            "in_flight": len(self._inflight),
+        }
+
+
+def idempotent_response(
+    http_request: Request,
+    store: IdempotencyStore,
+    idempotency_key: Optional[str],
+    payload: Any,
+    producer: Callable[[], Any],
+) -> Any:
+    """
+    Runs producer() at most once per (endpoint, tenant, Idempotency-Key).
+    Without the header the producer's result is returned unchanged.
+    """
+    if not idempotency_key or store.ttl <= 0:
+        return producer()
+    if len(idempotency_key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be at most 255 characters")
+
+    path = http_request.url.path
+    client = http_request.client
+    tenant = tenant_id(http_request.headers.get("x-gemini-api-key"), client.host if client else None)
+    key = hashlib.sha256(json.dumps([path, tenant, idempotency_key]).encode("utf-8")).hexdigest()
+    body, replayed = store.run(key, cache_key(path, payload), producer)
+
+    headers = {"Idempotency-Key": idempotency_key}
+    if replayed:
+        headers["Idempotent-Replayed"] = "true"
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,120 @@
+"""
+Prompt classifier for /api/orchestrate.
+
+All Greek and English routing keywords are compiled once into a trie
+(KeywordIndex), so a prompt is scanned in a single pass however many
+keywords there are. Text is normalized before matching (accents
+stripped, case folded, final sigma folded), so "Άσκηση", "ασκηση" and
+"ΑΣΚΗΣΕΙΣ" all hit the same keyword.
+
+Keywords are stems matched at the start of a word: "παραλλαγ" matches
+"παραλλαγές", but "fix" does not match "prefix". A word counts once per
+agent however many of its stems match.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.textnorm import fold  # type: ignore
+
+# (keyword, agent id or None for domain-only keywords, domain, weight)
+KEYWORDS: List[Tuple[str, Optional[str], str, float]] = []
+
+
+def _add(agent: Optional[str], domain: str, words: Iterable[str], weight: float = 1.0):
+    KEYWORDS.extend((w, agent, domain, weight) for w in words)
+
+
+# Education
+_add("exercise-generator", "EDUCATION", ["άσκηση", "ασκήσε", "φυλλάδιο", "exercise", "worksheet", "problem set"])
+_add("exam-creator", "EDUCATION", ["διαγώνισμα", "τεστ", "exam", "test", "quiz"])
+_add("solution-writer", "EDUCATION", ["λύση", "λύσε", "solution", "solve"])
+_add("isomorphic-generator", "EDUCATION", ["παραλλαγ", "variant", "variation"])
+_add("difficulty-calibrator", "EDUCATION", ["δυσκολί", "βαθμονόμ", "difficulty", "calibrat"])
+_add("hint-generator", "EDUCATION", ["υπόδειξ", "υποδείξ", "hint"])
+_add("pitfall-detector", "EDUCATION", ["λάθη", "λάθος", "παγίδ", "pitfall", "mistake", "misconception"])
+_add("rubric-designer", "EDUCATION", ["rubric", "βαθμολογ", "κριτήρι", "grading"])
+_add("mindmap-generator", "EDUCATION", ["mindmap", "mind map", "concept map", "εννοιολογικ"])
+_add("prerequisite-checker", "EDUCATION", ["προαπαιτούμεν", "prerequisite"])
+_add("multi-method-solver", "EDUCATION", ["μέθοδ", "method"])
+_add("panhellenic-formatter", "EDUCATION", ["πανελλήνι", "panhellenic"], weight=2.0)
+_add(None, "EDUCATION", ["θεωρία", "θεωρίες", "theory"])
+
+# Documents
+_add("document-builder", "DOCUMENTS", ["έγγραφ", "άρθρο", "article", "report", "αναφορά", "document",
+                                       "cv", "βιογραφικ", "επιστολ", "letter"])
+_add("tikz-expert", "DOCUMENTS", ["tikz", "pgfplots", "σχήμα", "γράφημα", "διάγραμμα",
+                                  "figure", "plot", "diagram"], weight=1.5)
+_add("table-formatter", "DOCUMENTS", ["πίνακα", "πίνακες", "table", "tabular"])
+_add("beamer-creator", "DOCUMENTS", ["παρουσίασ", "slide", "beamer", "presentation"])
+_add("bibliography-manager", "DOCUMENTS", ["bibliography", "bibtex", "βιβλιογραφ", "citation"])
+_add("template-curator", "DOCUMENTS", ["template", "πρότυπ"])
+_add("fix-agent", "DOCUMENTS", ["fix", "διόρθωσ", "compile error", "σφάλμα"])
+
+
+normalize = fold  # accent-insensitive, case-folded form used for matching
+
+
+class KeywordIndex:
+    """
+    All keywords merged into one trie and emitted as a single regular
+    expression (shared prefixes factored out), so a scan is one pass of the
+    C regex engine instead of one substring search per keyword.
+    """
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self._payloads: Dict[str, List[Any]] = {}
+        trie: Dict[str, Any] = {}
+        for word, payload in patterns:
+            self._payloads.setdefault(word, []).append(payload)
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[""] = {}  # end of a keyword
+        self.pattern = re.compile(r"(?<!\w)" + self._to_regex(trie))
+
+    @classmethod
+    def _to_regex(cls, node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + cls._to_regex(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail: the longest keyword at a position wins
+        return "(?:" + body + ")?" if "" in node else body
+
+    def iter_matches(self, text: str):
+        """Yields (start index, payload) for every keyword starting a word in text."""
+        payloads = self._payloads
+        for m in self.pattern.finditer(text):
+            word = m.group()
+            # Shorter keywords that are prefixes of the longest match also hit
+            for end in range(1, len(word) + 1):
+                for payload in payloads.get(word[:end], ()):
+                    yield m.start(), payload
+
+
+_INDEX = KeywordIndex(
+    (normalize(word), (agent, domain, weight)) for word, agent, domain, weight in KEYWORDS
+)
+
+
+def classify(prompt: str) -> Dict[str, Any]:
+    """
+    Scores domains and agents by keyword hits in one pass over the prompt.
+    Returns {"domain", "domain_scores", "agents": [(agent id, score), ...] best first}.
+    """
+    domain_scores: Dict[str, float] = {"EDUCATION": 0.0, "DOCUMENTS": 0.0}
+    agent_scores: Dict[str, float] = {}
+    seen = set()
+    for start, (agent, domain, weight) in _INDEX.iter_matches(normalize(prompt)):
+        # Nested stems ("λύσ" / "λύσε") hitting the same word count once
+        if (start, agent, domain) in seen:
+            continue
+        seen.add((start, agent, domain))
+        domain_scores[domain] += weight
+        if agent is not None:
+            agent_scores[agent] = agent_scores.get(agent, 0.0) + weight
+
+    # Ties go to EDUCATION, as before
+    best = max(domain_scores, key=lambda d: (domain_scores[d], d == "EDUCATION"))
+    domain = best if domain_scores[best] > 0 else "unknown"
+    ranked = sorted(agent_scores.items(), key=lambda kv: -kv[1])
+    return {"domain": domain, "domain_scores": domain_scores, "agents": ranked}
@@ -2,55 +2,69 @@ import sys
 import os
 import uuid
 import json
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, Header  # type: ignore
-from pydantic import BaseModel  # type: ignore
+from functools import lru_cache
+from fastapi import FastAPI, HTTPException, Header, Request, Response  # type: ignore
+from pydantic import BaseModel, Field  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
+from fastapi.concurrency import run_in_threadpool  # type: ignore
 
 # Add project root to sys.path to allow imports from agents/skills
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
-# ─── Import All Agents ───────────────────────────────────────────────
-
-def safe_import(module_path, class_name) -> Any:
-    """Import with fallback for missing modules."""
-    try:
-        import importlib
-        module = importlib.import_module(module_path)
-        return getattr(module, class_name)
-    except (ImportError, AttributeError) as e:
-        print(f"Warning: Could not import {class_name} from {module_path}: {e}")
-        return None
-
-# Education Agents
-ExamCreator = safe_import("agents.education.exam_creator", "ExamCreator")
-ExerciseGenerator = safe_import("agents.education.exercise_generator", "ExerciseGenerator")
-SolutionWriter = safe_import("agents.education.solution_writer", "SolutionWriter")
-IsomorphicGenerator = safe_import("agents.education.isomorphic_generator", "IsomorphicGenerator")
-DifficultyCalibrator = safe_import("agents.education.difficulty_calibrator", "DifficultyCalibrator")
-HintGenerator = safe_import("agents.education.hint_generator", "HintGenerator")
-PitfallDetector = safe_import("agents.education.pitfall_detector", "PitfallDetector")
-RubricDesigner = safe_import("agents.education.rubric_designer", "RubricDesigner")
-MindmapGenerator = safe_import("agents.education.mindmap_generator", "MindmapGenerator")
-PrerequisiteChecker = safe_import("agents.education.prerequisite_checker", "PrerequisiteChecker")
-MultiMethodSolver = safe_import("agents.education.multi_method_solver", "MultiMethodSolver")
-PanhellenicFormatter = safe_import("agents.education.panhellenic_formatter", "PanhellenicFormatter")
-
-# Document Agents
-DocumentBuilder = safe_import("agents.documents.document_builder", "DocumentBuilder")
-TikZExpert = safe_import("agents.documents.tikz_expert", "TikZExpert")
-TableFormatter = safe_import("agents.documents.table_formatter", "TableFormatter")
-BeamerCreator = safe_import("agents.documents.beamer_creator", "BeamerCreator")
-BibliographyManager = safe_import("agents.documents.bibliography_manager", "BibliographyManager")
-TemplateCurator = safe_import("agents.documents.template_curator", "TemplateCurator")
-FixAgent = safe_import("agents.documents.fix_agent", "FixAgent")
+from config import Config  # type: ignore
+from core.concurrency import fan_out  # type: ignore
+from api.serialization import JSON_RESPONSE_CLASS  # type: ignore
+from api.compression import CompressionMiddleware  # type: ignore
+from api.tracing import TracingMiddleware  # type: ignore
+from core.telemetry import REGISTRY, span  # type: ignore
+from api.admission import AdmissionController, AdmissionMiddleware, parse_weights  # type: ignore
+from api.http_cache import ResponseCache, cache_key, etag_response, json_body, memoized_response  # type: ignore
+from api.idempotency import IdempotencyStore, idempotent_response  # type: ignore
+from api.intent import classify  # type: ignore
+from core.shared_store import get_store, is_shared  # type: ignore
+from core.pipeline import NodeMemo  # type: ignore
+from skills.clean_numbers.scripts.solve_cache import worker_cache_stats as clean_number_cache_stats  # type: ignore
+from core import clean_gate  # type: ignore
+
+# ─── Agents (imported lazily on first use, see api/agent_loader.py) ──
+
+from api.agent_loader import agent_available, load_agent, load_report, warmup  # type: ignore
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    """Optional warmup: AGENT_WARMUP=all or a comma list of agent classes."""
+    if Config.AGENT_WARMUP:
+        names = None if Config.AGENT_WARMUP == "all" else [n.strip() for n in Config.AGENT_WARMUP.split(",") if n.strip()]
+        threading.Thread(target=warmup, args=(names,), name="agent-warmup", daemon=True).start()
+    yield
 
 # ─── FastAPI App ─────────────────────────────────────────────────────
 
-app = FastAPI(title="EduTeX Agent API", version="2.0.0")
+app = FastAPI(title="EduTeX Agent API", version="2.0.0", default_response_class=JSON_RESPONSE_CLASS, lifespan=lifespan)
+
+# Per-tenant admission control in front of the agent executor (POST /api/*)
+admission = AdmissionController(
+    global_limit=Config.ADMISSION_GLOBAL_CONCURRENCY,
+    tenant_limit=Config.ADMISSION_TENANT_CONCURRENCY,
+    max_queue=Config.ADMISSION_MAX_QUEUE,
+    queue_timeout=Config.ADMISSION_QUEUE_TIMEOUT,
+    weights=parse_weights(Config.ADMISSION_TENANT_WEIGHTS),
+    max_tenants=Config.ADMISSION_MAX_TENANTS,
+    # Several worker processes: enforce the per-tenant limit through shared leases
+    leases=get_store() if is_shared() else None,
+)
+if Config.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission, exempt_paths={"/api/orchestrate"})
+
+if Config.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=Config.COMPRESSION_MIN_SIZE)
 
 app.add_middleware(
     CORSMiddleware,
@@ -60,6 +74,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Shared cache for deterministic endpoints (ETag + server-side memo)
+response_cache = ResponseCache(max_entries=Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
+
+# Memoised outputs of deterministic flow nodes (prerequisites, mindmap)
+pipeline_memo = NodeMemo(ttl=Config.RESPONSE_CACHE_TTL, max_entries=Config.RESPONSE_CACHE_SIZE)
+
+# Retried generation requests (Idempotency-Key header) run once
+idempotency = IdempotencyStore(ttl=Config.IDEMPOTENCY_TTL, wait_timeout=Config.IDEMPOTENCY_WAIT_TIMEOUT)
+
+if Config.METRICS_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+    REGISTRY.gauge_callback(
+        "edutex_admission_requests", "Requests per tenant by admission state.", ["tenant", "state"],
+        lambda: {
+            (tenant, state): info[state]
+            for tenant, info in admission.stats()["tenants"].items()
+            for state in ("queued", "active", "rejected", "completed")
+        },
+    )
+    REGISTRY.gauge_callback(
+        "edutex_response_cache", "Response cache entries/hits/misses.", ["kind"],
+        lambda: {(kind,): value for kind, value in response_cache.stats().items()},
+    )
+    REGISTRY.gauge_callback(
+        "edutex_idempotent_requests", "Idempotency-Key requests executed/attached/replayed.", ["outcome"],
+        lambda: {(kind,): value for kind, value in idempotency.stats().items()},
+    )
+    REGISTRY.gauge_callback(
+        "edutex_clean_numbers_cache", "Clean-number parse/solve cache entries/hits/misses/hit_rate, summed over the sandbox workers.", ["cache", "kind"],
+        lambda: {(cache, kind): value for cache, info in clean_number_cache_stats().items() for kind, value in info.items()},
+    )
+    REGISTRY.gauge_callback(
+        "edutex_clean_gate", "Clean-number gate: gated exercises, passes, failures, retries and rates.", ["kind"],
+        lambda: {(kind,): value for kind, value in clean_gate.STATS.totals().items()},
+    )
+
 # ─── Pydantic Models ─────────────────────────────────────────────────
 
 # Common
@@ -85,6 +136,8 @@ class GenerationRequest(BaseModel):
     style: Optional[str] = "standard"
     templateStyle: Optional[str] = "scientific"
     mainColor: Optional[str] = "#1285cc"
+    parallelQuestions: Optional[bool] = None  # One LLM call per question (default: Config.EXAM_PARALLEL)
+    reuseFirst: Optional[bool] = None  # Fill questions from the exercise bank first (default: Config.EXAM_REUSE_FIRST)
 
 class QuestionResponse(BaseModel):
     id: str
@@ -128,6 +181,7 @@ class SolutionResponse(BaseModel):
 class VariantRequest(BaseModel):
     exercise: Dict[str, Any]
     count: int = 2
+    seed: int = 0  # Parametric variants are deterministic per seed (e.g. group A = 0, group B = 1)
 
 class VariantResponse(BaseModel):
     variations: List[Dict[str, Any]]
@@ -223,10 +277,12 @@ class LaTeXResponse(BaseModel):
 
 # ─── Helper ──────────────────────────────────────────────────────────
 
-def require_agent(agent_class: Optional[Any], name: str):
-    """Raises 503 if agent is not available."""
+def require_agent(name: str) -> Any:
+    """Loads the agent class on first use; raises 503 if it is not available."""
+    agent_class = load_agent(name)
     if agent_class is None:
         raise HTTPException(status_code=503, detail=f"{name} agent not available (Import Error)")
+    return agent_class
 
 
 # ─── API Endpoints ───────────────────────────────────────────────────
@@ -237,41 +293,130 @@ def read_root():
     return {"status": "online", "system": "EduTeX Agents", "version": "2.0.0"}
 
 
+# (id, name, nameEl, domain, description, endpoint, agent class)
+AGENT_CATALOG = [
+    # Education
+    ("exercise-generator", "Exercise Generator", "Γεννήτρια Ασκήσεων", "EDUCATION", "Creates math exercises", "/api/generate-exercises", "ExerciseGenerator"),
+    ("exam-creator", "Exam Creator", "Δημιουργός Διαγωνισμάτων", "EDUCATION", "Assembles full exams", "/api/generate-exam", "ExamCreator"),
+    ("solution-writer", "Solution Writer", "Συγγραφέας Λύσεων", "EDUCATION", "Step-by-step solutions", "/api/generate-solutions", "SolutionWriter"),
+    ("isomorphic-generator", "Variant Generator", "Γεννήτρια Παραλλαγών", "EDUCATION", "Exercise variations", "/api/generate-variants", "IsomorphicGenerator"),
+    ("difficulty-calibrator", "Difficulty Calibrator", "Βαθμονομητής Δυσκολίας", "EDUCATION", "Calibrates difficulty", "/api/calibrate-difficulty", "DifficultyCalibrator"),
+    ("hint-generator", "Hint Designer", "Σχεδιαστής Υποδείξεων", "EDUCATION", "Progressive hints", "/api/generate-hints", "HintGenerator"),
+    ("pitfall-detector", "Pitfall Detector", "Ανιχνευτής Παγίδων", "EDUCATION", "Common student errors", "/api/detect-pitfalls", "PitfallDetector"),
+    ("rubric-designer", "Rubric Designer", "Σχεδιαστής Κριτηρίων", "EDUCATION", "Grading rubrics", "/api/generate-rubric", "RubricDesigner"),
+    ("mindmap-generator", "Mindmap Generator", "Γεννήτρια Εννοιολογικών Χαρτών", "EDUCATION", "Concept maps", "/api/generate-mindmap", "MindmapGenerator"),
+    ("prerequisite-checker", "Prerequisite Checker", "Ελεγκτής Προαπαιτουμένων", "EDUCATION", "Prerequisite validation", "/api/check-prerequisites", "PrerequisiteChecker"),
+    ("multi-method-solver", "Multi-Method Solver", "Πολυμεθοδικός Λύτης", "EDUCATION", "Multiple solving methods", "/api/multi-method-solve", "MultiMethodSolver"),
+    ("panhellenic-formatter", "Panhellenic Formatter", "Μορφοποιητής Πανελληνίων", "EDUCATION", "Panhellenic exam style", "/api/format-panhellenic", "PanhellenicFormatter"),
+    # Documents
+    ("document-builder", "Document Builder", "Δημιουργός Εγγράφων", "DOCUMENTS", "Articles, reports, CVs", "/api/build-document", "DocumentBuilder"),
+    ("tikz-expert", "TikZ Expert", "Ειδικός TikZ", "DOCUMENTS", "TikZ/PGFPlots figures", "/api/generate-figure", "TikZExpert"),
+    ("table-formatter", "Table Formatter", "Μορφοποιητής Πινάκων", "DOCUMENTS", "LaTeX tables", "/api/format-table", "TableFormatter"),
+    ("beamer-creator", "Beamer Creator", "Δημιουργός Παρουσιάσεων", "DOCUMENTS", "Beamer slides", "/api/create-presentation", "BeamerCreator"),
+    ("bibliography-manager", "Bibliography Manager", "Διαχειριστής Βιβλιογραφίας", "DOCUMENTS", "BibTeX management", "/api/manage-bibliography", "BibliographyManager"),
+    ("template-curator", "Template Curator", "Επιμελητής Προτύπων", "DOCUMENTS", "LaTeX templates", "/api/manage-templates", "TemplateCurator"),
+    ("fix-agent", "LaTeX Fix Agent", "Διορθωτής LaTeX", "DOCUMENTS", "Fix LaTeX errors", "/api/fix-latex", "FixAgent"),
+]
+
+
+def agent_catalog() -> List[AgentInfo]:
+    """Agent catalog with status; does not import agent modules."""
+    return [
+        AgentInfo(id=agent_id, name=name, nameEl=name_el, domain=domain, description=description,  # type: ignore
+                  endpoint=endpoint, status="online" if agent_available(cls) else "offline")
+        for agent_id, name, name_el, domain, description, endpoint, cls in AGENT_CATALOG
+    ]
+
+
+@lru_cache(maxsize=4)
+def _agent_catalog_body(statuses: tuple) -> bytes:
+    return json_body(agent_catalog())
+
+
 @app.get("/api/agents", response_model=List[AgentInfo])
-def list_agents():
-    """Returns catalog of all available agents with status."""
-    agents = [
-        # Education
-        AgentInfo(id="exercise-generator", name="Exercise Generator", nameEl="Γεννήτρια Ασκήσεων", domain="EDUCATION", description="Creates math exercises", endpoint="/api/generate-exercises", status="online" if ExerciseGenerator else "offline"),  # type: ignore
-        AgentInfo(id="exam-creator", name="Exam Creator", nameEl="Δημιουργός Διαγωνισμάτων", domain="EDUCATION", description="Assembles full exams", endpoint="/api/generate-exam", status="online" if ExamCreator else "offline"),  # type: ignore
-        AgentInfo(id="solution-writer", name="Solution Writer", nameEl="Συγγραφέας Λύσεων", domain="EDUCATION", description="Step-by-step solutions", endpoint="/api/generate-solutions", status="online" if SolutionWriter else "offline"),  # type: ignore
-        AgentInfo(id="isomorphic-generator", name="Variant Generator", nameEl="Γεννήτρια Παραλλαγών", domain="EDUCATION", description="Exercise variations", endpoint="/api/generate-variants", status="online" if IsomorphicGenerator else "offline"),  # type: ignore
-        AgentInfo(id="difficulty-calibrator", name="Difficulty Calibrator", nameEl="Βαθμονομητής Δυσκολίας", domain="EDUCATION", description="Calibrates difficulty", endpoint="/api/calibrate-difficulty", status="online" if DifficultyCalibrator else "offline"),  # type: ignore
-        AgentInfo(id="hint-generator", name="Hint Designer", nameEl="Σχεδιαστής Υποδείξεων", domain="EDUCATION", description="Progressive hints", endpoint="/api/generate-hints", status="online" if HintGenerator else "offline"),  # type: ignore
-        AgentInfo(id="pitfall-detector", name="Pitfall Detector", nameEl="Ανιχνευτής Παγίδων", domain="EDUCATION", description="Common student errors", endpoint="/api/detect-pitfalls", status="online" if PitfallDetector else "offline"),  # type: ignore
-        AgentInfo(id="rubric-designer", name="Rubric Designer", nameEl="Σχεδιαστής Κριτηρίων", domain="EDUCATION", description="Grading rubrics", endpoint="/api/generate-rubric", status="online" if RubricDesigner else "offline"),  # type: ignore
-        AgentInfo(id="mindmap-generator", name="Mindmap Generator", nameEl="Γεννήτρια Εννοιολογικών Χαρτών", domain="EDUCATION", description="Concept maps", endpoint="/api/generate-mindmap", status="online" if MindmapGenerator else "offline"),  # type: ignore
-        AgentInfo(id="prerequisite-checker", name="Prerequisite Checker", nameEl="Ελεγκτής Προαπαιτουμένων", domain="EDUCATION", description="Prerequisite validation", endpoint="/api/check-prerequisites", status="online" if PrerequisiteChecker else "offline"),  # type: ignore
-        AgentInfo(id="multi-method-solver", name="Multi-Method Solver", nameEl="Πολυμεθοδικός Λύτης", domain="EDUCATION", description="Multiple solving methods", endpoint="/api/multi-method-solve", status="online" if MultiMethodSolver else "offline"),  # type: ignore
-        AgentInfo(id="panhellenic-formatter", name="Panhellenic Formatter", nameEl="Μορφοποιητής Πανελληνίων", domain="EDUCATION", description="Panhellenic exam style", endpoint="/api/format-panhellenic", status="online" if PanhellenicFormatter else "offline"),  # type: ignore
-        # Documents
-        AgentInfo(id="document-builder", name="Document Builder", nameEl="Δημιουργός Εγγράφων", domain="DOCUMENTS", description="Articles, reports, CVs", endpoint="/api/build-document", status="online" if DocumentBuilder else "offline"),  # type: ignore
-        AgentInfo(id="tikz-expert", name="TikZ Expert", nameEl="Ειδικός TikZ", domain="DOCUMENTS", description="TikZ/PGFPlots figures", endpoint="/api/generate-figure", status="online" if TikZExpert else "offline"),  # type: ignore
-        AgentInfo(id="table-formatter", name="Table Formatter", nameEl="Μορφοποιητής Πινάκων", domain="DOCUMENTS", description="LaTeX tables", endpoint="/api/format-table", status="online" if TableFormatter else "offline"),  # type: ignore
-        AgentInfo(id="beamer-creator", name="Beamer Creator", nameEl="Δημιουργός Παρουσιάσεων", domain="DOCUMENTS", description="Beamer slides", endpoint="/api/create-presentation", status="online" if BeamerCreator else "offline"),  # type: ignore
-        AgentInfo(id="bibliography-manager", name="Bibliography Manager", nameEl="Διαχειριστής Βιβλιογραφίας", domain="DOCUMENTS", description="BibTeX management", endpoint="/api/manage-bibliography", status="online" if BibliographyManager else "offline"),  # type: ignore
-        AgentInfo(id="template-curator", name="Template Curator", nameEl="Επιμελητής Προτύπων", domain="DOCUMENTS", description="LaTeX templates", endpoint="/api/manage-templates", status="online" if TemplateCurator else "offline"),  # type: ignore
-        AgentInfo(id="fix-agent", name="LaTeX Fix Agent", nameEl="Διορθωτής LaTeX", domain="DOCUMENTS", description="Fix LaTeX errors", endpoint="/api/fix-latex", status="online" if FixAgent else "offline"),  # type: ignore
-    ] # type: ignore
-    return agents
+def list_agents(http_request: Request):
+    """Returns catalog of all available agents with status (ETag-cached)."""
+    statuses = tuple(agent_available(row[-1]) for row in AGENT_CATALOG)
+    return etag_response(http_request, _agent_catalog_body(statuses))
+
+
+@app.get("/api/agents/loading")
+def agent_loading():
+    """Which agent modules are imported, pending or failed (with import ms)."""
+    return load_report()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/admission/stats")
+def admission_stats():
+    """Per-tenant queued/active/rejected counters."""
+    return admission.stats()
+
+
+@app.get("/api/exercise-bank/stats")
+def exercise_bank_stats():
+    """Stored exercises by difficulty and source."""
+    from core.exercise_bank import get_bank  # type: ignore
+    bank = get_bank()
+    if bank is None:
+        return {"enabled": False}
+    return {"enabled": True, **bank.stats()}
+
+
+@app.get("/api/clean-gate/stats")
+def clean_gate_stats():
+    """Clean-number gate pass rate and re-prompts, in total and per topic."""
+    return clean_gate.STATS.stats()
+
+
+class BankDedupRequest(BaseModel):
+    threshold: Optional[float] = None  # Estimated Jaccard (default: Config.DEDUP_THRESHOLD)
+    remove: bool = False  # Delete the duplicates (the most used exercise of each group is kept)
+
+
+@app.post("/api/exercise-bank/dedup")
+def exercise_bank_dedup(request: BankDedupRequest):
+    """Batch near-duplicate scan of the exercise bank (MinHash/LSH)."""
+    from core.exercise_bank import get_bank  # type: ignore
+    bank = get_bank()
+    if bank is None:
+        raise HTTPException(status_code=404, detail="Exercise bank is disabled")
+    with span("exercise_bank.dedup") as s:
+        duplicates = bank.find_duplicates(request.threshold)
+        removed = bank.remove(d["key"] for d in duplicates) if request.remove else 0
+        s.set_attribute("duplicates", len(duplicates))
+    return {
+        "duplicates": [
+            {"bank_id": d["key"], "duplicate_of": d["duplicate_of"], "similarity": d["similarity"]}
+            for d in duplicates
+        ],
+        "removed": removed,
+    }
 
 
 # ── Education Endpoints ──────────────────────────────────────────────
 
 @app.post("/api/generate-exam", response_model=ExamResponse)
-async def generate_exam(request: GenerationRequest, x_gemini_api_key: Optional[str] = Header(None, alias="X-Gemini-API-Key")):
+def generate_exam(
+    request: GenerationRequest,
+    http_request: Request,
+    x_gemini_api_key: Optional[str] = Header(None, alias="X-Gemini-API-Key"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """Multi-agent exam generation pipeline."""
-    require_agent(ExamCreator, "ExamCreator")  # type: ignore
+    return idempotent_response(
+        http_request, idempotency, idempotency_key, request.model_dump(),
+        lambda: _generate_exam(request, x_gemini_api_key),
+    )
+
+
+def _generate_exam(request: GenerationRequest, x_gemini_api_key: Optional[str]) -> ExamResponse:
+    ExamCreator = require_agent("ExamCreator")
     print(f"API: Exam request for '{request.topic}' ({request.questionCount} Qs)")
 
     creator = ExamCreator()
@@ -285,7 +430,9 @@ async def generate_exam(request: GenerationRequest, x_gemini_api_key: Optional[s
             difficulty=agent_difficulty,
             template_style=request.templateStyle,
             maincolor=request.mainColor,
-            api_key=x_gemini_api_key
+            api_key=x_gemini_api_key,
+            parallel=request.parallelQuestions,
+            reuse=request.reuseFirst,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
@@ -307,11 +454,13 @@ async def generate_exam(request: GenerationRequest, x_gemini_api_key: Optional[s
 
     # Optional: add rubric
     rubric_data = None
-    if request.includeRubric and RubricDesigner:
+    RubricDesigner = load_agent("RubricDesigner") if request.includeRubric else None
+    if RubricDesigner:
         designer = RubricDesigner()
-        for ex in result.get("exercises", []):
-            r = designer.create_rubric(ex)
-            rubric_data = r.get("rubric", [])
+        with span("exam.rubric"):
+            for ex in result.get("exercises", []):
+                r = designer.create_rubric(ex)
+                rubric_data = r.get("rubric", [])
 
     exam_data = {
         "id": str(uuid.uuid4()),
@@ -328,166 +477,278 @@ async def generate_exam(request: GenerationRequest, x_gemini_api_key: Optional[s
     return ExamResponse(**exam_data)  # type: ignore
 
 
+# Full package (declarative multi-agent flow)
+class FullPackageRequest(BaseModel):
+    topic: str
+    questionCount: int = 4
+    difficulty: str = "medium"
+    templateStyle: Optional[str] = "scientific"
+    mainColor: Optional[str] = "#1285cc"
+    parallelQuestions: Optional[bool] = None
+    reuseFirst: Optional[bool] = None
+    includeMindmap: bool = True
+    includeSolutions: bool = True
+    includeHints: bool = True
+    includePitfalls: bool = True
+    includeRubric: bool = True
+
+
+@app.post("/api/full-package")
+def full_package(
+    request: FullPackageRequest,
+    http_request: Request,
+    x_gemini_api_key: Optional[str] = Header(None, alias="X-Gemini-API-Key"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """
+    Exam plus prerequisites, mindmap, solutions, hints, pitfalls and rubrics,
+    run as a DAG (independent agents concurrently), with per-node timing.
+    """
+    def _run():
+        from agents.education.flows import full_package_pipeline  # type: ignore
+        from core.pipeline import PipelineError  # type: ignore
+        try:
+            run = full_package_pipeline().run({
+                "topic": request.topic,
+                "num_questions": request.questionCount,
+                "difficulty": request.difficulty,
+                "template_style": request.templateStyle,
+                "maincolor": request.mainColor,
+                "api_key": x_gemini_api_key,
+                "parallel": request.parallelQuestions,
+                "reuse": request.reuseFirst,
+                "include_mindmap": request.includeMindmap,
+                "include_solutions": request.includeSolutions,
+                "include_hints": request.includeHints,
+                "include_pitfalls": request.includePitfalls,
+                "include_rubric": request.includeRubric,
+            }, max_workers=Config.EXAM_CONCURRENCY, memo=pipeline_memo)
+        except PipelineError as e:
+            raise HTTPException(status_code=500, detail=f"Agent error: {e}")
+        return {"topic": request.topic, **run}
+
+    return idempotent_response(http_request, idempotency, idempotency_key, request.model_dump(), _run)
+
+
 # Exercise
 class ExerciseRequest(BaseModel):
     topic: str
     difficulty: str = "medium"
-    count: int = 3
+    count: int = Field(3, ge=0, le=Config.EXERCISE_MAX_COUNT)
     mistakes: Optional[List[str]] = None
+    concurrency: Optional[int] = Field(None, ge=1)  # Max parallel LLM calls (capped at Config.EXERCISE_CONCURRENCY)
+    singlePrompt: Optional[bool] = None  # None = auto (count >= Config.EXERCISE_BATCH_THRESHOLD)
 
 class ExerciseResponse(BaseModel):
     exercises: List[Dict[str, Any]]
     count: int
+    errors: List[Dict[str, Any]] = []
 
 
 
 
 @app.post("/api/generate-exercises", response_model=ExerciseResponse)
 async def generate_exercises(request: ExerciseRequest, x_gemini_api_key: Optional[str] = Header(None, alias="X-Gemini-API-Key")):
-    """Generate standalone exercises."""
-    require_agent(ExerciseGenerator, "ExerciseGenerator")  # type: ignore
-    generator = ExerciseGenerator()
+    """Generate standalone exercises (concurrent fan-out, order preserved)."""
+    generator = require_agent("ExerciseGenerator")()
+    count = request.count
+    concurrency = min(request.concurrency or Config.EXERCISE_CONCURRENCY, Config.EXERCISE_CONCURRENCY)
+
+    single_prompt = request.singlePrompt
+    if single_prompt is None:
+        single_prompt = 0 < Config.EXERCISE_BATCH_THRESHOLD <= count
+
+    # Optional single multi-item prompt; any shortfall is topped up below
+    exercises: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    if single_prompt and count > 1:
+        try:
+            exercises = await run_in_threadpool(
+                generator.generate_batch, request.topic, request.difficulty, count,
+                mistakes=request.mistakes, api_key=x_gemini_api_key
+            )
+        except Exception as e:
+            print(f"API: Batch prompt failed, falling back to fan-out: {e}")
+
+    def _generate_one(_):
+        return generator.generate(request.topic, request.difficulty, mistakes=request.mistakes, api_key=x_gemini_api_key)
+
+    missing = count - len(exercises)
+    if missing > 0:
+        outcomes = await run_in_threadpool(
+            fan_out, _generate_one, range(missing), concurrency
+        )
+        offset = len(exercises)
+        for outcome in outcomes:
+            if outcome["ok"]:
+                exercises.append(outcome["result"])
+            else:
+                errors.append({"index": offset + outcome["index"], "error": outcome["error"]})
 
-    exercises = []
-    try:
-        for _ in range(request.count):
-            ex = generator.generate(request.topic, request.difficulty, mistakes=request.mistakes, api_key=x_gemini_api_key)
-            exercises.append(ex)
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Exercise generation failed: {str(e)}")
+    if count and not exercises:
+        detail = errors[0]["error"] if errors else "no exercises returned"
+        raise HTTPException(status_code=503, detail=f"Exercise generation failed: {detail}")
 
-    return ExerciseResponse(exercises=exercises, count=len(exercises))  # type: ignore
+    return ExerciseResponse(exercises=exercises, count=len(exercises), errors=errors)  # type: ignore
 
 
 @app.post("/api/generate-solutions", response_model=SolutionResponse)
-async def generate_solutions(request: SolutionRequest):
+def generate_solutions(request: SolutionRequest):
     """Generate step-by-step solution."""
-    require_agent(SolutionWriter, "SolutionWriter")  # type: ignore
-    writer = SolutionWriter()
+    writer = require_agent("SolutionWriter")()
     result = writer.solve(request.exercise)
     return SolutionResponse(solution_latex=result.get("solution_latex", ""))  # type: ignore
 
 
 @app.post("/api/generate-variants", response_model=VariantResponse)
-async def generate_variants(request: VariantRequest):
+def generate_variants(request: VariantRequest):
     """Generate isomorphic variations of an exercise."""
-    require_agent(IsomorphicGenerator, "IsomorphicGenerator")  # type: ignore
-    iso = IsomorphicGenerator()
-    variations = iso.generate_variations(request.exercise, request.count)
+    iso = require_agent("IsomorphicGenerator")()
+    variations = iso.generate_variations(request.exercise, request.count, seed=request.seed)
     return VariantResponse(variations=variations, count=len(variations))  # type: ignore
 
 
 @app.post("/api/calibrate-difficulty", response_model=CalibrationResponse)
-async def calibrate_difficulty(request: CalibrationRequest):
+def calibrate_difficulty(request: CalibrationRequest):
     """Calibrate exam difficulty distribution."""
-    require_agent(DifficultyCalibrator, "DifficultyCalibrator")  # type: ignore
-    calibrator = DifficultyCalibrator()
+    calibrator = require_agent("DifficultyCalibrator")()
     report = calibrator.calibrate_exam(request.exercises, request.target_difficulty)
     return CalibrationResponse(**report)  # type: ignore
 
 
 @app.post("/api/generate-hints", response_model=HintResponse)
-async def generate_hints(request: HintRequest):
+def generate_hints(request: HintRequest):
     """Generate progressive hints."""
-    require_agent(HintGenerator, "HintGenerator")  # type: ignore
-    gen = HintGenerator()
+    gen = require_agent("HintGenerator")()
     result = gen.generate_hints(request.exercise)
     return HintResponse(**result)  # type: ignore
 
 
 @app.post("/api/detect-pitfalls", response_model=PitfallResponse)
-async def detect_pitfalls(request: PitfallRequest):
+def detect_pitfalls(request: PitfallRequest):
     """Detect common student mistakes."""
-    require_agent(PitfallDetector, "PitfallDetector")  # type: ignore
-    detector = PitfallDetector()
+    detector = require_agent("PitfallDetector")()
     result = detector.detect_pitfalls(request.exercise)
     return PitfallResponse(**result)  # type: ignore
 
 
 @app.post("/api/generate-rubric", response_model=RubricResponse)
-async def generate_rubric(request: RubricRequest):
+def generate_rubric(request: RubricRequest):
     """Generate grading rubric."""
-    require_agent(RubricDesigner, "RubricDesigner")  # type: ignore
-    designer = RubricDesigner()
+    designer = require_agent("RubricDesigner")()
     result = designer.create_rubric(request.exercise)
     return RubricResponse(**result)  # type: ignore
 
 
+def _mindmap_response(http_request: Request, request: MindmapRequest) -> Response:
+    MindmapGenerator = require_agent("MindmapGenerator")
+    return memoized_response(
+        http_request, response_cache, cache_key("/api/generate-mindmap", request.model_dump()),
+        lambda: MindmapGenerator().generate_mindmap_data(request.topic),
+        should_store=lambda data: not MindmapGenerator.is_fallback(request.topic, data),
+    )
+
+
 @app.post("/api/generate-mindmap")
-async def generate_mindmap(request: MindmapRequest):
-    """Generate concept mindmap structure."""
-    require_agent(MindmapGenerator, "MindmapGenerator")  # type: ignore
-    gen = MindmapGenerator()
-    return gen.generate_mindmap_data(request.topic)
+def generate_mindmap(request: MindmapRequest, http_request: Request):
+    """Generate concept mindmap structure (cached per topic)."""
+    return _mindmap_response(http_request, request)
+
+
+@app.get("/api/generate-mindmap")
+def get_mindmap(http_request: Request, topic: str):
+    """Same as the POST form; revalidates with If-None-Match (304)."""
+    return _mindmap_response(http_request, MindmapRequest(topic=topic))
+
+
+def _prerequisites_response(http_request: Request, request: PrerequisiteRequest) -> Response:
+    PrerequisiteChecker = require_agent("PrerequisiteChecker")
+    return memoized_response(
+        http_request, response_cache, cache_key("/api/check-prerequisites", request.model_dump()),
+        lambda: PrerequisiteChecker().check(request.topic),
+        should_store=lambda result: not PrerequisiteChecker.is_fallback(request.topic, result),
+    )
 
 
 @app.post("/api/check-prerequisites")
-async def check_prerequisites(request: PrerequisiteRequest):
-    """Check topic prerequisites."""
-    require_agent(PrerequisiteChecker, "PrerequisiteChecker")  # type: ignore
-    checker = PrerequisiteChecker()
-    return checker.check(request.topic)
+def check_prerequisites(request: PrerequisiteRequest, http_request: Request):
+    """Check topic prerequisites (cached per topic/grade)."""
+    return _prerequisites_response(http_request, request)
+
+
+@app.get("/api/check-prerequisites")
+def get_prerequisites(http_request: Request, topic: str, gradeLevel: Optional[str] = None):
+    """Same as the POST form; revalidates with If-None-Match (304)."""
+    return _prerequisites_response(http_request, PrerequisiteRequest(topic=topic, gradeLevel=gradeLevel))
 
 
 @app.post("/api/multi-method-solve")
-async def multi_method_solve(request: MultiMethodRequest):
+def multi_method_solve(request: MultiMethodRequest):
     """Solve exercise using multiple methods."""
-    require_agent(MultiMethodSolver, "MultiMethodSolver")  # type: ignore
-    solver = MultiMethodSolver()
+    solver = require_agent("MultiMethodSolver")()
     return solver.solve(request.exercise)
 
 
 @app.post("/api/format-panhellenic")
-async def format_panhellenic(request: PanhellenicRequest):
+def format_panhellenic(request: PanhellenicRequest):
     """Format in Panhellenic exam style."""
-    require_agent(PanhellenicFormatter, "PanhellenicFormatter")  # type: ignore
-    formatter = PanhellenicFormatter()
+    formatter = require_agent("PanhellenicFormatter")()
     return formatter.format(request.topic)
 
 
 # ── Document Endpoints ───────────────────────────────────────────────
 
 @app.post("/api/build-document", response_model=LaTeXResponse)
-async def build_document(request: DocumentRequest):
+def build_document(request: DocumentRequest):
     """Build a LaTeX document."""
-    require_agent(DocumentBuilder, "DocumentBuilder")  # type: ignore
-    builder = DocumentBuilder()
+    builder = require_agent("DocumentBuilder")()
     result = builder.build(request.type, request.title, request.content or "")
     return LaTeXResponse(**result)  # type: ignore
 
 
 @app.post("/api/generate-figure", response_model=LaTeXResponse)
-async def generate_figure(request: FigureRequest):
+def generate_figure(request: FigureRequest):
     """Generate TikZ figure."""
-    require_agent(TikZExpert, "TikZExpert")  # type: ignore
-    expert = TikZExpert()
+    expert = require_agent("TikZExpert")()
     result = expert.generate_figure(request.description)
     return LaTeXResponse(**result)  # type: ignore
 
 
 @app.post("/api/format-table", response_model=LaTeXResponse)
-async def format_table(request: TableRequest):
-    """Format a LaTeX table."""
-    require_agent(TableFormatter, "TableFormatter")  # type: ignore
-    formatter = TableFormatter()
-    result = formatter.format_table(request.data, request.headers, request.style or "booktabs")
-    return LaTeXResponse(latex=result.get("latex", ""), metadata=result.get("metadata"))  # type: ignore
+def format_table(request: TableRequest, http_request: Request):
+    """Format a LaTeX table (template fallback output is cached)."""
+    TableFormatter = require_agent("TableFormatter")
+
+    def _format():
+        formatter = TableFormatter()
+        result = formatter.format_table(request.data, request.headers, request.style or "booktabs")
+        return LaTeXResponse(latex=result.get("latex", ""), metadata=result.get("metadata"))  # type: ignore
+
+    return memoized_response(
+        http_request, response_cache, cache_key("/api/format-table", request.model_dump()), _format,
+        should_store=lambda r: (r.metadata or {}).get("generator") == "Template",
+    )
 
 
 @app.post("/api/create-presentation", response_model=LaTeXResponse)
-async def create_presentation(request: PresentationRequest):
+def create_presentation(
+    request: PresentationRequest,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """Create Beamer presentation."""
-    require_agent(BeamerCreator, "BeamerCreator")  # type: ignore
-    creator = BeamerCreator()
-    result = creator.create(request.title, request.topic, request.slideCount)
-    return LaTeXResponse(**result)  # type: ignore
+    def _create():
+        creator = require_agent("BeamerCreator")()
+        result = creator.create(request.title, request.topic, request.slideCount)
+        return LaTeXResponse(**result)  # type: ignore
+
+    return idempotent_response(http_request, idempotency, idempotency_key, request.model_dump(), _create)
 
 
 @app.post("/api/fix-latex", response_model=LaTeXResponse)
-async def fix_latex(request: FixRequest):
+def fix_latex(request: FixRequest):
     """Fix LaTeX compilation errors."""
-    require_agent(FixAgent, "FixAgent")  # type: ignore
-    fixer = FixAgent()
+    fixer = require_agent("FixAgent")()
     result = fixer.fix(request.latexCode, request.errorMessage or "")
     return LaTeXResponse(**result)  # type: ignore
 
@@ -501,31 +762,28 @@ class OrchestrateRequest(BaseModel):
 @app.post("/api/orchestrate")
 async def orchestrate(request: OrchestrateRequest):
     """Auto-detect domain and route to appropriate agent."""
-    prompt = request.prompt.lower()
-
-    EDUCATION_KW = ["άσκηση", "φυλλάδιο", "διαγώνισμα", "τεστ", "λύση",
-                     "πανελλήνιες", "παραλλαγή", "rubric", "βαθμολογία",
-                     "θεωρία", "mindmap", "υπόδειξη", "hints", "λάθη",
-                     "προαπαιτούμενα", "μέθοδοι", "exercise", "exam"]
-
-    DOCUMENT_KW = ["έγγραφο", "article", "report", "σχήμα", "γράφημα",
-                    "TikZ", "πίνακας", "table", "παρουσίαση", "slides",
-                    "cv", "βιογραφικό", "επιστολή", "bibliography",
-                    "template", "fix", "document"]
-
-    domain = "unknown"
-    if any(kw in prompt for kw in EDUCATION_KW):
-        domain = "EDUCATION"
-    elif any(kw in prompt for kw in DOCUMENT_KW):
-        domain = "DOCUMENTS"
+    result = classify(request.prompt)
+    domain = result["domain"]
+    scores = dict(result["agents"])
 
+    # Matched agents first (best score first), then the rest of the domain
+    candidates = [(row[0], row[-1]) for row in AGENT_CATALOG if row[3] == domain]
+    candidates.sort(key=lambda c: -scores.get(c[0], 0.0))
     return {
         "detected_domain": domain,
         "prompt": request.prompt,
-        "available_agents": [a.id for a in list_agents() if a.domain == domain and a.status == "online"]
+        "available_agents": [agent_id for agent_id, cls in candidates if agent_available(cls)],
+        "ranked_agents": [{"id": agent_id, "score": score} for agent_id, score in result["agents"]],
+        "domain_scores": result["domain_scores"],
     }
 
 
 if __name__ == "__main__":
     import uvicorn  # type: ignore
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if Config.API_WORKERS > 1:
+        # Workers import the app by path; run with STATE_BACKEND=sqlite to share cache and leases
+        if Config.STATE_BACKEND != "sqlite":
+            print("Warning: API_WORKERS > 1 without STATE_BACKEND=sqlite; caches and tenant limits are per worker.")
+        uvicorn.run("api.main:app", host="0.0.0.0", port=8000, workers=Config.API_WORKERS, app_dir=PROJECT_ROOT)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,40 @@
+"""
+Fast JSON serialization for large LaTeX payloads (opt-in).
+
+FAST_JSON=1 switches the app's default response class to FastJSONResponse,
+which renders with orjson when installed and falls back to the stdlib
+encoder (with JSONResponse's compact settings) otherwise.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse  # type: ignore
+
+try:
+    import orjson  # type: ignore
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    from config import Config  # type: ignore
+    FAST_JSON_ENABLED = Config.FAST_JSON
+except ImportError:
+    FAST_JSON_ENABLED = False
+
+
+def dumps_fast(content: Any) -> bytes:
+    """Serializes already-encoded (jsonable) content to UTF-8 bytes."""
+    if HAS_ORJSON:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (when available)."""
+    def render(self, content: Any) -> bytes:
+        return dumps_fast(content)
+
+
+# Response class used by the app and by the ETag cache helpers
+JSON_RESPONSE_CLASS = FastJSONResponse if FAST_JSON_ENABLED else JSONResponse
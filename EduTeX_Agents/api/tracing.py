@@ -0,0 +1,54 @@
+"""
+Request-level tracing and HTTP metrics.
+
+Every request runs inside a root span named "<METHOD> <route>", so agent
+stages traced with core.telemetry.span() become its children, and feeds the
+request counter / latency histogram exposed at /metrics.
+"""
+import time
+
+from core.telemetry import REGISTRY, span  # type: ignore
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "edutex_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "edutex_http_request_duration_seconds", "HTTP request latency by route.", ["method", "route"]
+)
+
+
+class TracingMiddleware:
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+        self._routes = None
+
+    def _route(self, scope) -> str:
+        # Only known route paths become label values (bounded cardinality)
+        if self._routes is None and scope.get("app") is not None:
+            self._routes = {getattr(r, "path", None) for r in scope["app"].routes}
+        path = scope["path"]
+        return path if self._routes and path in self._routes else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route(scope)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            with span(f"{method} {route}", **{"http.method": method, "http.route": route}) as s:
+                await self.app(scope, receive, send_wrapper)
+                s.set_attribute("http.status_code", status["code"])
+        finally:
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status["code"]))
+            HTTP_SECONDS.observe(time.perf_counter() - start, method=method, route=route)
@@ -19,6 +19,75 @@ class Config:
     Temperature = 0.7
     MaxOutputTokens = 8192
 
+    # Agent modules load lazily; "all" or "ExamCreator,ExerciseGenerator" preloads them at startup
+    AGENT_WARMUP = os.getenv("AGENT_WARMUP", "").strip()
+
+    # Exercise fan-out (/api/generate-exercises)
+    EXERCISE_CONCURRENCY = int(os.getenv("EXERCISE_CONCURRENCY", "4"))  # also the cap on a request's concurrency
+    EXERCISE_MAX_COUNT = int(os.getenv("EXERCISE_MAX_COUNT", "20"))  # exercises per request
+    # Counts at or above this are requested in a single multi-item prompt (0 = never)
+    EXERCISE_BATCH_THRESHOLD = int(os.getenv("EXERCISE_BATCH_THRESHOLD", "0"))
+
+    # Exam generation: plan the exam, then generate each question concurrently
+    # (1 = parallel by default; requests can override with parallelQuestions)
+    EXAM_PARALLEL = os.getenv("EXAM_PARALLEL", "0") == "1"
+    EXAM_CONCURRENCY = int(os.getenv("EXAM_CONCURRENCY", "4"))
+    EXAM_SLOT_RETRIES = int(os.getenv("EXAM_SLOT_RETRIES", "1"))
+
+    # Exercise bank (SQLite + FTS5): generated exercises are saved for reuse;
+    # EXAM_REUSE_FIRST fills exam slots from the bank before calling the LLM
+    EXERCISE_BANK = os.getenv("EXERCISE_BANK", "1") == "1"
+    EXERCISE_BANK_PATH = os.getenv("EXERCISE_BANK_PATH", "").strip()  # default: ~/.edutex/exercise_bank.sqlite3
+    EXAM_REUSE_FIRST = os.getenv("EXAM_REUSE_FIRST", "0") == "1"
+
+    # Near-duplicate check of generated exercises (MinHash/LSH, see core/near_dup.py):
+    # "flag" marks metadata.near_duplicate, "reject" regenerates (up to DEDUP_RETRIES), "off"
+    DEDUP_MODE = os.getenv("DEDUP_MODE", "flag").strip().lower()
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+    DEDUP_RETRIES = int(os.getenv("DEDUP_RETRIES", "1"))
+
+    # Clean-number gate (core/clean_gate.py): equations in generated exercises are
+    # solved locally; "reject" re-prompts messy ones with the reason (up to
+    # CLEAN_CHECK_RETRIES), "flag" only marks metadata.clean_check, "off"
+    CLEAN_CHECK_MODE = os.getenv("CLEAN_CHECK_MODE", "reject").strip().lower()
+    CLEAN_CHECK_RETRIES = int(os.getenv("CLEAN_CHECK_RETRIES", "2"))
+    CLEAN_CHECK_TIMEOUT = float(os.getenv("CLEAN_CHECK_TIMEOUT", "5"))
+    CLEAN_CHECK_MAX_TOPICS = int(os.getenv("CLEAN_CHECK_MAX_TOPICS", "256"))  # topics kept apart in the stats
+
+    # Response cache for deterministic endpoints (seconds / max entries, 0 disables)
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+    # Response encoding: orjson-backed JSON (opt-in) and negotiated br/gzip compression
+    FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    # Telemetry: /metrics endpoint and optional OTLP/JSON trace file (one trace per line)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "").strip()
+
+    # Admission control: executor slots, per-tenant limits and fair-queue weights
+    # (weights: "key:<hash>=2,ip:10.0.0.5=0.5", tenant ids as shown in /api/admission/stats)
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+    ADMISSION_GLOBAL_CONCURRENCY = int(os.getenv("ADMISSION_GLOBAL_CONCURRENCY", "8"))
+    ADMISSION_TENANT_CONCURRENCY = int(os.getenv("ADMISSION_TENANT_CONCURRENCY", "2"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "20"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+    ADMISSION_TENANT_WEIGHTS = os.getenv("ADMISSION_TENANT_WEIGHTS", "")
+    ADMISSION_MAX_TENANTS = int(os.getenv("ADMISSION_MAX_TENANTS", "1024"))  # idle tenants kept for stats
+
+    # Multi-worker deployment: uvicorn worker processes and where they share state
+    # ('memory' = per process; 'sqlite' = one WAL database for cache, jobs and tenant leases)
+    API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").strip().lower()
+    SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "").strip()
+
+    # Idempotency-Key on /api/generate-exam and /api/create-presentation: how long a
+    # result is replayed, and how long a duplicate waits for an in-flight run (seconds)
+    IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "3600"))
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "300"))
+
     @staticmethod
     def is_configured():
         if Config.DEFAULT_PROVIDER == "gemini" and Config.GOOGLE_API_KEY:
@@ -0,0 +1,129 @@
+"""
+Clean-number gate for generated exercises.
+
+The equations in an exercise's LaTeX are solved locally (skills/clean_numbers,
+in a sandboxed worker with CLEAN_CHECK_TIMEOUT) and, in "reject" mode, an
+exercise with messy solutions is re-prompted with the specific reason up to
+CLEAN_CHECK_RETRIES times. Per-topic pass rates and retries are kept for
+/metrics and /api/clean-gate/stats.
+
+SymPy is only imported on the first check, so importing this module is cheap.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import Config  # type: ignore
+
+_RULES = ("Change the numbers so that every solution is an integer, a simple fraction "
+          "(denominator < 20), a simple root such as sqrt(2) or a simple multiple of pi.")
+
+
+def check_exercise(exercise: Any) -> Optional[Dict[str, Any]]:
+    """
+    Clean-number report of a generated exercise: {"ok", "checked", "messy",
+    "errors", "equations", "status", "ms"}. ok is None when the check could
+    not finish. Returns None when CLEAN_CHECK_MODE=off, the exercise has no
+    LaTeX or the checker is unavailable.
+    """
+    if Config.CLEAN_CHECK_MODE == "off" or not isinstance(exercise, dict):
+        return None
+    latex = exercise.get("latex")
+    if not isinstance(latex, str) or not latex.strip():
+        return None
+    try:
+        from skills.clean_numbers.scripts.verify import verify_latex_sandboxed  # type: ignore
+    except ImportError as e:
+        print(f"Warning: Clean-number check unavailable: {e}")
+        return None
+    try:
+        return verify_latex_sandboxed(latex, timeout=Config.CLEAN_CHECK_TIMEOUT)
+    except Exception as e:
+        print(f"Warning: Clean-number check failed: {e}")
+        return None
+
+
+def failure_reason(report: Dict[str, Any]) -> str:
+    """The messy equations of a report and their solutions, in one line."""
+    issues = []
+    for equation in report.get("equations", []):
+        if equation["ok"] or equation["error"]:
+            continue
+        messy = [d["value"] for d in equation["details"] if not d["clean"]]
+        issues.append(f"${equation['expression']}$ has messy solutions {', '.join(messy)}")
+    return "; ".join(issues)
+
+
+def retry_prompt(user_prompt: str, exercise: Dict[str, Any], report: Dict[str, Any]) -> str:
+    """The original request plus why the previous attempt failed."""
+    return (f"{user_prompt} A previous attempt failed the clean-numbers check: {failure_reason(report)}.\n"
+            f"Previous exercise:\n{str(exercise.get('latex', ''))[:400]}\n{_RULES}")
+
+
+class GateStats:
+    """
+    Per-topic counts of gated exercises, passes and re-prompts. Topics are
+    free text, so only the max_topics most recently seen are kept apart;
+    older ones are merged into OTHER (totals stay exact).
+    """
+    _FIELDS = ("exercises", "passed", "failed", "undecided", "first_try", "retries")
+    OTHER = "(other)"
+
+    def __init__(self, max_topics: int = 256):
+        self.max_topics = max(1, max_topics)
+        self._lock = threading.Lock()
+        self._topics: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._other = dict.fromkeys(self._FIELDS, 0)
+
+    def record(self, topic: str, ok: Optional[bool], retries: int):
+        with self._lock:
+            counts = self._topics.setdefault(topic, dict.fromkeys(self._FIELDS, 0))
+            self._topics.move_to_end(topic)
+            while len(self._topics) > self.max_topics:
+                _, evicted = self._topics.popitem(last=False)
+                for field in self._FIELDS:
+                    self._other[field] += evicted[field]
+            counts["exercises"] += 1
+            counts["passed" if ok else "undecided" if ok is None else "failed"] += 1
+            counts["first_try"] += int(bool(ok) and retries == 0)
+            counts["retries"] += retries
+
+    @staticmethod
+    def _rates(counts: Dict[str, int]) -> Dict[str, Any]:
+        total = counts["exercises"]
+        return {
+            **counts,
+            "pass_rate": round(counts["passed"] / total, 4) if total else 0.0,
+            "first_try_pass_rate": round(counts["first_try"] / total, 4) if total else 0.0,
+            "retries_per_exercise": round(counts["retries"] / total, 4) if total else 0.0,
+        }
+
+    def _snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Copy of the per-topic counts, OTHER included once it has any (lock held)."""
+        topics = {topic: dict(counts) for topic, counts in self._topics.items()}
+        if self._other["exercises"]:
+            topics[self.OTHER] = dict(self._other)
+        return topics
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            topics = list(self._snapshot().values())
+        totals = {field: sum(counts[field] for counts in topics) for field in self._FIELDS}
+        return self._rates(totals)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            topics = self._snapshot()
+        return {
+            "mode": Config.CLEAN_CHECK_MODE,
+            "total": self.totals(),
+            "topics": {topic: self._rates(counts) for topic, counts in sorted(topics.items())},
+        }
+
+    def reset(self):
+        with self._lock:
+            self._topics.clear()
+            self._other = dict.fromkeys(self._FIELDS, 0)
+
+
+STATS = GateStats(max_topics=Config.CLEAN_CHECK_MAX_TOPICS)
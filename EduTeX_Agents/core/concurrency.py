@@ -0,0 +1,106 @@
+"""
+Concurrency helpers - bounded fan-out for blocking agent calls.
+
+Agents talk to the LLM providers over blocking HTTP (urllib / SDK clients),
+so parallelism comes from a thread pool rather than asyncio.
+
+fan_out calls nest (a pipeline node fans out over exercises, an agent fans
+out over exam slots...). Inside a CallBudget (core.pipeline runs every flow
+in one) the calls of all levels share one limit, so nesting does not
+multiply the number of LLM calls in flight.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+_BUDGET: "contextvars.ContextVar[Optional[CallBudget]]" = contextvars.ContextVar("edutex_call_budget", default=None)
+
+
+class CallBudget:
+    """
+    At most 'limit' calls in flight across every fan_out level of a run.
+    A call holds a slot while it runs; a call that fans out lends its slot
+    to its items until they are done (so nesting never deadlocks).
+    """
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._slots = threading.BoundedSemaphore(self.limit)
+        self._local = threading.local()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self._slots.acquire()
+        self._local.held = getattr(self._local, "held", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.held -= 1
+            self._slots.release()
+
+    @contextmanager
+    def lend(self) -> Iterator[None]:
+        held = getattr(self._local, "held", 0)
+        for _ in range(held):
+            self._slots.release()
+        self._local.held = 0
+        try:
+            yield
+        finally:
+            for _ in range(held):
+                self._slots.acquire()
+            self._local.held = held
+
+
+def current_budget() -> Optional[CallBudget]:
+    return _BUDGET.get()
+
+
+@contextmanager
+def call_budget(limit: int) -> Iterator[CallBudget]:
+    """Runs the block under a CallBudget of 'limit' calls (an enclosing budget wins)."""
+    budget = _BUDGET.get()
+    if budget is not None:
+        yield budget
+        return
+    budget = CallBudget(limit)
+    token = _BUDGET.set(budget)
+    try:
+        yield budget
+    finally:
+        _BUDGET.reset(token)
+
+
+def fan_out(func: Callable[[Any], Any], items: Sequence[Any], max_workers: Optional[int] = 4) -> List[Dict[str, Any]]:
+    """
+    Calls func(item) for every item with at most 'max_workers' calls in flight
+    (and, inside a CallBudget, within the budget's limit).
+
+    A failing call never cancels the others. Returns one outcome per item,
+    in input order:
+        {"index": i, "ok": True, "result": <value>}
+        {"index": i, "ok": False, "error": "<message>"}
+    """
+    budget = _BUDGET.get()
+
+    def _run(index: int, item: Any) -> Dict[str, Any]:
+        try:
+            with budget.slot() if budget is not None else nullcontext():
+                result = func(item)
+            return {"index": index, "ok": True, "result": result}
+        except Exception as e:
+            return {"index": index, "ok": False, "error": str(e)}
+
+    if not items:
+        return []
+
+    workers = max(1, min(max_workers or 1, len(items), budget.limit if budget is not None else len(items)))
+    with budget.lend() if budget is not None else nullcontext():
+        if workers == 1:
+            return [_run(i, item) for i, item in enumerate(items)]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Each call runs in a copy of the caller's context (keeps trace spans nested)
+            futures = [pool.submit(contextvars.copy_context().run, _run, i, item) for i, item in enumerate(items)]
+            return [f.result() for f in futures]
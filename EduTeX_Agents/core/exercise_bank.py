@@ -0,0 +1,377 @@
+"""
+Exercise bank - persistent store of validated generated exercises.
+
+Exercises produced by ExerciseGenerator, ExamCreator and IsomorphicGenerator
+are saved with their topic, difficulty, tags and syllabus section into one
+SQLite database with an FTS5 index (accent/case folded text, so Greek
+queries match regardless of tonos). In "reuse first" mode exam slots are
+filled from the bank and only the gaps go to the LLM.
+
+Each stored exercise also keeps a MinHash signature (core/near_dup.py), so
+new exercises can be checked for near-duplicates against the whole bank
+and existing banks can be deduplicated in one pass.
+
+Enabled with EXERCISE_BANK=1 (default), stored at EXERCISE_BANK_PATH.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    from config import Config  # type: ignore
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config  # type: ignore
+
+from core.near_dup import LSHIndex, check_against, find_near_duplicates, pack, signature  # type: ignore
+from core.textnorm import fold  # type: ignore
+
+# Outputs that must never be stored (fallbacks, mock provider)
+_REJECT_MARKERS = ("FALLBACK:", "[MOCK AI]", "[LLM ERROR")
+_TOKEN = re.compile(r"\w+")
+
+
+def content_hash(latex: str) -> str:
+    """Hash of the exercise statement, insensitive to whitespace and case."""
+    return hashlib.sha256(" ".join(fold(latex).split()).encode("utf-8")).hexdigest()
+
+
+def is_storable(exercise: Any) -> bool:
+    """Only complete, real exercises go into the bank."""
+    if not isinstance(exercise, dict):
+        return False
+    latex = exercise.get("latex")
+    if not isinstance(latex, str) or len(latex.strip()) < 10:
+        return False
+    if any(marker in latex for marker in _REJECT_MARKERS):
+        return False
+    metadata = exercise.get("metadata") or {}
+    if metadata.get("near_duplicate"):
+        return False
+    if (metadata.get("clean_check") or {}).get("ok") is False:
+        return False
+    return "fallback" not in (metadata.get("tags") or [])
+
+
+class ExerciseBank:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lsh: Optional[LSHIndex] = None
+        self._lsh_seen = 0
+        self._lsh_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS exercises (
+                id INTEGER PRIMARY KEY,
+                hash TEXT NOT NULL UNIQUE,
+                topic TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                section TEXT NOT NULL DEFAULT '',
+                tags TEXT NOT NULL DEFAULT '[]',
+                latex TEXT NOT NULL,
+                solution TEXT NOT NULL DEFAULT '',
+                metadata TEXT NOT NULL DEFAULT '{}',
+                source TEXT NOT NULL DEFAULT '',
+                created REAL NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS exercises_difficulty ON exercises (difficulty);
+            CREATE VIRTUAL TABLE IF NOT EXISTS exercises_fts USING fts5(topic, tags, section, body);
+            CREATE TABLE IF NOT EXISTS exercise_minhash (id INTEGER PRIMARY KEY, sig BLOB NOT NULL);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, exercise: Dict[str, Any], topic: str, difficulty: str = "medium",
+            source: str = "", section: Optional[str] = None) -> Optional[int]:
+        """
+        Stores a validated exercise. Returns its id, or None if it was
+        rejected or is already in the bank.
+        """
+        if not is_storable(exercise):
+            return None
+        metadata = dict(exercise.get("metadata") or {})
+        tags = [str(t) for t in (metadata.get("tags") or [])]
+        difficulty = str(metadata.get("difficulty") or difficulty).lower()
+        section = section or str(metadata.get("section") or metadata.get("chapter") or "")
+        latex = exercise["latex"]
+        solution = exercise.get("solution") or ""
+        metadata.pop("bank_id", None)
+        sig = signature(latex)
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO exercises (hash, topic, difficulty, section, tags, latex, solution, "
+                "metadata, source, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (content_hash(latex), topic, difficulty, section, json.dumps(tags, ensure_ascii=False),
+                 latex, solution if isinstance(solution, str) else json.dumps(solution, ensure_ascii=False),
+                 json.dumps(metadata, ensure_ascii=False), source, time.time()),
+            )
+            row_id = cur.lastrowid if cur.rowcount == 1 else None
+            if row_id is not None:
+                conn.execute(
+                    "INSERT INTO exercises_fts (rowid, topic, tags, section, body) VALUES (?, ?, ?, ?, ?)",
+                    (row_id, fold(topic), fold(" ".join(tags)), fold(section), fold(latex)),
+                )
+                conn.execute("INSERT INTO exercise_minhash (id, sig) VALUES (?, ?)", (row_id, pack(sig)))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row_id
+
+    def add_many(self, exercises: Iterable[Dict[str, Any]], topic: str, difficulty: str = "medium",
+                 source: str = "") -> List[int]:
+        ids = []
+        for exercise in exercises:
+            try:
+                row_id = self.add(exercise, topic, difficulty, source)
+            except sqlite3.Error as e:
+                print(f"Warning: Could not store exercise in bank: {e}")
+                continue
+            if row_id is not None:
+                ids.append(row_id)
+        return ids
+
+    @staticmethod
+    def _match_query(text: str, columns: str) -> Optional[str]:
+        tokens = _TOKEN.findall(fold(text))
+        # Short words (articles, "και") only count when nothing else is left
+        tokens = [t for t in tokens if len(t) > 3] or tokens
+        if not tokens:
+            return None
+        # Prefix match each term so "παραγωγος" also finds "παραγωγοι"
+        terms = " AND ".join(f'"{t[:max(4, len(t) - 2)]}"*' for t in tokens)
+        return f"{{{columns}}} : ({terms})"
+
+    def search(self, topic: str, difficulty: Optional[str] = None, tags: Sequence[str] = (),
+               section: Optional[str] = None, limit: int = 10, exclude_ids: Iterable[int] = ()) -> List[Dict[str, Any]]:
+        """
+        Best matching exercises for a topic (least used first among equals),
+        as exercise dicts with metadata.bank_id set.
+        """
+        clauses = [q for q in (
+            # Every topic word must appear somewhere; topic/tag hits rank first
+            self._match_query(topic, "topic tags section body"),
+            self._match_query(" ".join(tags), "tags") if tags else None,
+            self._match_query(section, "section") if section else None,
+        ) if q]
+        if not clauses:
+            return []
+        sql = ("SELECT e.* FROM exercises_fts f JOIN exercises e ON e.id = f.rowid "
+               "WHERE exercises_fts MATCH ?")
+        args: List[Any] = [" AND ".join(f"({c})" for c in clauses)]
+        if difficulty:
+            sql += " AND e.difficulty = ?"
+            args.append(difficulty.lower())
+        excluded = [int(i) for i in exclude_ids]
+        if excluded:
+            sql += f" AND e.id NOT IN ({','.join('?' * len(excluded))})"
+            args.extend(excluded)
+        sql += " ORDER BY bm25(exercises_fts, 10.0, 5.0, 3.0, 1.0), e.uses, e.id LIMIT ?"
+        args.append(limit)
+        try:
+            rows = self._conn().execute(sql, args).fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: Exercise bank search failed: {e}")
+            return []
+        return [self._to_exercise(row) for row in rows]
+
+    @staticmethod
+    def _to_exercise(row: sqlite3.Row) -> Dict[str, Any]:
+        metadata = json.loads(row["metadata"] or "{}")
+        metadata.setdefault("difficulty", row["difficulty"])
+        metadata.setdefault("tags", json.loads(row["tags"] or "[]"))
+        if row["section"]:
+            metadata.setdefault("section", row["section"])
+        metadata["bank_id"] = row["id"]
+        return {"latex": row["latex"], "solution": row["solution"], "metadata": metadata}
+
+    def mark_used(self, ids: Iterable[int]):
+        ids = [int(i) for i in ids]
+        if ids:
+            self._conn().execute(
+                f"UPDATE exercises SET uses = uses + 1, last_used = ? WHERE id IN ({','.join('?' * len(ids))})",
+                [time.time(), *ids],
+            )
+
+    def _near_dup_index(self) -> LSHIndex:
+        """
+        LSH index over the stored signatures, loaded on first use and then
+        topped up with rows added since (also by other workers).
+        """
+        with self._lsh_lock:
+            conn = self._conn()
+            if self._lsh is None:
+                self._lsh = LSHIndex()
+                self._backfill_signatures(conn)
+            rows = conn.execute("SELECT id, sig FROM exercise_minhash WHERE id > ? ORDER BY id",
+                                (self._lsh_seen,)).fetchall()
+            for row in rows:
+                self._lsh.add(row["id"], row["sig"])
+                self._lsh_seen = row["id"]
+            return self._lsh
+
+    def _backfill_signatures(self, conn: sqlite3.Connection):
+        rows = conn.execute("SELECT e.id, e.latex FROM exercises e LEFT JOIN exercise_minhash m ON m.id = e.id "
+                            "WHERE m.id IS NULL").fetchall()
+        if rows:
+            conn.executemany("INSERT OR IGNORE INTO exercise_minhash (id, sig) VALUES (?, ?)",
+                             [(row["id"], pack(signature(row["latex"]))) for row in rows])
+
+    def near_duplicates(self, latex: str, threshold: Optional[float] = None, limit: int = 3) -> List[Dict[str, Any]]:
+        """Stored exercises nearly identical to 'latex': [{"bank_id", "similarity"}] most similar first."""
+        index = self._near_dup_index()
+        matches = index.query(signature(latex), threshold)
+        if matches:
+            # Rows deleted by other workers are still in this worker's index: drop them now
+            ids = [key for key, _ in matches]
+            live = {row[0] for row in self._conn().execute(
+                f"SELECT id FROM exercises WHERE id IN ({','.join('?' * len(ids))})", ids)}
+            if len(live) < len(ids):
+                with self._lsh_lock:
+                    for key in ids:
+                        if key not in live:
+                            index.remove(key)
+                matches = [(key, score) for key, score in matches if key in live]
+        return [{"bank_id": key, "similarity": round(score, 3)} for key, score in matches[:limit]]
+
+    def find_duplicates(self, threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Batch dedup of the whole bank from the stored signatures. The most
+        used (then oldest) exercise of each group is kept; the others are
+        returned as {"key", "duplicate_of", "similarity"} with bank ids.
+        """
+        conn = self._conn()
+        with self._lsh_lock:
+            self._backfill_signatures(conn)
+        rows = conn.execute("SELECT m.id, m.sig FROM exercise_minhash m JOIN exercises e ON e.id = m.id "
+                            "ORDER BY e.uses DESC, e.id")
+        return find_near_duplicates(
+            ((row["id"], row["sig"]) for row in rows),
+            Config.DEDUP_THRESHOLD if threshold is None else threshold,
+        )
+
+    def remove(self, ids: Iterable[int]) -> int:
+        ids = [int(i) for i in ids]
+        if not ids:
+            return 0
+        marks = ",".join("?" * len(ids))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute(f"DELETE FROM exercises WHERE id IN ({marks})", ids).rowcount
+            conn.execute(f"DELETE FROM exercises_fts WHERE rowid IN ({marks})", ids)
+            conn.execute(f"DELETE FROM exercise_minhash WHERE id IN ({marks})", ids)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lsh_lock:
+            if self._lsh is not None:
+                for i in ids:
+                    self._lsh.remove(i)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        total = conn.execute("SELECT COUNT(*) FROM exercises").fetchone()[0]
+        by_difficulty = dict(conn.execute("SELECT difficulty, COUNT(*) FROM exercises GROUP BY difficulty").fetchall())
+        by_source = dict(conn.execute("SELECT source, COUNT(*) FROM exercises GROUP BY source").fetchall())
+        return {"exercises": total, "by_difficulty": by_difficulty, "by_source": by_source}
+
+
+_bank: Optional[ExerciseBank] = None
+_bank_failed = False  # open failed once; not retried (nor warned about) again in this process
+_bank_lock = threading.Lock()
+
+
+def default_bank_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".edutex", "exercise_bank.sqlite3")
+
+
+def get_bank() -> Optional[ExerciseBank]:
+    """Process-wide bank, or None when EXERCISE_BANK=0 or the database cannot be opened."""
+    global _bank, _bank_failed
+    if not Config.EXERCISE_BANK or _bank_failed:
+        return None
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None and not _bank_failed:
+                try:
+                    _bank = ExerciseBank(Config.EXERCISE_BANK_PATH or default_bank_path())
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Warning: Exercise bank unavailable: {e}")
+                    _bank_failed = True
+    return _bank
+
+
+def save_exercises(exercises: Iterable[Dict[str, Any]], topic: str, difficulty: str = "medium", source: str = "") -> List[int]:
+    """Best-effort write-through used by the generating agents."""
+    bank = get_bank()
+    if bank is None or not topic:
+        return []
+    try:
+        return bank.add_many(exercises, topic, difficulty, source)
+    except sqlite3.Error as e:
+        print(f"Warning: Could not write to exercise bank: {e}")
+        return []
+
+
+def mark_reused(exercises: Iterable[Dict[str, Any]]):
+    """Best-effort use count for the bank exercises that made it into an exam."""
+    ids = [ex["metadata"]["bank_id"] for ex in exercises
+           if isinstance(ex, dict) and isinstance(ex.get("metadata"), dict) and "bank_id" in ex["metadata"]]
+    bank = get_bank()
+    if bank is None or not ids:
+        return
+    try:
+        bank.mark_used(ids)
+    except sqlite3.Error as e:
+        print(f"Warning: Could not update exercise bank usage: {e}")
+
+
+def check_duplicate(exercise: Dict[str, Any], others: Sequence[Dict[str, Any]] = ()) -> Optional[Dict[str, Any]]:
+    """
+    Near-duplicate check for a freshly generated exercise against 'others'
+    (e.g. the rest of the exam) and the bank. Returns None when unique (or
+    DEDUP_MODE=off), else {"source": "exam", "index", "similarity"} or
+    {"source": "bank", "bank_id", "similarity"}.
+    """
+    if Config.DEDUP_MODE == "off" or not isinstance(exercise, dict):
+        return None
+    latex = exercise.get("latex")
+    if not isinstance(latex, str) or not latex.strip():
+        return None
+    threshold = Config.DEDUP_THRESHOLD
+    match = check_against(latex, others, threshold) if others else None
+    if match is not None:
+        return {"source": "exam", **match}
+    bank = get_bank()
+    if bank is None:
+        return None
+    try:
+        found = bank.near_duplicates(latex, threshold, limit=1)
+    except sqlite3.Error as e:
+        print(f"Warning: Near-duplicate check failed: {e}")
+        return None
+    return {"source": "bank", **found[0]} if found else None
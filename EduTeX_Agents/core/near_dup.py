@@ -0,0 +1,200 @@
+"""
+Near-duplicate detection for exercises (MinHash + LSH).
+
+Exercise LaTeX is normalized (accents, case, spacing commands, math
+delimiters, \\dfrac/\\tfrac...) and cut into token 3-gram shingles. A
+MinHash signature of NUM_PERM values estimates the Jaccard similarity of
+two shingle sets; LSH banding finds candidate pairs without comparing
+against every stored exercise, so a lookup stays sub-millisecond however
+large the bank is.
+
+Signatures only depend on the text (fixed seeds, crc32 shingle hashes),
+so they can be stored and compared across processes. NumPy is used when
+installed; the pure-Python path computes identical values.
+"""
+import random
+import re
+import zlib
+from array import array
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from core.textnorm import fold  # type: ignore
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard become candidates
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+
+_PRIME = (1 << 31) - 1
+_rng = random.Random(20240601)
+_A = [_rng.randrange(1, _PRIME) for _ in range(NUM_PERM)]
+_B = [_rng.randrange(0, _PRIME) for _ in range(NUM_PERM)]
+if HAS_NUMPY:
+    _A_NP = np.array(_A, dtype=np.uint64)[:, None]
+    _B_NP = np.array(_B, dtype=np.uint64)[:, None]
+
+# Markup that does not change the exercise
+_NOISE = re.compile(
+    r"\\(?:left|right|big|Big|bigg|Bigg|displaystyle|textstyle|quad|qquad|noindent|medskip|smallskip|bigskip)\b"
+    r"|\\[,;:! ]|~|\$|\\[()\[\]]"
+)
+_ALIASES = re.compile(r"\\(?:dfrac|tfrac)\b")
+_TOKENS = re.compile(r"\\[a-zA-Z]+|\w+|[^\s\w]")
+
+Signature = Tuple[int, ...]
+
+
+def normalize_latex(latex: str) -> str:
+    """Canonical text of an exercise statement used for shingling."""
+    text = _ALIASES.sub(r"\\frac", _NOISE.sub(" ", latex))
+    return " ".join(_TOKENS.findall(fold(text)))
+
+
+def shingles(latex: str, k: int = SHINGLE_SIZE) -> Set[int]:
+    """crc32 hashes of the token k-grams of the normalized statement."""
+    tokens = normalize_latex(latex).split(" ")
+    if len(tokens) <= k:
+        return {zlib.crc32(" ".join(tokens).encode("utf-8"))}
+    return {zlib.crc32(" ".join(tokens[i:i + k]).encode("utf-8")) for i in range(len(tokens) - k + 1)}
+
+
+def signature(latex: str) -> Signature:
+    """MinHash signature (NUM_PERM ints) of an exercise statement."""
+    hashes = shingles(latex)
+    if HAS_NUMPY:
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))[None, :]
+        return tuple(((_A_NP * values + _B_NP) % _PRIME).min(axis=1).tolist())
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in zip(_A, _B))
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def pack(sig: Sequence[int]) -> bytes:
+    return array("I", sig).tobytes()
+
+
+def unpack(raw: bytes) -> Signature:
+    values = array("I")
+    values.frombytes(raw)
+    return tuple(values)
+
+
+class LSHIndex:
+    """
+    Banded MinHash index: key -> signature, with candidate lookup by band
+    buckets. Signatures are kept packed (NUM_PERM * 4 bytes), band buckets
+    are keyed by byte slices and candidates are verified in one NumPy
+    comparison when available.
+    """
+    def __init__(self, bands: int = BANDS, threshold: float = DEFAULT_THRESHOLD):
+        if NUM_PERM % bands:
+            raise ValueError(f"bands must divide {NUM_PERM}")
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.threshold = threshold
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def _bands(self, raw: bytes):
+        width = 4 * self.rows
+        for band in range(self.bands):
+            yield band, raw[band * width:(band + 1) * width]
+
+    def add(self, key: Hashable, sig: Union[Signature, bytes]):
+        if key in self._signatures:
+            self.remove(key)
+        raw = sig if isinstance(sig, bytes) else pack(sig)
+        self._signatures[key] = raw
+        for band, chunk in self._bands(raw):
+            self._buckets[band].setdefault(chunk, []).append(key)
+
+    def remove(self, key: Hashable):
+        raw = self._signatures.pop(key, None)
+        if raw is None:
+            return
+        for band, chunk in self._bands(raw):
+            keys = self._buckets[band].get(chunk)
+            if keys and key in keys:
+                keys.remove(key)
+                if not keys:
+                    del self._buckets[band][chunk]
+
+    def query(self, sig: Union[Signature, bytes], threshold: Optional[float] = None,
+              exclude: Hashable = None) -> List[Tuple[Hashable, float]]:
+        """Stored keys at or above the threshold, most similar first."""
+        threshold = self.threshold if threshold is None else threshold
+        raw = sig if isinstance(sig, bytes) else pack(sig)
+        candidates: Set[Hashable] = set()
+        for band, chunk in self._bands(raw):
+            candidates.update(self._buckets[band].get(chunk, ()))
+        candidates.discard(exclude)
+        if not candidates:
+            return []
+        keys = list(candidates)
+        if HAS_NUMPY:
+            stored = np.frombuffer(b"".join(self._signatures[k] for k in keys), dtype=np.uint32)
+            agree = (stored.reshape(len(keys), NUM_PERM) == np.frombuffer(raw, dtype=np.uint32)).sum(axis=1)
+            scores = (agree / NUM_PERM).tolist()
+        else:
+            mine = unpack(raw)
+            scores = [similarity(mine, unpack(self._signatures[k])) for k in keys]
+        return sorted(((k, v) for k, v in zip(keys, scores) if v >= threshold), key=lambda m: -m[1])
+
+
+def find_near_duplicates(
+    items: Iterable[Tuple[Hashable, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """
+    Batch dedup: items are (key, latex) or (key, signature / packed bytes) pairs in
+    priority order. Every item that nearly duplicates an earlier kept item
+    is reported as {"key", "duplicate_of", "similarity"}; the earlier item
+    is the one to keep.
+    """
+    index = LSHIndex(threshold=threshold)
+    duplicates = []
+    for key, value in items:
+        sig = signature(value) if isinstance(value, str) else value
+        matches = index.query(sig)
+        if matches:
+            original, score = matches[0]
+            duplicates.append({"key": key, "duplicate_of": original, "similarity": round(score, 3)})
+        else:
+            index.add(key, sig)
+    return duplicates
+
+
+def check_against(
+    latex: str,
+    others: Sequence[Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> Optional[Dict[str, Any]]:
+    """
+    Most similar of a few exercises (e.g. the rest of the current exam) at or
+    above the threshold, as {"index", "similarity"}; compared directly, no index.
+    """
+    sig = signature(latex)
+    best: Optional[Dict[str, Any]] = None
+    for i, other in enumerate(others):
+        other_latex = other.get("latex") if isinstance(other, dict) else None
+        if not isinstance(other_latex, str):
+            continue
+        score = similarity(sig, signature(other_latex))
+        if score >= threshold and (best is None or score > best["similarity"]):
+            best = {"index": i, "similarity": round(score, 3)}
+    return best
@@ -0,0 +1,270 @@
+"""
+Pipeline - a small DAG executor for multi-agent workflows.
+
+A flow is a list of nodes. Each node names the values it reads (run
+parameters or other nodes' outputs) and produces one output under its own
+name. Nodes whose inputs are ready run concurrently on a thread pool, each
+inside a telemetry span, and every run reports per-node timing.
+
+- optional nodes may fail without failing the flow (their output is None),
+- 'when' skips a node based on the run parameters,
+- with a NodeMemo, outputs of memoizable nodes are reused for identical
+  inputs across runs (shared across workers with STATE_BACKEND=sqlite);
+  'memoize' may be a predicate (inputs, output) -> bool so that, e.g., an
+  agent's offline fallback is not reused,
+- max_workers bounds node calls and the fan_out calls nested inside them
+  together (core.concurrency.CallBudget).
+"""
+import contextvars
+import hashlib
+import json
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from core.concurrency import call_budget, current_budget
+from core.telemetry import span
+
+_MISSING = object()
+
+
+class PipelineError(RuntimeError):
+    """A required node failed; 'report' holds the per-node status of the run."""
+    def __init__(self, pipeline: str, node: str, cause: Exception, report: Optional[Dict[str, Any]] = None):
+        super().__init__(f"{pipeline}.{node} failed: {type(cause).__name__}: {cause}")
+        self.pipeline = pipeline
+        self.node = node
+        self.cause = cause
+        self.report = report or {}
+
+
+class Node:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        inputs: Sequence[str] = (),
+        optional: bool = False,
+        when: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        memoize: Union[bool, Callable[[Dict[str, Any], Any], bool]] = False,
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.optional = optional
+        self.when = when
+        self.memoize = memoize
+
+    def __repr__(self):
+        return f"Node({self.name!r}, inputs={list(self.inputs)})"
+
+    def should_memoize(self, kwargs: Dict[str, Any], value: Any) -> bool:
+        return bool(self.memoize(kwargs, value)) if callable(self.memoize) else bool(self.memoize)
+
+
+class NodeMemo:
+    """Memoised node outputs keyed by pipeline, node and input values (JSON only)."""
+    NAMESPACE = "pipeline"
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 256, store=None):
+        from core.shared_store import get_store
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.store = store if store is not None else get_store()
+
+    @staticmethod
+    def key(pipeline: str, node: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        try:
+            canonical = json.dumps([pipeline, node, kwargs], sort_keys=True, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        raw = self.store.get(self.NAMESPACE, key)
+        return _MISSING if raw is None else json.loads(raw.decode("utf-8"))
+
+    def set(self, key: str, value: Any):
+        try:
+            raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        except (TypeError, ValueError):
+            return
+        self.store.set(self.NAMESPACE, key, raw, self.ttl, max_entries=self.max_entries)
+
+
+class Pipeline:
+    def __init__(self, name: str, nodes: Iterable[Node]):
+        self.name = name
+        self.nodes: Dict[str, Node] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate node '{node.name}' in pipeline '{name}'")
+            self.nodes[node.name] = node
+        self.order = self._topological_order()
+
+    def deps(self, name: str) -> List[str]:
+        """Inputs of 'name' produced by other nodes (the rest are run parameters)."""
+        return [i for i in self.nodes[name].inputs if i in self.nodes]
+
+    def _topological_order(self) -> List[str]:
+        pending = {name: set(self.deps(name)) for name in self.nodes}
+        order: List[str] = []
+        while pending:
+            ready = [name for name, deps in pending.items() if not deps]
+            if not ready:
+                raise ValueError(f"Cycle in pipeline '{self.name}' between {sorted(pending)}")
+            for name in ready:
+                order.append(name)
+                del pending[name]
+            for deps in pending.values():
+                deps.difference_update(ready)
+        return order
+
+    def _needed(self, targets: Optional[Iterable[str]]) -> Set[str]:
+        if targets is None:
+            return set(self.nodes)
+        needed: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.nodes:
+                raise ValueError(f"Unknown node '{name}' in pipeline '{self.name}'")
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.deps(name))
+        return needed
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Nodes in execution order with their inputs (for docs / diagnostics)."""
+        return [
+            {"node": name, "inputs": list(self.nodes[name].inputs), "optional": self.nodes[name].optional}
+            for name in self.order
+        ]
+
+    def run(
+        self,
+        params: Dict[str, Any],
+        max_workers: int = 4,
+        memo: Optional[NodeMemo] = None,
+        targets: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Runs the nodes needed for 'targets' (default: all) and returns
+        {"outputs": {node: value}, "nodes": {node: {"status", "ms", ...}}, "total_ms"}.
+        Raises PipelineError when a required node fails.
+        """
+        needed = self._needed(targets)
+        waiting = {name: set(self.deps(name)) for name in self.order if name in needed}
+        outputs: Dict[str, Any] = {}
+        report: Dict[str, Dict[str, Any]] = {}
+        running: Dict[Any, Tuple[str, Optional[str], Dict[str, Any]]] = {}
+        failure: Optional[Tuple[str, Exception]] = None
+        start = time.perf_counter()
+
+        def finish(name: str, value: Any, status: str, **extra):
+            outputs[name] = value
+            report[name] = {"status": status, **extra}
+            for deps in waiting.values():
+                deps.discard(name)
+
+        def kwargs_for(node: Node) -> Dict[str, Any]:
+            kwargs = {}
+            for name in node.inputs:
+                value = outputs.get(name, _MISSING) if name in self.nodes else params.get(name, _MISSING)
+                if value is not _MISSING:
+                    kwargs[name] = value  # absent parameters fall back to the function default
+            return kwargs
+
+        with call_budget(max_workers), span(f"pipeline.{self.name}", nodes=len(waiting)) as root, \
+                ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            while (waiting or running) and failure is None:
+                progressed = True
+                while progressed and failure is None:
+                    progressed = False
+                    for name in [n for n, deps in waiting.items() if not deps]:
+                        del waiting[name]
+                        progressed = True
+                        node = self.nodes[name]
+                        if node.when is not None and not node.when(params):
+                            finish(name, None, "skipped", ms=0.0)
+                            continue
+                        kwargs = kwargs_for(node)
+                        key = memo.key(self.name, name, kwargs) if memo is not None and node.memoize else None
+                        if key is not None:
+                            cached = memo.get(key)  # type: ignore[union-attr]
+                            if cached is not _MISSING:
+                                finish(name, cached, "cached", ms=0.0)
+                                continue
+                        future = pool.submit(contextvars.copy_context().run, self._call, node, kwargs)
+                        running[future] = (name, key, kwargs)
+
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key, kwargs = running.pop(future)
+                    node = self.nodes[name]
+                    value, ms, error = future.result()
+                    if error is None:
+                        finish(name, value, "ok", ms=ms)
+                        if key is not None and node.should_memoize(kwargs, value):
+                            memo.set(key, value)  # type: ignore[union-attr]
+                    elif node.optional:
+                        finish(name, None, "error", ms=ms, error=f"{type(error).__name__}: {error}")
+                    else:
+                        report[name] = {"status": "error", "ms": ms, "error": f"{type(error).__name__}: {error}"}
+                        failure = failure or (name, error)
+
+            if failure is not None:
+                # Let running nodes finish, never start new ones
+                for future in list(running):
+                    name, _, _ = running.pop(future)
+                    value, ms, error = future.result()
+                    report[name] = {"status": "ok" if error is None else "error", "ms": ms}
+                for name in waiting:
+                    report[name] = {"status": "not_run"}
+
+            total_ms = round(1000 * (time.perf_counter() - start), 1)
+            root.set_attribute("total_ms", total_ms)
+
+        result = {"outputs": outputs, "nodes": {n: report[n] for n in self.order if n in report}, "total_ms": total_ms}
+        if failure is not None:
+            raise PipelineError(self.name, failure[0], failure[1], result) from failure[1]
+        return result
+
+    def _call(self, node: Node, kwargs: Dict[str, Any]) -> Tuple[Any, float, Optional[Exception]]:
+        start = time.perf_counter()
+        try:
+            budget = current_budget()
+            with span(f"{self.name}.{node.name}"), budget.slot() if budget is not None else nullcontext():
+                value = node.func(**kwargs)
+            error = None
+        except Exception as e:
+            value, error = None, e
+        return value, round(1000 * (time.perf_counter() - start), 1), error
+
+
+def build_pipeline(name: str, spec: Sequence[Dict[str, Any]], steps: Dict[str, Callable[..., Any]]) -> Pipeline:
+    """
+    Builds a pipeline from a declarative spec:
+        [{"node": "calibration", "step": "calibrate", "inputs": ["exercises"], "optional": True}, ...]
+    'step' names a function in 'steps' (defaults to the node name);
+    'when' names a run parameter that must be truthy for the node to run;
+    'memoize' is True or a predicate (inputs, output) -> bool.
+    """
+    nodes = []
+    for entry in spec:
+        step = entry.get("step", entry["node"])
+        if step not in steps:
+            raise ValueError(f"Unknown step '{step}' in pipeline '{name}'")
+        flag = entry.get("when")
+        nodes.append(Node(
+            entry["node"],
+            steps[step],
+            inputs=entry.get("inputs", ()),
+            optional=entry.get("optional", False),
+            when=(lambda params, flag=flag: bool(params.get(flag))) if flag else None,
+            memoize=entry.get("memoize", False),
+        ))
+    return Pipeline(name, nodes)
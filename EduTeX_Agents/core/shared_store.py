@@ -0,0 +1,256 @@
+"""
+Shared state - key/value store with TTL and counted leases.
+
+Two interchangeable backends:
+- MemoryStore: per-process dicts (single worker, default).
+- SQLiteStore: one SQLite database in WAL mode, shared by every worker
+  process on the host (STATE_BACKEND=sqlite, SHARED_STATE_PATH=...).
+
+Used for the HTTP response cache, memoised pipeline node outputs, stored
+idempotent responses and cross-worker per-tenant concurrency leases.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from config import Config  # type: ignore
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config  # type: ignore
+
+OWNER_ID = f"{os.uname().nodename if hasattr(os, 'uname') else 'host'}:{os.getpid()}"
+
+
+class MemoryStore:
+    """In-process backend (LRU per namespace when max_entries is given)."""
+    def __init__(self):
+        self._data: Dict[str, "OrderedDict[str, Tuple[float, bytes]]"] = {}
+        self._leases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            entries = self._data.get(namespace)
+            entry = entries.get(key) if entries else None
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del entries[key]  # type: ignore[union-attr]
+                return None
+            entries.move_to_end(key)  # type: ignore[union-attr]
+            return entry[1]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: Optional[int] = None):
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            entries[key] = (time.time() + ttl, value)
+            entries.move_to_end(key)
+            while max_entries and len(entries) > max_entries:
+                entries.popitem(last=False)
+
+    def add(self, namespace: str, key: str, value: bytes, ttl: float) -> bool:
+        """Sets key only if absent (or expired). Returns True if it was set."""
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            entry = entries.get(key)
+            if entry is not None and entry[0] >= time.time():
+                return False
+            entries[key] = (time.time() + ttl, value)
+            return True
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._data.get(namespace, OrderedDict()).pop(key, None)
+
+    def clear(self, namespace: str):
+        with self._lock:
+            self._data.pop(namespace, None)
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return len(self._data.get(namespace, ()))
+
+    def acquire_lease(self, namespace: str, limit: int, ttl: float) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            leases = self._leases.setdefault(namespace, {})
+            for lease_id in [k for k, exp in leases.items() if exp < now]:
+                del leases[lease_id]
+            if len(leases) >= limit:
+                return None
+            lease_id = uuid.uuid4().hex
+            leases[lease_id] = now + ttl
+            return lease_id
+
+    def release_lease(self, namespace: str, lease_id: str):
+        with self._lock:
+            self._leases.get(namespace, {}).pop(lease_id, None)
+
+
+class SQLiteStore:
+    """
+    SQLite (WAL) backend shared across processes. One connection per thread,
+    plus one with a short busy timeout for taking leases: while the database
+    is locked a lease is refused (the caller retries) instead of stalling it.
+    """
+    TRIM_EVERY = 64
+    LEASE_BUSY_TIMEOUT = 1.0  # seconds
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._sets = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB, "
+            "expires REAL NOT NULL, touched REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (id TEXT PRIMARY KEY, namespace TEXT NOT NULL, "
+            "owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS leases_ns ON leases (namespace)")
+        conn.execute("DELETE FROM leases WHERE owner = ?", (OWNER_ID,))
+
+    def _conn(self, name: str = "conn", timeout: float = 30) -> sqlite3.Connection:
+        conn = getattr(self._local, name, None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            setattr(self._local, name, conn)
+        return conn
+
+    def _lease_conn(self) -> sqlite3.Connection:
+        return self._conn("lease_conn", self.LEASE_BUSY_TIMEOUT)
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ? AND expires < ?", (namespace, key, now))
+            return None
+        conn.execute("UPDATE kv SET touched = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+        return bytes(row[0])
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: Optional[int] = None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value, expires, touched) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, sqlite3.Binary(value), now + ttl, now),
+        )
+        self._sets += 1
+        if max_entries and self._sets % self.TRIM_EVERY == 0:
+            self._trim(namespace, max_entries)
+
+    def _trim(self, namespace: str, max_entries: int):
+        """Drops expired rows, then least recently touched rows beyond max_entries."""
+        conn = self._conn()
+        conn.execute("DELETE FROM kv WHERE namespace = ? AND expires < ?", (namespace, time.time()))
+        conn.execute(
+            "DELETE FROM kv WHERE namespace = ? AND key IN (SELECT key FROM kv WHERE namespace = ? "
+            "ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+            (namespace, namespace, max_entries),
+        )
+
+    def add(self, namespace: str, key: str, value: bytes, ttl: float) -> bool:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ? AND expires < ?", (namespace, key, now))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO kv (namespace, key, value, expires, touched) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, sqlite3.Binary(value), now + ttl, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount == 1
+
+    def delete(self, namespace: str, key: str):
+        self._conn().execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace: str):
+        self._conn().execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+
+    def count(self, namespace: str) -> int:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM kv WHERE namespace = ? AND expires >= ?", (namespace, time.time())
+        ).fetchone()
+        return int(row[0])
+
+    def acquire_lease(self, namespace: str, limit: int, ttl: float) -> Optional[str]:
+        now = time.time()
+        conn = self._lease_conn()
+        # Read-only check first: a refused lease takes no write lock
+        (held,) = conn.execute(
+            "SELECT COUNT(*) FROM leases WHERE namespace = ? AND expires >= ?", (namespace, now)
+        ).fetchone()
+        if held >= limit:
+            return None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                return None
+            raise
+        try:
+            conn.execute("DELETE FROM leases WHERE namespace = ? AND expires < ?", (namespace, now))
+            (held,) = conn.execute("SELECT COUNT(*) FROM leases WHERE namespace = ?", (namespace,)).fetchone()
+            lease_id = None
+            if held < limit:
+                lease_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO leases (id, namespace, owner, expires) VALUES (?, ?, ?, ?)",
+                    (lease_id, namespace, OWNER_ID, now + ttl),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return lease_id
+
+    def release_lease(self, namespace: str, lease_id: str):
+        self._conn().execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+
+
+_store: Optional[Any] = None
+_store_lock = threading.Lock()
+
+
+def default_state_path() -> str:
+    return os.path.join(tempfile.gettempdir(), "edutex_shared_state.sqlite3")
+
+
+def get_store():
+    """Process-wide store selected by Config.STATE_BACKEND ('memory' or 'sqlite')."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if Config.STATE_BACKEND == "sqlite":
+                    _store = SQLiteStore(Config.SHARED_STATE_PATH or default_state_path())
+                else:
+                    _store = MemoryStore()
+    return _store
+
+
+def is_shared() -> bool:
+    return isinstance(get_store(), SQLiteStore)
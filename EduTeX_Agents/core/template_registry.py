@@ -17,9 +17,13 @@ class TemplateRegistry:
         hex_color = maincolor.lstrip('#')
         
         # Preamble matches the frontend 'latexGenerator.ts' logic
-        # wrapping around the custom 'exam.cls'
+        # wrapping around the custom 'exam.cls'.
+        # Everything above the endofdump line depends only on the style and is
+        # precompiled into a format (skills/latex_core/scripts/formats.py);
+        # fonts and colors stay below it. In a normal run the line is \relax.
         return f"""\\documentclass[11pt,a4paper,{style}]{{exam}}
 \\usepackage[english,greek]{{babel}}
+\\csname endofdump\\endcsname
 \\usepackage{{fontspec}}
 \\setmainfont{{Minion Pro}}
 \\newfontfamily{{\\titlefont}}{{Century Gothic}}
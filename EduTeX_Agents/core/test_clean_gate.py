@@ -0,0 +1,21 @@
+import sys
+import os
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from core.clean_gate import GateStats
+
+
+def test_old_topics_are_merged_into_other():
+    stats = GateStats(max_topics=2)
+    for topic in ("a", "b", "c", "b"):
+        stats.record(topic, True, 0)
+    stats.record("d", False, 2)
+
+    report = stats.stats()
+    assert sorted(report["topics"]) == [GateStats.OTHER, "b", "d"]
+    assert report["topics"][GateStats.OTHER]["exercises"] == 2  # a and c
+    assert report["total"]["exercises"] == 5
+    assert report["total"]["passed"] == 4
+    assert report["total"]["retries"] == 2
@@ -0,0 +1,13 @@
+"""
+Text normalization shared by keyword routing, the exercise bank and
+duplicate detection.
+"""
+import re
+import unicodedata
+
+_COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+
+
+def fold(text: str) -> str:
+    """Accent-insensitive, case-folded form ("Άσκηση" -> "ασκηση")."""
+    return _COMBINING_MARKS.sub("", unicodedata.normalize("NFD", text)).casefold()
@@ -0,0 +1,107 @@
+"""
+Benchmark: is_clean_number, symbolic-only vs numeric-first.
+
+The corpus is the roots SymPy returns for generated equations:
+- quadratics from coefficients.py (integer, rational and irrational roots),
+- "LLM-guessed" quadratics and biquadratics with random coefficients
+  (mostly messy, often nested radicals),
+- basic trigonometric equations (pi multiples).
+
+Reports us / root for the previous simplify(num**2) check and for the
+tiered check, how often the tiered check still needed simplify, and the
+verdicts on which the two differ (pi multiples are clean only in the new one).
+
+Usage: python scripts/bench_clean_numbers.py [--size 400]
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(PROJECT_ROOT)
+
+from sympy import Rational, Symbol, cos, simplify, sin, solve, tan
+
+from skills.clean_numbers.scripts import verify
+from skills.clean_numbers.scripts.coefficients import HAS_NUMPY, quadratics
+
+x = Symbol("x")
+
+
+def legacy_is_clean(num):
+    """is_clean_number before the numeric tier."""
+    if num.is_Integer:
+        return True
+    if num.is_Rational:
+        return num.q < 20
+    sq = simplify(num**2)
+    return bool(sq.is_Rational and sq.q < 20)
+
+
+def make_corpus(size, rng):
+    equations = []
+    if HAS_NUMPY:
+        for kind in ("integer", "rational", "irrational"):
+            found = quadratics(roots=kind, limit=size // 8, seed=rng.randrange(10**6))
+            equations += [int(a) * x**2 + int(b) * x + int(c) for a, b, c in found["params"]]
+    for _ in range(size // 4):
+        equations.append(rng.randint(1, 6) * x**2 + rng.randint(-20, 20) * x + rng.randint(-30, 30))
+    for _ in range(size // 8):
+        equations.append(x**4 - rng.randint(1, 12) * x**2 + rng.randint(-10, 20))
+    for _ in range(size // 8):
+        func = rng.choice((sin, cos, tan))
+        value = rng.choice((0, Rational(1, 2), 1, -Rational(1, 2))) if func is not tan else rng.choice((0, 1, -1))
+        equations.append(func(rng.randint(1, 3) * x) - value)
+    roots = []
+    for equation in equations:
+        roots += solve(equation, x)
+    rng.shuffle(roots)
+    return roots[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    roots = make_corpus(args.size, random.Random(args.seed))
+    print(f"{len(roots)} roots, numpy={HAS_NUMPY}")
+
+    start = time.perf_counter()
+    old = [legacy_is_clean(r) for r in roots]
+    old_elapsed = time.perf_counter() - start
+    print(f"symbolic:      {old_elapsed / len(roots) * 1e6:9.1f} us / root")
+
+    fallbacks = 0
+    symbolic = verify._is_clean_symbolic
+
+    def counting(num):
+        nonlocal fallbacks
+        fallbacks += 1
+        return symbolic(num)
+
+    verify._is_clean_symbolic = counting
+    try:
+        start = time.perf_counter()
+        new = [verify.is_clean_number(r) for r in roots]
+        new_elapsed = time.perf_counter() - start
+    finally:
+        verify._is_clean_symbolic = symbolic
+    print(f"numeric-first: {new_elapsed / len(roots) * 1e6:9.1f} us / root "
+          f"({old_elapsed / new_elapsed:.0f}x, simplify fallback on {fallbacks})")
+
+    differ = [(r, o, n) for r, o, (n, _) in zip(roots, old, new) if o != n]
+    pi_multiples = sum(1 for r, _, n in differ if n and "pi" in str(r))
+    print(f"clean: {sum(old)} -> {sum(n for n, _ in new)}; "
+          f"{len(differ)} differ ({pi_multiples} pi multiples, newly accepted)")
+    for r, o, n in differ:
+        if "pi" not in str(r):
+            print(f"  mismatch: {r} symbolic={o} numeric-first={n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: clean-coefficient search, SymPy per candidate vs vectorized.
+
+- sympy: random quadratic coefficients checked one by one with
+  verify_expression (parse + solve + is_clean_number), as when
+  validating LLM-guessed coefficients,
+- vectorized: skills/clean_numbers/scripts/coefficients.py families.
+
+Reports valid parameter sets per second.
+
+Usage: python scripts/bench_coefficients.py [--candidates 200]
+"""
+import sys
+import os
+import io
+import time
+import random
+import argparse
+import contextlib
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(PROJECT_ROOT)
+
+from skills.clean_numbers.scripts.coefficients import (
+    linear_systems, quadratics, rational_equations, trig_equations,
+)
+from skills.clean_numbers.scripts.verify import verify_expression
+
+
+def sympy_rate(candidates):
+    rng = random.Random(0)
+    valid = 0
+    start = time.perf_counter()
+    for _ in range(candidates):
+        a, b, c = rng.randint(1, 9), rng.randint(-30, 30), rng.randint(-50, 50)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok, _ = verify_expression(f"{a}*x^2 + ({b})*x + ({c}) = 0")
+        valid += ok
+    elapsed = time.perf_counter() - start
+    return valid, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=200)
+    args = parser.parse_args()
+
+    valid, elapsed = sympy_rate(args.candidates)
+    print(f"{'sympy quadratic (per candidate)':<34} {valid:>7} valid / {args.candidates} tried "
+          f"in {elapsed * 1000:8.0f} ms = {valid / elapsed:>12,.0f} valid/s")
+
+    families = [
+        ("quadratic, integer roots", lambda: quadratics()),
+        ("quadratic, clean roots", lambda: quadratics(roots="clean")),
+        ("2x2 system, integer", lambda: linear_systems(2, count=5000, seed=0)),
+        ("3x3 system, rational", lambda: linear_systems(3, solution="rational", count=5000, seed=0)),
+        ("rational equation, integer", lambda: rational_equations()),
+        ("trig, standard angles", lambda: trig_equations()),
+    ]
+    for label, run in families:
+        start = time.perf_counter()
+        found = run()
+        elapsed = time.perf_counter() - start
+        count = len(found["params"])
+        print(f"{label:<34} {count:>7} valid {'':>15} in {elapsed * 1000:8.0f} ms = {count / elapsed:>12,.0f} valid/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: one LaTeX pass of a representative exam, cold vs precompiled format.
+
+Builds an exam per template style with TemplateRegistry (exercises with
+fractions, a cases system, a tikz graph and a table) and, for every
+installed engine, reports the format build time and the median time of a
+single pass without and with the format. The exam preamble needs fontspec;
+for pdflatex the font lines are swapped for Type1 equivalents so the same
+exam can be measured there too. Formats go to a temporary directory.
+
+Usage: python scripts/bench_compile.py [--runs 3] [--styles scientific ...] [--engines xelatex ...]
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(PROJECT_ROOT)
+
+from core.template_registry import TemplateRegistry
+from skills.latex_core.scripts.formats import (
+    ENGINES, STYLES, FormatCache, engine_version, input_dirs, latex_command, latex_env, split_preamble,
+)
+
+EXERCISES = r"""
+\askhsh Να λυθεί η εξίσωση $\dfrac{x-1}{2} + \dfrac{x+3}{4} = \dfrac{5}{4}$.
+
+\askhsh Να λυθεί το σύστημα
+\[ \begin{cases} 2x + y = 7 \\ x - y = -1 \end{cases} \]
+
+\askhsh Δίνεται η συνάρτηση $f(x) = x^2 - 4x + 3$.
+\begin{rlist}
+\item Να βρεθούν οι ρίζες της $f$.
+\item Να γίνει η γραφική παράσταση της $f$.
+\end{rlist}
+\begin{center}
+\begin{tikzpicture}[scale=.7]
+\draw[->] (-1,0) -- (5,0) node[right] {$x$};
+\draw[->] (0,-2) -- (0,5) node[above] {$y$};
+\draw[thick, maincolor, domain=-0.3:4.3, samples=60] plot (\x, {\x*\x - 4*\x + 3});
+\end{tikzpicture}
+\end{center}
+
+\askhsh Να συμπληρωθεί ο πίνακας τιμών της $g(x) = 2x - 1$.
+\begin{center}
+\begin{tblr}{hlines, vlines, columns={c}}
+$x$ & $-1$ & $0$ & $1$ & $2$ \\
+$g(x)$ & & & & \\
+\end{tblr}
+\end{center}
+"""
+
+# fontspec only runs on Unicode engines; keep the rest of the exam identical for pdflatex
+_PDFLATEX_FONTS = {
+    "\\usepackage{fontspec}\n": "",
+    "\\setmainfont{Minion Pro}\n": "",
+    "\\newfontfamily{\\titlefont}{Century Gothic}\n": "\\newcommand{\\titlefont}{\\sffamily}\n",
+}
+
+
+def make_exam(style, engine):
+    source = TemplateRegistry().get_document_custom(
+        EXERCISES, style=style, title="Εξισώσεις", subtitle="Επαναληπτικό διαγώνισμα", chapter="Άλγεβρα",
+    )
+    if engine == "pdflatex":
+        for line, replacement in _PDFLATEX_FONTS.items():
+            source = source.replace(line, replacement)
+    return source
+
+
+def one_pass(engine, tex_file, fmt=None):
+    """Seconds for one pass in the file's folder, or None if the pass fails."""
+    workdir = os.path.dirname(tex_file)
+    start = time.perf_counter()
+    result = subprocess.run(latex_command(engine, os.path.basename(tex_file), fmt), cwd=workdir,
+                            env=latex_env(input_dirs(tex_file)), stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    pdf = os.path.splitext(tex_file)[0] + ".pdf"
+    return elapsed if result.returncode == 0 and os.path.exists(pdf) else None
+
+
+def median_ms(samples):
+    samples = [s for s in samples if s is not None]
+    return f"{statistics.median(samples) * 1000:8.0f} ms" if samples else "  failed  "
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--styles", nargs="+", default=list(STYLES), choices=STYLES)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    args = parser.parse_args()
+
+    engines = [e for e in args.engines if engine_version(e) is not None]
+    if not engines:
+        print("No TeX engine found (pdflatex / xelatex / lualatex); nothing to measure.")
+        return
+    for engine in engines:
+        print(f"{engine}: {engine_version(engine)}")
+
+    format_dir = tempfile.mkdtemp(prefix="edutex-bench-fmt-")
+    cache = FormatCache(format_dir)
+    try:
+        print(f"\n{'style':<11} {'engine':<9} {'format build':>12} {'cold pass':>11} {'with format':>11}  speedup")
+        for style in args.styles:
+            for engine in engines:
+                with tempfile.TemporaryDirectory(prefix="edutex-bench-") as work:
+                    tex_file = os.path.join(work, "exam.tex")
+                    source = make_exam(style, engine)
+                    with open(tex_file, "w", encoding="utf-8") as f:
+                        f.write(source)
+
+                    start = time.perf_counter()
+                    fmt = cache.get(engine, split_preamble(source)[0], input_dirs(tex_file))
+                    build = f"{(time.perf_counter() - start) * 1000:9.0f} ms" if fmt else "  unavailable"
+
+                    cold = [one_pass(engine, tex_file) for _ in range(args.runs)]
+                    warm = [one_pass(engine, tex_file, fmt) for _ in range(args.runs)] if fmt else []
+                    speedup = ""
+                    if any(cold) and any(warm):
+                        cold_ms = statistics.median([s for s in cold if s])
+                        warm_ms = statistics.median([s for s in warm if s])
+                        speedup = f"{cold_ms / warm_ms:6.1f}x"
+                    print(f"{style:<11} {engine:<9} {build:>12} {median_ms(cold):>11} "
+                          f"{median_ms(warm) if fmt else '-':>11}  {speedup}")
+        print(cache.stats())
+    finally:
+        shutil.rmtree(format_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
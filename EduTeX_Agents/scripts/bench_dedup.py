@@ -0,0 +1,99 @@
+"""
+Benchmark: near-duplicate detection (core/near_dup.py) on a synthetic bank.
+
+Builds N exercises from combined phrase templates with random
+coefficients, plus a share of near-duplicates (re-spaced, \\dfrac <->
+\\frac, \\left/\\right, one number changed), then reports:
+- signature time per exercise,
+- single lookup latency against the full index,
+- batch dedup throughput and how many injected duplicates were found.
+
+Usage: python scripts/bench_dedup.py [--size 100000] [--dup-rate 0.1]
+                                     [--threshold 0.8]
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(PROJECT_ROOT)
+
+from core.near_dup import HAS_NUMPY, LSHIndex, find_near_duplicates, signature
+
+OPENINGS = ["Δίνεται η συνάρτηση", "Θεωρούμε τη συνάρτηση", "Έστω η συνάρτηση", "Let", "Consider the function",
+            "Για τη συνάρτηση", "Η συνάρτηση", "Given"]
+FUNCTIONS = ["f(x) = {a}x^{{{b}}} + {c}x - {d}", "f(x)=\\frac{{{a}x+{b}}}{{x-{c}}}", "f(x) = \\ln({a}x + {b}) - {c}x",
+             "f(x) = {a}e^{{{b}x}} - {c}", "f(x) = \\sqrt{{{a}x^2 + {b}}}", "f(x) = {a}\\sin({b}x) + {c}\\cos x",
+             "f(x) = \\frac{{x^2 - {a}}}{{x^2 + {b}}}", "f(x) = |{a}x - {b}| + {c}"]
+TASKS = ["να βρείτε την παράγωγο", "να μελετήσετε τη μονοτονία", "να βρείτε τα ακρότατα",
+         "να βρείτε τις ασύμπτωτες", "να υπολογίσετε το όριο στο $+\\infty$", "να βρείτε το σύνολο τιμών",
+         "find the tangent line at $x_0 = {d}$", "να αποδείξετε ότι η εξίσωση $f(x) = {d}$ έχει μοναδική ρίζα",
+         "να υπολογίσετε το εμβαδόν του χωρίου που ορίζεται από τη $C_f$ και τον άξονα $x'x$ στο $[{e}, {g}]$",
+         "να βρείτε τα διαστήματα κυρτότητας και τα σημεία καμπής"]
+
+
+def make_exercise(rng):
+    tasks = rng.sample(TASKS, 2)
+    template = f"{rng.choice(OPENINGS)} ${rng.choice(FUNCTIONS)}$. (α) {tasks[0]}. (β) {tasks[1]}."
+    values = {k: rng.randint(2, 99) for k in "abcdeg"}
+    return template.format(**values)
+
+
+def perturb(latex, rng):
+    """A near-duplicate: cosmetic LaTeX changes plus one changed number."""
+    text = latex.replace("\\frac", "\\dfrac").replace("(", "\\left(").replace(")", "\\right)")
+    text = text.replace(" = ", "=").replace("$", "$ ", 1)
+    digits = [i for i, ch in enumerate(text) if ch.isdigit()]
+    if digits:
+        i = rng.choice(digits)
+        text = text[:i] + str((int(text[i]) + 1) % 10) + text[i + 1:]
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    items, injected = [], set()
+    for i in range(args.size):
+        if items and rng.random() < args.dup_rate:
+            items.append(perturb(items[rng.randrange(len(items))], rng))
+            injected.add(i)
+        else:
+            items.append(make_exercise(rng))
+    print(f"{args.size} exercises, {len(injected)} injected near-duplicates, numpy={HAS_NUMPY}")
+
+    start = time.perf_counter()
+    signatures = [signature(latex) for latex in items]
+    elapsed = time.perf_counter() - start
+    print(f"signature:     {elapsed / args.size * 1e6:8.1f} us / exercise")
+
+    index = LSHIndex(threshold=args.threshold)
+    for i, sig in enumerate(signatures):
+        index.add(i, sig)
+    probes = [rng.randrange(args.size) for _ in range(1000)]
+    start = time.perf_counter()
+    for i in probes:
+        index.query(signature(items[i]), exclude=i)
+    elapsed = time.perf_counter() - start
+    print(f"single check:  {elapsed / len(probes) * 1e6:8.1f} us (signature + lookup, {len(index)} indexed)")
+
+    start = time.perf_counter()
+    duplicates = find_near_duplicates(enumerate(signatures), args.threshold)
+    elapsed = time.perf_counter() - start
+    found = {d["key"] for d in duplicates}
+    print(f"batch dedup:   {elapsed:8.2f} s ({args.size / elapsed:,.0f} exercises/s from stored signatures)")
+    print(f"flagged {len(found)}: {len(found & injected)} of {len(injected)} injected, "
+          f"{len(found - injected)} others (near-identical random draws)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: /api/orchestrate prompt classification on short and long prompts.
+
+Compares:
+- legacy: lowercase + any(kw in prompt) over two short keyword lists
+  (domain only, first hit wins, case/accent sensitive),
+- naive ranked: the same scoring as api/intent.py done with one substring
+  count per keyword,
+- compiled: api/intent.classify, one regex pass over the normalized prompt.
+
+Usage: python scripts/bench_orchestrate.py [--repeat 200]
+"""
+import sys
+import os
+import time
+import argparse
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(PROJECT_ROOT)
+
+from api.intent import KEYWORDS, classify, normalize
+
+EDUCATION_KW = ["άσκηση", "φυλλάδιο", "διαγώνισμα", "τεστ", "λύση",
+                "πανελλήνιες", "παραλλαγή", "rubric", "βαθμολογία",
+                "θεωρία", "mindmap", "υπόδειξη", "hints", "λάθη",
+                "προαπαιτούμενα", "μέθοδοι", "exercise", "exam"]
+DOCUMENT_KW = ["έγγραφο", "article", "report", "σχήμα", "γράφημα",
+               "TikZ", "πίνακας", "table", "παρουσίαση", "slides",
+               "cv", "βιογραφικό", "επιστολή", "bibliography",
+               "template", "fix", "document"]
+
+
+def legacy_classify(prompt):
+    prompt = prompt.lower()
+    if any(kw in prompt for kw in EDUCATION_KW):
+        return "EDUCATION"
+    if any(kw in prompt for kw in DOCUMENT_KW):
+        return "DOCUMENTS"
+    return "unknown"
+
+
+_NORMALIZED = [(normalize(w), agent, domain, weight) for w, agent, domain, weight in KEYWORDS]
+
+
+def naive_ranked_classify(prompt):
+    text = " " + normalize(prompt)
+    scores = {}
+    for word, agent, domain, weight in _NORMALIZED:
+        hits = text.count(" " + word)  # word-start approximation
+        if hits:
+            scores[agent or domain] = scores.get(agent or domain, 0.0) + hits * weight
+    return scores
+
+
+FILLER = ("Θέλω να ετοιμάσω υλικό για τους μαθητές της Γ' Λυκείου πάνω στις συναρτήσεις, "
+          "με έμφαση στη μονοτονία και στα ακρότατα, ώστε να επαναλάβουν πριν τις εξετάσεις. ")
+
+PROMPTS = {
+    "short / match": "Φτιάξε 5 ασκήσεις για όρια",
+    "short / none": "Καλημέρα, τι μπορείς να κάνεις;",
+    "long / match at end": FILLER * 40 + "Στο τέλος φτιάξε ένα σχήμα TikZ.",
+    "long / none": FILLER * 40,
+}
+
+
+def _time(fn, prompt, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(prompt)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{len(KEYWORDS)} compiled keywords vs {len(EDUCATION_KW) + len(DOCUMENT_KW)} legacy keywords\n")
+    print(f"{'prompt':<22} {'chars':>6} {'legacy us':>10} {'naive us':>9} {'compiled us':>12}  "
+          "legacy -> compiled domain")
+    for label, prompt in PROMPTS.items():
+        legacy_us = _time(legacy_classify, prompt, args.repeat)
+        naive_us = _time(naive_ranked_classify, prompt, args.repeat)
+        compiled_us = _time(classify, prompt, args.repeat)
+        result = classify(prompt)
+        print(f"{label:<22} {len(prompt):>6} {legacy_us:>10.1f} {naive_us:>9.1f} {compiled_us:>12.1f}  "
+              f"{legacy_classify(prompt)} -> {result['domain']} {result['agents'][:2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: JSON serialization time and bytes on the wire per endpoint.
+
+Compares FastAPI's default JSONResponse against FastJSONResponse (orjson),
+and identity vs gzip vs brotli encodings, on representative payloads.
+
+Usage: python scripts/bench_serialization.py [--repeat 200]
+"""
+import sys
+import os
+import time
+import argparse
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(PROJECT_ROOT)
+
+from fastapi.responses import JSONResponse  # type: ignore
+
+from api.serialization import FastJSONResponse, HAS_ORJSON
+from api.compression import compress_body, HAS_BROTLI
+from core.template_registry import TemplateRegistry
+
+
+def _exercise(i):
+    latex = (
+        f"\\askhsh Δίνεται η συνάρτηση $f(x) = {i}x^2 - {i + 3}x + {i + 1}$.\n"
+        "\\begin{alist}\n"
+        "\\item Να βρείτε το πεδίο ορισμού και τα σημεία τομής με τους άξονες.\n"
+        "\\item Να μελετήσετε τη μονοτονία και τα ακρότατα της $f$.\n"
+        "\\item Να λύσετε την ανίσωση $f(x) \\geq 0$.\n"
+        "\\end{alist}\n"
+    )
+    solution = "\\lysh\n" + "\n".join(
+        f"\\textbf{{Βήμα {step}.}} Έχουμε $\\Delta = \\beta^2 - 4\\alpha\\gamma = {step * i}$, "
+        f"άρα $x_{{1,2}} = \\frac{{-\\beta \\pm \\sqrt{{\\Delta}}}}{{2\\alpha}}$."
+        for step in range(1, 9)
+    )
+    return latex, solution
+
+
+def build_payloads():
+    registry = TemplateRegistry()
+    exercises = [_exercise(i) for i in range(1, 11)]
+
+    exam = {
+        "id": "bench-exam",
+        "title": "Exam: Quadratic Functions",
+        "subject": "Mathematics",
+        "gradeLevel": "Β Λυκείου",
+        "durationMinutes": 150,
+        "difficulty": 60,
+        "questions": [
+            {"id": f"q{i}", "content": latex, "solution": sol, "difficulty": "Medium",
+             "points": 10, "type": "Algebra", "tags": ["quadratic", "functions"]}
+            for i, (latex, sol) in enumerate(exercises)
+        ],
+        "createdAt": "2026-01-01T00:00:00",
+        "calibration": {"total": 10, "distribution": {"easy": 3, "medium": 5, "hard": 2},
+                        "analysis": "Balanced."},
+        "rubric": None,
+    }
+
+    body = "\\askhseis\n\n" + "\n\n".join(
+        f"\\paragraph{{Θέμα {i + 1}}}\n{latex}\n{sol}" for i, (latex, sol) in enumerate(exercises)
+    )
+    document = {
+        "latex": registry.get_document_custom(content=body, title="Συναρτήσεις"),
+        "type": "article",
+        "metadata": {"title": "Συναρτήσεις", "generator": "AI"},
+    }
+
+    table = {
+        "latex": "\\begin{tabular}{|c|c|}\n\\hline\nx & f(x) \\\\\n\\hline\n\\end{tabular}",
+        "type": "table",
+        "metadata": {"style": "booktabs", "rows": 1},
+    }
+
+    return {
+        "/api/generate-exam": exam,
+        "/api/build-document": document,
+        "/api/format-table": table,
+    }
+
+
+def time_render(response_class, content, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = response_class(content).body
+    elapsed = (time.perf_counter() - start) / repeat
+    return body, elapsed * 1e6
+
+
+def run(repeat):
+    print(f"orjson: {'yes' if HAS_ORJSON else 'no (stdlib fallback)'} | brotli: {'yes' if HAS_BROTLI else 'no'}\n")
+    header = f"{'Endpoint':<22} {'json µs':>9} {'fast µs':>9} {'speedup':>8} {'identity B':>11} {'gzip B':>8} {'br B':>8} {'gzip µs':>8} {'br µs':>8}"
+    print(header)
+    print("-" * len(header))
+
+    for endpoint, content in build_payloads().items():
+        body, json_us = time_render(JSONResponse, content, repeat)
+        _, fast_us = time_render(FastJSONResponse, content, repeat)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            gz = compress_body(body, "gzip")
+        gzip_us = (time.perf_counter() - start) / repeat * 1e6
+
+        br_size, br_us = "-", "-"
+        if HAS_BROTLI:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                br = compress_body(body, "br")
+            br_us = f"{(time.perf_counter() - start) / repeat * 1e6:.0f}"
+            br_size = str(len(br))
+
+        print(f"{endpoint:<22} {json_us:>9.1f} {fast_us:>9.1f} {json_us / fast_us:>7.1f}x "
+              f"{len(body):>11} {len(gz):>8} {br_size:>8} {gzip_us:>8.0f} {br_us:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serialization / compression benchmark")
+    parser.add_argument("--repeat", type=int, default=200, help="Iterations per measurement")
+    args = parser.parse_args()
+    run(args.repeat)
@@ -0,0 +1,101 @@
+"""
+Benchmark: API cold start (-X importtime) and lazy agent first-use cost.
+
+Runs 'import api.main' in a fresh interpreter with -X importtime, reports
+the wall time, the slowest imports and which heavy modules were pulled in,
+then measures what each agent costs on first use (warmup).
+
+Usage: python scripts/bench_startup.py [--top 15]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+
+HEAVY_MODULES = ["sympy", "openai", "google.genai", "numpy", "agents.education", "agents.documents"]
+
+
+def _run(code, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", code]
+    env = dict(os.environ, LLM_PROVIDER="mock", AGENT_WARMUP="")
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    return proc, time.perf_counter() - start
+
+
+def parse_importtime(stderr):
+    """Returns [(cumulative_us, self_us, module)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, rest = line.split(":", 1)
+            self_us, cumulative_us, name = [part.strip() for part in rest.split("|")]
+            rows.append((int(cumulative_us), int(self_us), name))
+        except ValueError:
+            continue
+    return rows
+
+
+def report_cold_start(top):
+    proc, wall = _run("import api.main", importtime=True)
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        sys.exit(1)
+    rows = parse_importtime(proc.stderr)
+    imported = {name.strip() for _, _, name in rows}
+
+    print(f"Cold start: 'import api.main' wall time {wall * 1000:.0f} ms "
+          f"(interpreter included), {len(rows)} modules imported\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    print("\nHeavy modules at startup:")
+    for mod in HEAVY_MODULES:
+        loaded = any(name == mod or name.startswith(mod + ".") for name in imported)
+        print(f"  {mod:<20} {'IMPORTED' if loaded else 'not imported'}")
+
+
+def report_first_use():
+    code = (
+        "import json, time\n"
+        "t = time.perf_counter()\n"
+        "import api.main\n"
+        "from api.agent_loader import warmup\n"
+        "startup = time.perf_counter() - t\n"
+        "report = warmup()\n"
+        "print(json.dumps({'startup_ms': startup * 1000, 'agents': report}))\n"
+    )
+    proc, _ = _run(code)
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        return
+    data = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(f"\nIn-process import api.main: {data['startup_ms']:.0f} ms")
+    print("First-use cost per agent (in warmup order, shared deps counted once):")
+    total = 0.0
+    for name, info in data["agents"].items():
+        if "ms" in info:
+            total += info["ms"]
+            print(f"  {name:<22} {info['ms']:>8.1f} ms")
+        else:
+            print(f"  {name:<22} ERROR {info['error']}")
+    print(f"  {'total (eager cost)':<22} {total:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API startup benchmark")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    args = parser.parse_args()
+    report_cold_start(args.top)
+    report_first_use()
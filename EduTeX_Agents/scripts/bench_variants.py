@@ -0,0 +1,60 @@
+"""
+Benchmark: Group A/B variant sheets with the parametric variant engine
+(skills/clean_numbers/scripts/variants.py), no LLM calls.
+
+For every exercise of a sample sheet, builds one variant per student for
+group A (seed 0) and group B (seed 1) and reports cold (first parse and
+symbolic solve) and warm timings.
+
+Usage: python scripts/bench_variants.py [--students 30]
+"""
+import sys
+import os
+import time
+import argparse
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(PROJECT_ROOT)
+
+from skills.clean_numbers.scripts.variants import make_variants, parse_template
+
+SHEET = [
+    "Να λύσετε την εξίσωση $x^2 - 5x + 6 = 0$.",
+    "Δίνεται η συνάρτηση $f(x) = 2x^2 - 3x + 1$. Να βρείτε τις ρίζες της.",
+    "Να λύσετε την εξίσωση $\\frac{3x - 4}{2} = 5 - x$.",
+    "Να λύσετε την εξίσωση $x^3 - 6x^2 + 11x - 6 = 0$.",
+    "Να λύσετε την εξίσωση $2x^2 = 18$.",
+    "Να υπολογίσετε το όριο $\\lim_{x\\to 2} \\frac{x^2-4}{x-2}$.",
+]
+
+
+def build_sheets(students):
+    groups = {}
+    for seed, group in enumerate("AB"):
+        groups[group] = [make_variants({"latex": latex}, students, seed=seed) for latex in SHEET]
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=30)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    groups = build_sheets(args.students)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    build_sheets(args.students)
+    warm = time.perf_counter() - start
+
+    print(f"{len(SHEET)} exercises x {args.students} students x 2 groups")
+    for i, latex in enumerate(SHEET):
+        counts = [len(groups[g][i]) if groups[g][i] is not None else None for g in "AB"]
+        label = "LLM fallback (not parametrisable)" if counts[0] is None else f"A={counts[0]} B={counts[1]} variants"
+        print(f"  Q{i + 1}: {label:<36} {latex[:50]}")
+    print(f"cold: {cold * 1000:.0f} ms   warm: {warm * 1000:.0f} ms   (templates cached: {parse_template.cache_info().currsize})")
+
+
+if __name__ == "__main__":
+    main()
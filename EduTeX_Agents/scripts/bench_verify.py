@@ -0,0 +1,69 @@
+"""
+Benchmark: clean-number verification, one by one vs verify_batch.
+
+Builds N quadratic / linear equations with random coefficients (plus a
+share of re-spaced repeats, as in a bank with recycled exercises) and
+reports expressions per second for:
+- serial: verify_expression in a loop (stdout suppressed),
+- batch: verify_batch with a cold and then a warm worker pool.
+
+Usage: python scripts/bench_verify.py [--size 400] [--workers N] [--dup-rate 0.2]
+"""
+import sys
+import os
+import io
+import time
+import random
+import argparse
+import contextlib
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(PROJECT_ROOT)
+
+from skills.clean_numbers.scripts.verify import shutdown_pool, verify_batch, verify_expression
+
+
+def make_corpus(size, dup_rate, rng):
+    corpus = []
+    for _ in range(size):
+        if corpus and rng.random() < dup_rate:
+            corpus.append(rng.choice(corpus).replace(" ", ""))
+        elif rng.random() < 0.8:
+            a, b, c = rng.randint(1, 6), rng.randint(-20, 20), rng.randint(-30, 30)
+            corpus.append(f"{a}x^2 + ({b})x + ({c}) = 0")
+        else:
+            a, b = rng.randint(2, 9), rng.randint(-40, 40)
+            corpus.append(f"{a}x + ({b}) = {rng.randint(-9, 9)}")
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dup-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.size, args.dup_rate, random.Random(args.seed))
+    print(f"{len(corpus)} expressions, cpus={os.cpu_count()}")
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial_passed = sum(verify_expression(e)[0] for e in corpus)
+    elapsed = time.perf_counter() - start
+    print(f"serial:      {len(corpus) / elapsed:8.1f} expr/s ({serial_passed} passed)")
+
+    for label in ("batch cold", "batch warm"):
+        report = verify_batch(corpus, workers=args.workers)
+        elapsed = report["elapsed_ms"] / 1000
+        per_item = sorted(r["ms"] for r in report["results"] if r["duplicate_of"] is None)
+        print(f"{label}:  {len(corpus) / elapsed:8.1f} expr/s ({report['passed']} passed, "
+              f"{report['unique']} unique, {report['workers']} workers, "
+              f"median {per_item[len(per_item) // 2]:.1f} ms / solve)")
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: API throughput with 1 vs N uvicorn worker processes.
+
+Starts the API (LLM_PROVIDER=mock, STATE_BACKEND=sqlite) once per worker
+count, replays a workload from concurrent client threads and reports
+throughput and p50/p95 latency.
+
+Workload: JSONL file with {"method": "POST", "path": "/api/...", "body": {...}}
+per line, or the built-in mix below.
+
+Usage: python scripts/bench_workers.py [--workers 1,4] [--requests 400]
+                                       [--clients 16] [--workload file.jsonl]
+"""
+import sys
+import os
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import threading
+import urllib.request
+import urllib.error
+
+# Add project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+
+BUILTIN_WORKLOAD = [
+    {"method": "GET", "path": "/api/agents"},
+    {"method": "POST", "path": "/api/generate-mindmap", "body": {"topic": "Παράγωγοι"}},
+    {"method": "POST", "path": "/api/check-prerequisites", "body": {"topic": "Ολοκληρώματα"}},
+    {"method": "POST", "path": "/api/format-table",
+     "body": {"headers": ["x", "f(x)"], "data": [["0", "1"], ["1", "2"], ["2", "5"]]}},
+    {"method": "POST", "path": "/api/generate-exercises", "body": {"topic": "Όρια", "count": 2}},
+]
+
+
+def load_workload(path):
+    if not path:
+        return BUILTIN_WORKLOAD
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, port, state_path):
+    env = dict(os.environ, LLM_PROVIDER="mock", STATE_BACKEND="sqlite", SHARED_STATE_PATH=state_path,
+               AGENT_WARMUP="all", ADMISSION_ENABLED="0", TRACE_EXPORT_PATH="")
+    cmd = [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1",
+           "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+            return proc
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"Server with {workers} worker(s) did not start")
+
+
+def _send(base, item):
+    data = json.dumps(item["body"]).encode("utf-8") if "body" in item else None
+    req = urllib.request.Request(base + item["path"], data=data, method=item.get("method", "POST"),
+                                 headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            resp.read()
+            ok = resp.status < 400
+    except urllib.error.HTTPError as e:
+        e.read()
+        ok = False
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def replay(base, workload, total, clients):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            elapsed, ok = _send(base, workload[i % len(workload)])
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, sorted(latencies), errors[0]
+
+
+def _percentile(values, p):
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=f"1,{min(4, os.cpu_count() or 1)}")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--workload", default="")
+    args = parser.parse_args()
+
+    workload = load_workload(args.workload)
+    print(f"{len(workload)} request kinds, {args.requests} requests, {args.clients} clients\n")
+    print(f"{'workers':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        port = _free_port()
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = start_server(workers, port, os.path.join(tmp, "state.sqlite3"))
+            try:
+                base = f"http://127.0.0.1:{port}"
+                replay(base, workload, min(len(workload) * 2, args.requests), args.clients)  # warm up
+                wall, latencies, errors = replay(base, workload, args.requests, args.clients)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+        print(f"{workers:>8} {len(latencies) / wall:>9.1f} {_percentile(latencies, 50) * 1000:>9.1f} "
+              f"{_percentile(latencies, 95) * 1000:>9.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
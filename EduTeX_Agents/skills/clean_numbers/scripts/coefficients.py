@@ -0,0 +1,282 @@
+"""
+Vectorized clean-coefficient search.
+
+Instead of guessing coefficients and running SymPy solve per candidate,
+each family evaluates a whole grid (or a large random batch) of
+coefficients with NumPy integer arithmetic and keeps the sets whose
+solutions are clean in the sense of is_clean_number:
+- integers, or fractions with denominator < 20,
+- standard irrationals: ±sqrt(p/q) with q < 20,
+- standard angles for trigonometric equations.
+
+Every family returns {"family", "columns", "params", "solutions", ...}
+with one row per valid parameter set; as_records() turns rows into exact
+LaTeX answers for prompts and exercise metadata.
+
+Requires NumPy (optional dependency, see requirements.txt).
+"""
+import argparse
+from fractions import Fraction
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+MAX_DENOMINATOR = 20  # clean fractions have a denominator below this
+
+# Squares of the standard values: sin/cos of 0, 30, 45, 60, 90 degrees; tan of 0, 30, 45, 60
+_TRIG_SQUARES = {
+    "sin": [(0, 1), (1, 4), (1, 2), (3, 4), (1, 1)],
+    "cos": [(0, 1), (1, 4), (1, 2), (3, 4), (1, 1)],
+    "tan": [(0, 1), (1, 3), (1, 1), (3, 1)],
+}
+_TRIG_FUNCS = ("sin", "cos", "tan")
+
+
+def _require_numpy():
+    if not HAS_NUMPY:
+        raise ImportError("numpy is required for the vectorized coefficient search (pip install numpy)")
+
+
+def _grid(*ranges: Tuple[int, int]):
+    """Columns of the full integer grid over inclusive ranges."""
+    axes = [np.arange(low, high + 1, dtype=np.int64) for low, high in ranges]
+    return [g.ravel() for g in np.meshgrid(*axes, indexing="ij")]
+
+
+def _reduce(num, den):
+    """Fraction num/den in lowest terms with a positive denominator."""
+    g = np.gcd(num, den)
+    g[g == 0] = 1
+    num, den = num // g, den // g
+    sign = np.where(den < 0, -1, 1)
+    return num * sign, den * sign
+
+
+def _take(result: Dict[str, Any], limit: Optional[int], seed: Optional[int]) -> Dict[str, Any]:
+    """Optionally shuffles (seed) and truncates every row-aligned array."""
+    n = len(result["params"])
+    order = np.random.default_rng(seed).permutation(n) if seed is not None else np.arange(n)
+    if limit is not None:
+        order = order[:limit]
+    return {k: (v[order] if isinstance(v, np.ndarray) and len(v) == n else v) for k, v in result.items()}
+
+
+def quadratics(
+    a_range: Tuple[int, int] = (1, 9),
+    b_range: Tuple[int, int] = (-30, 30),
+    c_range: Tuple[int, int] = (-50, 50),
+    roots: str = "integer",
+    distinct: bool = True,
+    primitive: bool = True,
+    limit: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    a x^2 + b x + c = 0 with clean roots. 'roots': "integer", "rational"
+    (denominator < 20), "irrational" (±sqrt(p/q), i.e. b = 0) or "clean"
+    (any of these). 'primitive' drops multiples such as 2x^2 - 10x + 12.
+    """
+    _require_numpy()
+    a, b, c = _grid(a_range, b_range, c_range)
+    a, b, c = a[a != 0], b[a != 0], c[a != 0]
+    disc = b * b - 4 * a * c
+    ok = disc > 0 if distinct else disc >= 0
+    if primitive:
+        ok &= np.gcd(np.gcd(a, b), c) == 1
+    a, b, c, disc = a[ok], b[ok], c[ok], disc[ok]
+
+    s = np.rint(np.sqrt(disc.astype(np.float64))).astype(np.int64)
+    square = s * s == disc
+    n1, d1 = _reduce(-b - s, 2 * a)
+    n2, d2 = _reduce(-b + s, 2 * a)
+    rational = square & (d1 < MAX_DENOMINATOR) & (d2 < MAX_DENOMINATOR)
+    integer = square & (d1 == 1) & (d2 == 1)
+    # ±sqrt(-c/a) is clean when the reduced denominator of -c/a is small
+    rn, rd = _reduce(-c, a)
+    irrational = (b == 0) & ~square & (rd < MAX_DENOMINATOR)
+
+    keep = {"integer": integer, "rational": rational, "irrational": irrational,
+            "clean": rational | irrational}[roots]
+    params = np.stack([a, b, c], axis=1)[keep]
+    sq = np.sqrt(disc[keep].astype(np.float64))
+    solutions = np.stack([(-b[keep] - sq) / (2 * a[keep]), (-b[keep] + sq) / (2 * a[keep])], axis=1)
+    result = {
+        "family": "quadratic", "columns": ("a", "b", "c"), "params": params, "solutions": solutions,
+        "num": np.stack([n1, n2], axis=1)[keep], "den": np.stack([d1, d2], axis=1)[keep],
+        "radicand": np.stack([rn, rd], axis=1)[keep], "square": square[keep],
+    }
+    return _take(result, limit, seed)
+
+
+def linear_systems(
+    n: int = 2,
+    coef_range: Tuple[int, int] = (-9, 9),
+    rhs_range: Tuple[int, int] = (-30, 30),
+    solution: str = "integer",
+    max_solution: int = 10,
+    count: int = 1000,
+    batch: int = 200_000,
+    max_batches: int = 20,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    n x n systems A x = b (n = 2 or 3) with a unique clean solution:
+    "integer" or "rational" (denominators < 20), each |x_i| <= max_solution.
+    The coefficient space is too large to enumerate, so random batches are
+    filtered with Cramer's rule until 'count' systems are found.
+    """
+    _require_numpy()
+    if n not in (2, 3):
+        raise ValueError("n must be 2 or 3")
+    rng = np.random.default_rng(seed)
+    found_params, found_num, found_den = [], [], []
+    total = 0
+    for _ in range(max_batches):
+        A = rng.integers(coef_range[0], coef_range[1] + 1, size=(batch, n, n), dtype=np.int64)
+        rhs = rng.integers(rhs_range[0], rhs_range[1] + 1, size=(batch, n), dtype=np.int64)
+        det = np.rint(np.linalg.det(A.astype(np.float64))).astype(np.int64)
+        nonsingular = det != 0
+        A, rhs, det = A[nonsingular], rhs[nonsingular], det[nonsingular]
+
+        nums = []
+        for i in range(n):
+            Ai = A.copy()
+            Ai[:, :, i] = rhs
+            nums.append(np.rint(np.linalg.det(Ai.astype(np.float64))).astype(np.int64))
+        num, den = _reduce(np.stack(nums, axis=1), det[:, None].repeat(n, axis=1))
+        keep = (den == 1).all(axis=1) if solution == "integer" else (den < MAX_DENOMINATOR).all(axis=1)
+        keep &= (np.abs(num) <= max_solution * den).all(axis=1)
+
+        found_params.append(np.concatenate([A.reshape(len(A), n * n), rhs], axis=1)[keep])
+        found_num.append(num[keep])
+        found_den.append(den[keep])
+        total += int(keep.sum())
+        if total >= count:
+            break
+
+    params = np.concatenate(found_params)[:count]
+    num = np.concatenate(found_num)[:count]
+    den = np.concatenate(found_den)[:count]
+    columns = tuple(f"a{r + 1}{c + 1}" for r in range(n) for c in range(n)) + tuple(f"b{r + 1}" for r in range(n))
+    return {"family": f"linear_system_{n}x{n}", "columns": columns, "params": params,
+            "solutions": num / den, "num": num, "den": den}
+
+
+def rational_equations(
+    coef_range: Tuple[int, int] = (-6, 6),
+    solution: str = "integer",
+    max_solution: int = 10,
+    limit: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    (a x + b) / (c x + d) = e with c != 0 and a unique clean solution
+    x = (e d - b) / (a - e c) (|x| <= max_solution), which never zeroes
+    the denominator when a d - b c != 0.
+    """
+    _require_numpy()
+    low, high = coef_range
+    a, b, c, d, e = _grid((low, high), (low, high), (low, high), (low, high), (low, high))
+    ok = (c != 0) & (a * d - b * c != 0) & (a - e * c != 0)
+    a, b, c, d, e = a[ok], b[ok], c[ok], d[ok], e[ok]
+    num, den = _reduce(e * d - b, a - e * c)
+    keep = den == 1 if solution == "integer" else den < MAX_DENOMINATOR
+    keep &= np.abs(num) <= max_solution * den
+    result = {
+        "family": "rational_equation", "columns": ("a", "b", "c", "d", "e"),
+        "params": np.stack([a, b, c, d, e], axis=1)[keep],
+        "solutions": (num / den)[keep][:, None], "num": num[keep][:, None], "den": den[keep][:, None],
+    }
+    return _take(result, limit, seed)
+
+
+def trig_equations(
+    a_range: Tuple[int, int] = (1, 9),
+    b_range: Tuple[int, int] = (-9, 9),
+    radicals: Sequence[int] = (1, 2, 3),
+    funcs: Sequence[str] = _TRIG_FUNCS,
+    primitive: bool = True,
+    limit: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    a·f(x) = b·sqrt(k) with f in sin/cos/tan whose value b·sqrt(k)/a is a
+    standard value (so x is a standard angle). Solutions are the principal
+    angles in degrees.
+    """
+    _require_numpy()
+    rows, angles = [], []
+    for f in funcs:
+        a, b, k = _grid(a_range, b_range, (0, len(radicals) - 1))
+        k = np.asarray(radicals, dtype=np.int64)[k]
+        ok = np.ones(len(a), dtype=bool)
+        if primitive:
+            ok &= (np.gcd(a, b) == 1) & ((k == 1) | (b != 0))
+        # (b sqrt(k) / a)^2 = p / q  <=>  b^2 k q = p a^2
+        standard = np.zeros(len(a), dtype=bool)
+        for p, q in _TRIG_SQUARES[f]:
+            standard |= b * b * k * q == p * a * a
+        keep = ok & standard
+        value = b[keep] * np.sqrt(k[keep].astype(np.float64)) / a[keep]
+        inverse = {"sin": np.arcsin, "cos": np.arccos, "tan": np.arctan}[f]
+        angles.append(np.rint(np.degrees(inverse(np.clip(value, -1, 1) if f != "tan" else value))))
+        rows.append(np.stack([np.full(keep.sum(), _TRIG_FUNCS.index(f)), a[keep], b[keep], k[keep]], axis=1))
+    result = {
+        "family": "trig_equation", "columns": ("func", "a", "b", "k"),
+        "params": np.concatenate(rows), "solutions": np.concatenate(angles)[:, None],
+    }
+    return _take(result, limit, seed)
+
+
+FAMILIES = {
+    "quadratic": quadratics,
+    "linear2": lambda **kw: linear_systems(n=2, **kw),
+    "linear3": lambda **kw: linear_systems(n=3, **kw),
+    "rational": rational_equations,
+    "trig": trig_equations,
+}
+
+
+def _fraction_latex(num: int, den: int) -> str:
+    value = Fraction(int(num), int(den))
+    if value.denominator == 1:
+        return str(value.numerator)
+    sign = "-" if value < 0 else ""
+    return f"{sign}\\frac{{{abs(value.numerator)}}}{{{value.denominator}}}"
+
+
+def as_records(result: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Rows as {"params": {column: value}, "answers": [LaTeX]} with exact answers."""
+    records = []
+    n = len(result["params"]) if limit is None else min(limit, len(result["params"]))
+    for i in range(n):
+        params = {col: int(v) for col, v in zip(result["columns"], result["params"][i])}
+        if result["family"] == "trig_equation":
+            params["func"] = _TRIG_FUNCS[params["func"]]
+            answers = [f"{int(result['solutions'][i][0])}^\\circ"]
+        elif result["family"] == "quadratic" and not result["square"][i]:
+            p, q = result["radicand"][i]
+            root = f"\\sqrt{{{_fraction_latex(p, q)}}}"
+            answers = [f"-{root}", root]
+        else:
+            answers = [_fraction_latex(nu, de) for nu, de in zip(result["num"][i], result["den"][i])]
+        records.append({"params": params, "answers": answers})
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List coefficient sets with clean solutions.")
+    parser.add_argument("family", choices=sorted(FAMILIES))
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None, help="Shuffle the results")
+    args = parser.parse_args()
+
+    found = FAMILIES[args.family](seed=args.seed) if args.family.startswith("linear") \
+        else FAMILIES[args.family](limit=None, seed=args.seed)
+    print(f"{len(found['params'])} clean {found['family']} parameter sets")
+    for record in as_records(found, args.limit):
+        print(record)
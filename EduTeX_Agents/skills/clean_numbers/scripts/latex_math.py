@@ -0,0 +1,203 @@
+"""
+LaTeX math -> SymPy, for checking the exercises the LLM writes.
+
+iter_math finds the math segments of an exercise ($...$, $$...$$, \\(...\\),
+\\[...\\] and equation/align environments), skipping the Greek (or any)
+prose around them. latex_to_text rewrites one segment into SymPy input:
+fractions (\\frac, \\dfrac, \\tfrac, \\frac12), roots (\\sqrt, \\sqrt[n]),
+\\cdot / \\times / \\div, powers and subscripts, |...|, Greek letters, the
+usual functions and degrees; anything else gives None instead of a guess.
+\\ln is the natural logarithm, \\log the decimal one (as in the Greek
+curriculum) and \\log_b x / \\log_{b}(...) the base-b one.
+parse_latex_math parses it with implicit multiplication ("2x", "3\\sin x")
+and e read as Euler's number.
+
+Both steps are cached per segment, so checking every generated exercise
+costs one parse per distinct equation.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sympy import E, Lambda, Symbol, log, pi
+from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+
+_TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application,)
+
+MATH = re.compile(
+    r"(?<!\\)\$\$(.+?)\$\$|(?<!\\)\$(.+?)\$|\\\((.+?)\\\)|\\\[(.+?)\\\]"
+    r"|\\begin\{(?:equation|align|gather|multline)\*?\}(.+?)\\end\{(?:equation|align|gather|multline)\*?\}",
+    re.S,
+)
+
+_GREEK = (
+    "alpha beta gamma delta epsilon varepsilon zeta eta theta vartheta iota kappa mu nu xi rho sigma tau "
+    "upsilon phi varphi chi psi omega Gamma Delta Theta Lambda Xi Sigma Phi Psi Omega"
+).split()
+_FUNCTIONS = {
+    "sin": "sin", "cos": "cos", "tan": "tan", "cot": "cot", "sec": "sec", "csc": "csc",
+    "arcsin": "asin", "arccos": "acos", "arctan": "atan", "sinh": "sinh", "cosh": "cosh", "tanh": "tanh",
+    "ln": "log", "log": "log10", "exp": "exp",
+}
+_SYMBOLS = {"cdot": "*", "times": "*", "div": "/", "pi": "pi", "lambda": "lamda", "infty": "oo",
+            "varepsilon": "epsilon", "varphi": "phi", "vartheta": "theta"}
+_SYMBOLS.update({name: name for name in _GREEK if name not in _SYMBOLS})
+_SYMBOLS.update(_FUNCTIONS)
+# Greek letters are symbols even where SymPy has a function of that name (beta, gamma, zeta...)
+_LOCALS = {_SYMBOLS[name]: Symbol(_SYMBOLS[name]) for name in _GREEK + ["lambda"]}
+_LOCALS.update({"e": E, "pi": pi, "log10": Lambda(Symbol("t"), log(Symbol("t"), 10))})
+_UNICODE = {"π": " pi ", "·": "*", "×": "*", "÷": "/", "−": "-", "–": "-", "°": "*pi/180", "√": "\\sqrt "}
+
+_NOISE = re.compile(
+    r"\\(?:left|right|big|Big|bigg|Bigg|displaystyle|textstyle)\b|\\[,;:! ]|\\(?:quad|qquad)\b|~|&|\\\\"
+)
+_TEXT = re.compile(r"\\(?:text|textrm|textit|mbox|mathrm|mathit)\{[^{}]*\}")
+_OPERATOR = re.compile(r"\\operatorname\{([a-zA-Z]+)\}")
+_DEGREES = re.compile(r"\^\{?\\circ\}?")
+_COMMAND = re.compile(r"\\([a-zA-Z]+)")
+_BARS = re.compile(r"\\[lr]vert\b|\\mid\b")
+_POWER = re.compile(r"\^\{([^{}]*)\}")
+_SUBSCRIPT = re.compile(r"_\{(\w+)\}")
+_FRAC = re.compile(r"\\[dt]?frac\{([^{}]*)\}\{([^{}]*)\}")
+_FRAC_SHORT = re.compile(r"\\[dt]?frac\s*(\d)\s*(\d)")
+_ROOT = re.compile(r"\\sqrt\[([^\[\]{}]*)\]\{([^{}]*)\}")
+_SQRT = re.compile(r"\\sqrt\{([^{}]*)\}")
+_SQRT_SHORT = re.compile(r"\\sqrt\s*(\d+|[a-zA-Z])")
+_GROUP = re.compile(r"(?<![a-zA-Z\]}])\{([^{}]*)\}")
+_ABS = re.compile(r"\|([^|]+)\|")
+_DEFINITION = re.compile(r"^\s*([a-zA-Z]\w*)\s*\(\s*[a-zA-Z]\w*\s*\)\s*$")
+# sqrt(x) = 3 or |x| = 3 is an equation, not the definition of a function
+_APPLIED = set(_FUNCTIONS.values()) | {"sqrt", "Abs"}
+# \log_2 x, \log_{10}(x+1), \log_3 27, \log_a{b}: the base, then one group, or one
+# token that ends the term (\log_2 8x and \log_2 x^2 are left unread)
+_LOG_BASE = re.compile(
+    r"\\log\s*_\s*(?:\{([^{}]+)\}|(\d+|[a-zA-Z]))\s*"
+    r"(?:\(([^()]*)\)|\{([^{}]*)\}|(\d+(?:\.\d+)?|[a-zA-Z]|\\[a-zA-Z]+)(?=\s*(?:[-+=)\],;.]|$)))"
+)
+_RELATIONS = re.compile(r"\\(?:le|leq|ge|geq|neq|ne|approx|equiv|in|to|rightarrow|Rightarrow|iff)\b|[<>≤≥≠]")
+
+
+class MathParse(NamedTuple):
+    """A parsed math segment. expr is lhs - rhs for equations, the body for f(x) = ..."""
+    math: str
+    text: str
+    kind: str  # "equation", "definition" or "expression"
+    expr: object
+    lhs: object
+    rhs: object
+
+    @property
+    def unknowns(self):
+        return self.expr.free_symbols
+
+
+def iter_math(latex: str) -> Iterator[Tuple[str, int]]:
+    """(segment, offset in latex) for every math segment, in order."""
+    for m in MATH.finditer(latex):
+        group = next(g for g in range(1, 6) if m.group(g) is not None)
+        yield m.group(group), m.start(group)
+
+
+def extract_math(latex: str) -> List[str]:
+    return [math for math, _ in iter_math(latex)]
+
+
+def _log_base(m: "re.Match") -> str:
+    base = m.group(1) or m.group(2)
+    argument = next(g for g in m.groups()[2:] if g is not None)
+    return f" log(({argument}), ({base})) "
+
+
+def _command(m: "re.Match") -> str:
+    name = m.group(1)
+    if name in ("frac", "dfrac", "tfrac", "sqrt"):
+        return m.group(0)
+    replacement = _SYMBOLS.get(name)
+    if replacement is None:
+        return m.group(0)
+    return f" {replacement} " if replacement.isalpha() else replacement
+
+
+@lru_cache(maxsize=4096)
+def latex_to_text(math: str) -> Optional[str]:
+    """
+    Plain SymPy input for a LaTeX math segment, or None when it uses
+    markup this converter does not know (it never guesses).
+    """
+    text = _TEXT.sub(" ", _NOISE.sub(" ", math))
+    text = _OPERATOR.sub(lambda m: f"\\{m.group(1)}", text)
+    text = _DEGREES.sub("*pi/180", text)
+    for char, replacement in _UNICODE.items():
+        text = text.replace(char, replacement)
+    text = _BARS.sub("|", text)
+    text = _LOG_BASE.sub(_log_base, text)
+    if re.search(r"\\log\s*_", text):
+        return None  # a base whose argument is neither one token nor one group
+    text = _COMMAND.sub(_command, text)
+    previous = None
+    while previous != text:
+        previous = text
+        text = _POWER.sub(r"**(\1)", text)
+        text = _SUBSCRIPT.sub(r"_\1", text)
+        text = _FRAC.sub(r"((\1)/(\2))", text)
+        text = _FRAC_SHORT.sub(r"((\1)/(\2))", text)
+        text = _ROOT.sub(r"((\2)**(1/(\1)))", text)
+        text = _SQRT.sub(r"sqrt(\1)", text)
+        text = _SQRT_SHORT.sub(r"sqrt(\1)", text)
+        text = _GROUP.sub(r"(\1)", text)
+        text = _ABS.sub(r"Abs(\1)", text)
+    if "\\" in text or "{" in text or "}" in text or "|" in text:
+        return None
+    text = text.replace("^", "**").strip().rstrip(".,;")
+    return text or None
+
+
+def parse_text(text: str, local_dict: Optional[Dict[str, Any]] = None):
+    """parse_expr with implicit multiplication, Greek symbols and e = E (local_dict adds names)."""
+    names = dict(_LOCALS)
+    if local_dict:
+        names.update(local_dict)
+    return parse_expr(text, local_dict=names, transformations=_TRANSFORMATIONS)
+
+
+@lru_cache(maxsize=4096)
+def parse_latex_math(math: str) -> Optional[MathParse]:
+    """
+    SymPy form of a math segment: an equation (one "="), a definition
+    (f(x) = body) or an expression. None for inequalities, chains such as
+    a = b = c, and anything latex_to_text or parse_expr cannot read.
+    """
+    if _RELATIONS.search(math):
+        return None
+    text = latex_to_text(math)
+    if text is None or text.count("=") > 1:
+        return None
+    try:
+        if "=" not in text:
+            expr = parse_text(text)
+            return MathParse(math, text, "expression", expr, expr, None)
+        lhs_text, rhs_text = text.split("=")
+        if not lhs_text.strip() or not rhs_text.strip():
+            return None
+        rhs = parse_text(rhs_text)
+        definition = _DEFINITION.match(lhs_text)
+        if definition and definition.group(1) not in _APPLIED:
+            return MathParse(math, text, "definition", rhs, None, rhs)
+        lhs = parse_text(lhs_text)
+        return MathParse(math, text, "equation", lhs - rhs, lhs, rhs)
+    except Exception:
+        return None
+
+
+def exercise_equations(latex: str) -> List[MathParse]:
+    """Equations in exactly one unknown found in an exercise, in order, without repeats."""
+    found, seen = [], set()
+    for math, _ in iter_math(latex):
+        parsed = parse_latex_math(math.strip())
+        if parsed is None or parsed.kind != "equation" or len(parsed.unknowns) != 1:
+            continue
+        if parsed.expr in seen:
+            continue
+        seen.add(parsed.expr)
+        found.append(parsed)
+    return found
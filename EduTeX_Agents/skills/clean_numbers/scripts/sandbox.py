@@ -0,0 +1,235 @@
+"""
+Resource-limited worker processes for SymPy work.
+
+A pathological equation can keep `solve`/`simplify` busy for minutes or
+grow memory without bound. SandboxPool runs such calls in long-lived child
+processes (the SymPy import is paid once per worker) with, per call:
+- a CPU-time budget (soft RLIMIT_CPU re-armed before each call; SIGXCPU
+  aborts the call and the worker stays usable),
+- an address-space limit (RLIMIT_AS; a MemoryError retires the worker),
+- a wall-clock timeout enforced by the parent (the worker is killed and
+  replaced, covering calls stuck outside the interpreter).
+
+Every call returns {"status", "value", "error", "ms"} with status one of
+"ok", "error", "timeout", "memory" or "crashed" instead of raising or
+hanging. RLIMITs need the `resource` module (Unix); elsewhere only the
+wall-clock timeout applies. State that lives in the workers (e.g. their
+caches) can be reported back with every result: see `stats` / `on_stats`.
+
+Workers start from a fresh interpreter (forkserver, or spawn where that is
+missing), never by forking the caller: the API forks would copy a process
+with running threads, and its whole address space, into the RLIMIT_AS
+budget. fn and stats must therefore be importable module-level functions.
+"""
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import resource  # type: ignore
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+DEFAULT_TIMEOUT = 10.0     # wall-clock seconds per call
+DEFAULT_CPU_SECONDS = 8    # CPU seconds per call
+DEFAULT_MEMORY_MB = 1024   # address space per worker
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class _CpuLimitExceeded(BaseException):
+    """BaseException so SymPy's broad `except Exception` blocks cannot swallow it."""
+    pass
+
+
+def _on_sigxcpu(signum, frame):
+    raise _CpuLimitExceeded()
+
+
+def _arm_cpu_limit(cpu_seconds: Optional[int]):
+    """Soft CPU limit = CPU used so far + budget (the hard limit is untouched)."""
+    if not HAS_RESOURCE:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds is None:
+        soft = hard
+    else:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, cpu_seconds: Optional[int], memory_mb: Optional[int], stats: Optional[Callable[[], Any]]):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if HAS_RESOURCE:
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+        if memory_mb:
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            limit = memory_mb * 1024 * 1024
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        fn, arg = task
+        retire = False
+        try:
+            _arm_cpu_limit(cpu_seconds)
+            reply = ("ok", fn(arg))
+        except _CpuLimitExceeded:
+            reply = ("timeout", f"CPU limit of {cpu_seconds}s exceeded")
+        except MemoryError:
+            reply, retire = ("memory", f"memory limit of {memory_mb} MB exceeded"), True
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        finally:
+            _arm_cpu_limit(None)
+        try:
+            report = stats() if stats is not None else None
+        except Exception:
+            report = None
+        try:
+            conn.send(reply + (report,))
+        except Exception as e:
+            conn.send(("error", f"Unpicklable result: {e}", report))
+        if retire:
+            return
+
+
+class _Worker:
+    def __init__(self, ctx, cpu_seconds: Optional[int], memory_mb: Optional[int],
+                 stats: Optional[Callable[[], Any]], on_exit: Optional[Callable[[int], None]]):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, cpu_seconds, memory_mb, stats), daemon=True)
+        self.process.start()
+        child.close()
+        self.pid = self.process.pid
+        self._on_exit = on_exit
+
+    def call(self, fn: Callable, arg: Any, timeout: Optional[float]):
+        """(status, value, stats report or None)."""
+        self.conn.send((fn, arg))
+        if not self.conn.poll(timeout):
+            self.kill()
+            return "timeout", f"no answer within {timeout}s", None
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            return "crashed", f"worker exited (code {self.process.exitcode})", None
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+        on_exit, self._on_exit = self._on_exit, None
+        if on_exit is not None:
+            on_exit(self.pid)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+
+class SandboxPool:
+    """
+    Fixed number of warm, resource-limited workers. Workers start on first
+    use and are replaced after a kill, a crash or a memory error.
+    Thread-safe: calls from several threads run on different workers.
+
+    stats (picklable, no arguments) runs in the worker after every call;
+    on_stats(pid, report) receives its result in the parent, and
+    on_stats(pid, None) once that worker has exited.
+    """
+    def __init__(self, workers: int = 1, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 cpu_seconds: Optional[int] = DEFAULT_CPU_SECONDS,
+                 memory_mb: Optional[int] = DEFAULT_MEMORY_MB,
+                 stats: Optional[Callable[[], Any]] = None,
+                 on_stats: Optional[Callable[[int, Any], None]] = None):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.stats = stats
+        self.on_stats = on_stats
+        self._ctx = multiprocessing.get_context(START_METHOD)
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        for _ in range(self.workers):
+            self._idle.put(None)  # started lazily
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _start(self) -> _Worker:
+        on_exit = (lambda pid: self.on_stats(pid, None)) if self.on_stats else None
+        worker = _Worker(self._ctx, self.cpu_seconds, self.memory_mb, self.stats, on_exit)
+        with self._lock:
+            self._all = [w for w in self._all if w.alive] + [worker]
+        return worker
+
+    def run(self, fn: Callable, arg: Any, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """fn(arg) in a worker; fn and its result must be picklable."""
+        if self._closed:
+            raise RuntimeError("SandboxPool is closed")
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        start = time.perf_counter()
+        try:
+            if worker is not None and not worker.alive:
+                worker.kill()
+            if worker is None or not worker.alive:
+                worker = self._start()
+            status, value, report = worker.call(fn, arg, timeout)
+            # reported while this thread still owns the worker, so never after its exit
+            if report is not None and self.on_stats is not None:
+                self.on_stats(worker.pid, report)
+            if status == "memory":
+                worker.kill()  # retired by the child after a MemoryError
+        except Exception as e:
+            if worker is not None:
+                worker.kill()
+            status, value = "crashed", f"{type(e).__name__}: {e}"
+        finally:
+            if worker is not None and not worker.alive:
+                worker.kill()
+                worker = None
+            self._idle.put(worker)
+        result = {"status": status, "value": None, "error": None,
+                  "ms": round((time.perf_counter() - start) * 1000, 3)}
+        result["value" if status == "ok" else "error"] = value
+        return result
+
+    def map(self, fn: Callable, items: Iterable[Any], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """run() over items on all workers, results in input order."""
+        items = list(items)
+        if len(items) <= 1 or self.workers == 1:
+            return [self.run(fn, item, timeout) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            return list(executor.map(lambda item: self.run(fn, item, timeout), items))
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers, self._all = self._all, []
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,138 @@
+"""
+Process-wide memo for clean-number verification.
+
+The same equations (x^2-5x+6=0 and friends) come back across variants,
+exams and regeneration rounds. verify.py keeps two LRU caches here:
+- parse_cache: normalized input text -> parsed (lhs, rhs),
+- solution_cache: canonical equation (expanded, symbols renamed in sorted
+  order, content and sign divided out) -> solution set.
+
+The caches that matter live in the sandbox workers (sandbox.py), not in
+the process serving /metrics: each worker reports its cache_stats() with
+every result and WORKER_CACHES adds them up (worker_cache_stats()).
+Kept free of SymPy imports so the API can report them without loading SymPy.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+PARSE_CACHE_SIZE = 4096
+SOLUTION_CACHE_SIZE = 4096
+
+
+class LRUCache:
+    """Thread-safe LRU map with hit/miss counters."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached value, or compute() stored under key (exceptions are not cached)."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, entries = self.hits, self.misses, len(self._data)
+        total = hits + misses
+        return {"entries": entries, "hits": hits, "misses": misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0}
+
+
+parse_cache = LRUCache(PARSE_CACHE_SIZE)
+solution_cache = LRUCache(SOLUTION_CACHE_SIZE)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {"parse": parse_cache.stats(), "solve": solution_cache.stats()}
+
+
+def clear_caches():
+    parse_cache.clear()
+    solution_cache.clear()
+
+
+class WorkerCaches:
+    """
+    Latest cache_stats() per sandbox worker (by pid). Hits and misses of
+    exited workers are kept in the totals; entries count live workers only.
+    """
+    _CACHES = ("parse", "solve")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._live: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._retired = {cache: {"hits": 0, "misses": 0} for cache in self._CACHES}
+
+    def update(self, pid: int, stats: Optional[Dict[str, Dict[str, Any]]]):
+        """SandboxPool on_stats callback: a worker's stats, or None once it exited."""
+        with self._lock:
+            if stats is not None:
+                self._live[pid] = stats
+                return
+            last = self._live.pop(pid, None)
+            if last is not None:
+                for cache, counts in self._retired.items():
+                    counts["hits"] += last[cache]["hits"]
+                    counts["misses"] += last[cache]["misses"]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            live = list(self._live.values())
+            retired = {cache: dict(counts) for cache, counts in self._retired.items()}
+        totals = {}
+        for cache in self._CACHES:
+            hits = retired[cache]["hits"] + sum(stats[cache]["hits"] for stats in live)
+            misses = retired[cache]["misses"] + sum(stats[cache]["misses"] for stats in live)
+            total = hits + misses
+            totals[cache] = {"entries": sum(stats[cache]["entries"] for stats in live), "hits": hits,
+                             "misses": misses, "hit_rate": round(hits / total, 4) if total else 0.0}
+        return totals
+
+    def reset(self):
+        with self._lock:
+            self._live.clear()
+            for counts in self._retired.values():
+                counts.update(hits=0, misses=0)
+
+
+WORKER_CACHES = WorkerCaches()
+
+
+def worker_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """cache_stats() summed over the sandbox workers."""
+    return WORKER_CACHES.stats()
@@ -0,0 +1,64 @@
+import sys
+import os
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from sympy import Abs, E, Rational, Symbol, solve
+
+from skills.clean_numbers.scripts.latex_math import exercise_equations, latex_to_text, parse_latex_math
+
+x = Symbol("x")
+
+
+def roots(math):
+    parsed = parse_latex_math(math)
+    assert parsed is not None, f"could not parse {math!r}"
+    assert parsed.kind == "equation"
+    assert parsed.unknowns == {x}, f"{math!r} -> {parsed.expr}"
+    return sorted(solve(parsed.expr, x), key=str)
+
+
+def test_polynomials_fractions_roots():
+    assert roots(r"x^{2} - 5x + 6 = 0") == [2, 3]
+    assert roots(r"\frac{x}{2} + 1 = 3") == [4]
+    assert roots(r"\dfrac{x-1}{2} + \dfrac{x+3}{4} = \dfrac{5}{4}") == [Rational(4, 3)]
+    assert roots(r"\sqrt{x} = 3") == [9]
+    assert roots(r"2 \cdot x = \frac12") == [Rational(1, 4)]
+
+    # f(x) = ... is a definition; sqrt(x) = ..., |x| = ..., sin(x) = ... are equations
+    assert parse_latex_math(r"f(x) = x^2 + 1").kind == "definition"
+    assert parse_latex_math(r"\left| x \right| = 3").expr == Abs(x) - 3
+    assert parse_latex_math(r"\sin(x) = 0").kind == "equation"
+
+
+def test_logarithms():
+    assert roots(r"\log_2 x = 3") == [8]
+    assert roots(r"\log_{2}(x) = 3") == [8]
+    assert roots(r"\log_{2}{x} + \log_2 4 = 5") == [8]
+    assert roots(r"\log_3 27 = x") == [3]
+    assert roots(r"\log x = 2") == [100]  # decimal logarithm
+    assert roots(r"2\log(x+1) = 4") == [99]
+    assert roots(r"\ln x = 1") == [E]
+
+
+def test_log_base_never_becomes_a_symbol():
+    for math in (r"\log_2 x = 3", r"\log_{10}(x) = 2", r"\log_3 27 = x"):
+        assert "_" not in latex_to_text(math)
+
+
+def test_ambiguous_or_unknown_markup_is_not_read():
+    assert latex_to_text(r"\log_2 8x = 5") is None
+    assert latex_to_text(r"\log_2 x^2 = 2") is None
+    assert latex_to_text(r"\log_2(x(x+1)) = 1") is None
+    assert latex_to_text(r"\log_{2}\frac{1}{x} = 3") is None
+    assert latex_to_text(r"\binom{x}{2} = 6") is None
+    assert parse_latex_math(r"x^2 \geq 4") is None
+    assert parse_latex_math(r"a = b = c") is None
+
+
+def test_exercise_equations():
+    latex = (r"\askhsh Να λυθούν οι εξισώσεις $\log_2 x = 3$ και \[ x^2 - 4 = 0 \]. "
+             r"Δίνεται η $f(x) = x^2$ και ισχύει $x + y = 1$. Ξανά: $\log_2 x = 3$.")
+    found = exercise_equations(latex)
+    assert [p.math.strip() for p in found] == [r"\log_2 x = 3", r"x^2 - 4 = 0"]
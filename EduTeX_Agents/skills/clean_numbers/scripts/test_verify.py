@@ -0,0 +1,73 @@
+import sys
+import os
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from sympy import Rational, Symbol, sqrt
+
+from skills.clean_numbers.scripts import verify
+from skills.clean_numbers.scripts.solve_cache import WORKER_CACHES, clear_caches, solution_cache
+
+x, y, a = Symbol("x"), Symbol("y"), Symbol("a")
+
+
+def key(equation, variable):
+    return verify.canonical_equation(equation, variable)[0]
+
+
+def test_canonical_equation_renames_and_normalises():
+    assert key(x**2 - 5*x + 6, x) == key(2*y**2 - 10*y + 12, y)
+    assert key(x**2 - 5*x + 6, x) == key(-x**2 + 5*x - 6, x)
+    assert key((x - 2) * (x - 3), x) == key(x**2 - 5*x + 6, x)
+    assert key(x**2 - 5*x + 6, x) != key(x**2 - 5*x + 7, x)
+    # two symbols: which one is solved for is part of the key
+    assert key(a*x - 1, x) != key(a*x - 1, a)
+
+
+def test_cached_solutions_are_mapped_back():
+    clear_caches()
+    assert sorted(verify._solve_cached(x**2 - 5*x + 6, x)) == [2, 3]
+    assert sorted(verify._solve_cached(2*y**2 - 10*y + 12, y)) == [2, 3]
+    assert solution_cache.stats()["hits"] == 1
+    assert verify._solve_cached(a*x - 1, x) == [1 / a]
+    assert verify._solve_cached(a*y - 1, a) == [1 / y]
+    assert sorted(verify._solve_cached(3*x**2 - 6, x), key=str) == [-sqrt(2), sqrt(2)]
+    assert verify._solve_cached(-4*x + 2, x) == [Rational(1, 2)]
+
+
+def test_sandbox_workers_report_their_caches():
+    verify.shutdown_pool()
+    WORKER_CACHES.reset()
+    try:
+        report = verify.verify_batch(["x^2 - 5x + 6 = 0", "2y^2 - 10y + 12 = 0"], workers=1)
+        assert report["passed"] == 2
+        stats = WORKER_CACHES.stats()
+        assert stats["solve"] == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+        assert stats["parse"]["misses"] == 2
+
+        # a replaced worker keeps its hits and misses, not its entries
+        verify.shutdown_pool()
+        stats = WORKER_CACHES.stats()
+        assert stats["solve"]["entries"] == 0
+        assert (stats["solve"]["hits"], stats["solve"]["misses"]) == (1, 1)
+    finally:
+        verify.shutdown_pool()
+        WORKER_CACHES.reset()
+
+
+def test_replacing_the_pool_spares_calls_in_flight():
+    from concurrent.futures import ThreadPoolExecutor
+
+    latex = r"Να λυθεί η $x^2 - 5x + 6 = 0$."
+    try:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            checks = [executor.submit(verify.verify_latex_sandboxed, latex) for _ in range(12)]
+            batches = [executor.submit(verify.verify_batch, ["x^2 = 4"], workers=n) for n in (1, 2, 3)]
+            reports = [c.result() for c in checks]
+            assert all(b.result()["passed"] == 1 for b in batches)
+        assert [r["status"] for r in reports] == ["ok"] * 12
+        assert all(r["ok"] for r in reports)
+        assert not verify._POOL_CALLS
+    finally:
+        verify.shutdown_pool()
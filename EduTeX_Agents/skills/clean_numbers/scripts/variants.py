@@ -0,0 +1,294 @@
+"""
+Parametric variant engine for isomorphic exercises.
+
+The first equation (or function definition) found in the exercise's math
+is turned into a template: its integer coefficients become parameters
+p0..pk, while zeros, exponents and subscripts stay fixed. Coefficient
+candidates are screened numerically and confirmed exactly with
+is_clean_number, so N variants with the same structure and equally clean
+solutions take milliseconds instead of an LLM round trip.
+
+Exercises without a usable equation return None and are left to the LLM.
+"""
+import cmath
+import hashlib
+import random
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import mpmath
+from sympy import Poly, Rational, RootOf, Symbol, expand, lambdify, solve, sqrt, symbols
+from sympy import latex as sympy_latex
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    from skills.clean_numbers.scripts.latex_math import iter_math, latex_to_text, parse_text
+    from skills.clean_numbers.scripts.verify import is_clean_number
+except ImportError:
+    from latex_math import iter_math, latex_to_text, parse_text  # type: ignore[no-redef]
+    from verify import is_clean_number  # type: ignore[no-redef]
+
+# exponents, subscripts and root indices are structure, not coefficients
+_FIXED = re.compile(r"[\^_](?:\{[^{}]*\}|\d)|\\sqrt\[[^\]]*\]")
+_LITERAL = re.compile(r"(?<![\w.])[1-9]\d*(?![\d.])")
+_FUNCTION = re.compile(r"^\s*[a-zA-Z]\s*\(\s*x\s*\)\s*$")
+
+# Cleanliness rank of a solution: a variant may not be messier than the original
+_RANKS = {"Integer": 0, "Simple Fraction": 1, "Standard Irrational": 2}
+_MESSY = 3
+_MAX_MISSES = 3000  # consecutive rejected candidates before giving up
+
+
+def _rank(value) -> Optional[int]:
+    clean, reason = is_clean_number(value)
+    if not clean:
+        return None
+    return next((rank for label, rank in _RANKS.items() if reason.startswith(label)), 2)
+
+
+def _from_numeric(v: float):
+    """Exact clean number matching a float (p/q or ±sqrt(p/q), q < 20), or None."""
+    for q in range(1, 20):
+        if abs(v * q - round(v * q)) < 1e-9:
+            return Rational(round(v * q), q)
+    square = v * v
+    for q in range(1, 20):
+        if abs(square * q - round(square * q)) < 1e-9:
+            root = sqrt(Rational(round(square * q), q))
+            return root if v > 0 else -root
+    return None
+
+
+def _numeric_roots(coeffs: Sequence[float]) -> List[complex]:
+    if HAS_NUMPY:
+        return [complex(r) for r in np.roots(coeffs)]
+    return [complex(r) for r in mpmath.polyroots(coeffs, maxsteps=100, extraprec=30)]
+
+
+class ParametricTemplate:
+    """
+    An exercise with its integer coefficients lifted into parameters.
+
+    Closed-form equations (linear, quadratic, rational...) are solved once
+    symbolically and candidates are evaluated from that solution.
+    Higher-degree polynomials are screened with numeric roots, which are
+    rebuilt as exact clean numbers and checked by substitution.
+    """
+    def __init__(self, latex: str, spans: List[Tuple[int, int]], values: List[int], equation, variable: Symbol,
+                 params: Sequence[Symbol]):
+        self.latex = latex
+        self.spans = spans
+        self.values = values
+        self.equation = equation
+        self.variable = variable
+        self.params = list(params)
+        self._residual = lambdify(self.params + [variable], equation, modules=[cmath])
+
+        self.solutions = None
+        poly = Poly(equation, variable) if equation.is_polynomial(variable) else None
+        if poly is None or poly.degree() <= 2:
+            solutions = solve(equation, variable)
+            if not any(s.has(RootOf) for s in solutions):
+                self.solutions = solutions
+                self._screen = lambdify(self.params, solutions, modules=[{"sqrt": cmath.sqrt}, cmath])
+        if self.solutions is None:
+            if poly is None:
+                raise ValueError("equation has no closed-form solution")
+            self._coeffs = lambdify(self.params, poly.all_coeffs(), modules=["math"])
+
+        self.profile = self._profile(values)
+
+    def _numeric(self, values: Sequence[int]) -> Optional[List[complex]]:
+        try:
+            if self.solutions is not None:
+                return [complex(r) for r in self._screen(*values)]
+            coeffs = [float(c) for c in self._coeffs(*values)]
+            if coeffs[0] == 0:
+                return None  # the degree would drop
+            return _numeric_roots(coeffs)
+        except (ZeroDivisionError, ValueError, OverflowError, TypeError, mpmath.NoConvergence):
+            return None
+
+    def _real_roots(self, values: Sequence[int], numeric: Sequence[complex]) -> List[float]:
+        """Distinct real roots that really solve the equation for these values."""
+        real = set()
+        for r in numeric:
+            if abs(r.imag) > 1e-9:
+                continue
+            try:
+                if abs(self._residual(*values, r.real)) > 1e-6:
+                    continue  # the generic solution does not hold for these values
+            except (ZeroDivisionError, ValueError, OverflowError):
+                continue
+            real.add(round(r.real, 9))
+        return sorted(real)
+
+    def _exact(self, values: Sequence[int], real: Sequence[float]) -> Optional[List[Any]]:
+        """Exact forms of the real roots, or None when one is not a clean closed form."""
+        mapping = dict(zip(self.params, values))
+        if self.solutions is not None:
+            exact = {s.xreplace(mapping) for s in self.solutions}
+            if any(s.is_real is None for s in exact):
+                return None
+            exact = sorted((s for s in exact if s.is_real), key=float)
+            return exact if len(exact) == len(real) else None
+        equation = self.equation.xreplace(mapping)
+        exact = []
+        for r in real:
+            value = _from_numeric(r)
+            if value is None or expand(equation.subs(self.variable, value)) != 0:
+                return None
+            exact.append(value)
+        return exact
+
+    def _profile(self, values: Sequence[int]) -> Tuple[int, int]:
+        """(number of distinct real solutions, worst cleanliness rank or _MESSY)."""
+        numeric = self._numeric(values)
+        if numeric is None:
+            raise ValueError("original equation cannot be evaluated")
+        real = self._real_roots(values, numeric)
+        exact = self._exact(values, real)
+        ranks = [_rank(s) for s in exact] if exact is not None else [None]
+        if any(r is None for r in ranks):
+            return len(real), _MESSY  # variants then only need to be clean
+        return len(real), max(ranks, default=0)
+
+    def accepts(self, values: Sequence[int]) -> Optional[List[Any]]:
+        """Exact real solutions when 'values' gives a variant as clean as the original, else None."""
+        numeric = self._numeric(values)
+        if numeric is None:
+            return None
+        real = self._real_roots(values, numeric)
+        if len(real) != self.profile[0] or any(_from_numeric(r) is None for r in real):
+            return None
+        solutions = self._exact(values, real)
+        if solutions is None:
+            return None
+        ranks = [_rank(s) for s in solutions]
+        if any(r is None for r in ranks):
+            return None
+        if self.profile[1] < _MESSY and max(ranks, default=0) > self.profile[1]:
+            return None
+        return solutions
+
+    def render(self, values: Sequence[int]) -> str:
+        text = self.latex
+        for (start, end), value in sorted(zip(self.spans, values), reverse=True):
+            text = text[:start] + str(value) + text[end:]
+        return text
+
+
+def _parse(math: str, params: Sequence[Symbol]):
+    text = latex_to_text(math)
+    if text is None or text.count("=") != 1:
+        return None
+    lhs, rhs = text.split("=")
+    if _FUNCTION.match(lhs):
+        lhs = "0"  # f(x) = ... : the roots of f
+    local = {p.name: p for p in params}
+    local["x"] = Symbol("x")
+    try:
+        equation = parse_text(lhs, local) - parse_text(rhs, local)
+    except Exception:
+        return None
+    unknowns = equation.free_symbols - set(params)
+    if len(unknowns) != 1:
+        return None
+    return equation, unknowns.pop()
+
+
+@lru_cache(maxsize=256)
+def parse_template(latex: str) -> Optional[ParametricTemplate]:
+    """Template of the first parametrisable equation in the exercise, or None."""
+    for math, offset in iter_math(latex):
+        fixed = [f.span() for f in _FIXED.finditer(math)]
+        literals = [
+            lit for lit in _LITERAL.finditer(math)
+            if not any(start <= lit.start() < end for start, end in fixed)
+        ]
+        if not literals:
+            continue
+        params = symbols(f"p0:{len(literals)}")
+        lifted = math
+        for lit, param in sorted(zip(literals, params), key=lambda lp: -lp[0].start()):
+            lifted = lifted[:lit.start()] + f"({param.name})" + lifted[lit.end():]
+        parsed = _parse(lifted, params)
+        if parsed is None:
+            continue
+        try:
+            return ParametricTemplate(
+                latex,
+                [(offset + lit.start(), offset + lit.end()) for lit in literals],
+                [int(lit.group()) for lit in literals],
+                parsed[0], parsed[1], params,
+            )
+        except Exception:
+            continue
+    return None
+
+
+def _ranges(template: ParametricTemplate) -> List[Tuple[int, int]]:
+    # A literal 1 may stay 1; anything else stays >= 2 so "3x" never becomes "1x"
+    return [(1 if value == 1 else 2, max(12, 3 * value)) for value in template.values]
+
+
+def make_variants(exercise: Dict[str, Any], count: int, seed: int = 0,
+                  max_tries: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Up to 'count' distinct variants of the exercise, deterministic for a
+    given seed, or None when the exercise is not parametrisable. Fewer are
+    returned when the coefficient range has no more clean variants.
+    """
+    latex = exercise.get("latex", "") if isinstance(exercise, dict) else ""
+    template = parse_template(latex) if latex else None
+    if template is None:
+        return None
+
+    digest = int(hashlib.sha256(latex.encode("utf-8")).hexdigest()[:12], 16)
+    rng = random.Random(digest ^ seed)
+    ranges = _ranges(template)
+    seen = {tuple(template.values)}
+    metadata = dict(exercise.get("metadata") or {})
+    variable = sympy_latex(template.variable)
+    variants: List[Dict[str, Any]] = []
+    misses = 0
+    for _ in range(max_tries or 5000 + 500 * count):
+        if len(variants) >= count or misses > _MAX_MISSES:
+            break  # done, or the coefficient range is (nearly) exhausted
+        values = tuple(rng.randint(low, high) for low, high in ranges)
+        if values in seen:
+            misses += 1
+            continue
+        seen.add(values)
+        solutions = template.accepts(values)
+        if solutions is None:
+            misses += 1
+            continue
+        misses = 0
+        answers = [sympy_latex(s) for s in solutions]
+        variants.append({
+            "latex": template.render(values),
+            "solution": ", ".join(f"${variable} = {a}$" for a in answers) or "Καμία πραγματική λύση.",
+            "metadata": {**metadata, "engine": "parametric", "parameters": list(values), "answers": answers},
+        })
+    return variants
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Generate parametric variants of an exercise.")
+    parser.add_argument("latex", help="Exercise LaTeX, e.g. 'Να λύσετε την $x^2 - 5x + 6 = 0$.'")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = make_variants({"latex": args.latex}, args.count, args.seed)
+    print(json.dumps(result, ensure_ascii=False, indent=2) if result is not None else "Not parametrisable.")
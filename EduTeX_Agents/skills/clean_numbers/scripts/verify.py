@@ -1,12 +1,109 @@
+import os
+import re
 import sys
+import time
+import json
+import atexit
+import threading
 import argparse
-from sympy import symbols, solve, simplify, S, N, Basic
+from contextlib import contextmanager
+from fractions import Fraction
+import mpmath
+from sympy import symbols, solve, simplify, expand, srepr, S, N, Basic, Rational, Symbol, pi
 from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
 
+try:
+    from skills.clean_numbers.scripts.latex_math import exercise_equations
+    from skills.clean_numbers.scripts.solve_cache import WORKER_CACHES, cache_stats, parse_cache, solution_cache
+    from skills.clean_numbers.scripts.sandbox import (
+        DEFAULT_CPU_SECONDS, DEFAULT_MEMORY_MB, DEFAULT_TIMEOUT, SandboxPool,
+    )
+except ImportError:
+    from latex_math import exercise_equations  # type: ignore[no-redef]
+    from solve_cache import WORKER_CACHES, cache_stats, parse_cache, solution_cache  # type: ignore[no-redef]
+    from sandbox import DEFAULT_CPU_SECONDS, DEFAULT_MEMORY_MB, DEFAULT_TIMEOUT, SandboxPool  # type: ignore[no-redef]
+
+# --- Clean-number check ------------------------------------------------------
+# Tiered: exact Integer/Rational first, then a high-precision numeric test of
+# num^2 (and num/pi) against the allowed denominators, and the symbolic
+# simplify(num**2) only when the numeric test cannot decide (no numeric value,
+# huge magnitude, or an error too small to reject but too large to accept).
+
+MAX_DENOMINATOR = 20          # clean fractions have denominator < 20
+_NUMERIC_DPS = 30             # digits of num evaluated
+_MATCH_TOL = Fraction(1, 10 ** 20)  # relative error accepted as exact
+_REJECT_TOL = Fraction(1, 10 ** 8)  # relative error that rules a match out
+_IMAG_TOL = mpmath.mpf(10) ** -20   # relative imaginary part treated as 0
+_MAX_MAGNITUDE = 10 ** 6
+
+def _small_rational(value):
+    """
+    (p, q) with q < MAX_DENOMINATOR if value (real mpf) is p/q within
+    _MATCH_TOL, "no" if the closest such fraction misses by more than
+    _REJECT_TOL, else None (ambiguous).
+    """
+    if abs(value) > _MAX_MAGNITUDE:
+        return None
+    man, exp = value.man_exp  # |value| = man * 2^exp
+    exact = Fraction(man * 2 ** exp) if exp >= 0 else Fraction(man, 2 ** -exp)
+    if value < 0:
+        exact = -exact
+    closest = exact.limit_denominator(MAX_DENOMINATOR - 1)
+    error = abs(exact - closest) / max(abs(exact), 1)
+    if error < _MATCH_TOL:
+        return closest.numerator, closest.denominator
+    if error > _REJECT_TOL:
+        return "no"
+    return None
+
+def _is_clean_numeric(num):
+    """(clean, reason) from num evaluated to _NUMERIC_DPS digits, or None if ambiguous."""
+    try:
+        value = num.evalf(_NUMERIC_DPS)
+        re_part, im_part = value.as_real_imag()
+        if not (re_part.is_Float or re_part.is_zero) or not (im_part.is_Float or im_part.is_zero):
+            return None
+        with mpmath.workdps(_NUMERIC_DPS + 10):
+            z = mpmath.mpc(mpmath.mpf(re_part), mpmath.mpf(im_part))
+            square = z * z
+            if abs(square.imag) > _IMAG_TOL * max(abs(square), 1):
+                # non-real square: cannot be a rational, nor can a pi multiple
+                return False, f"Complex Number/Expression: {num}"
+            match = _small_rational(square.real)
+            if match is None:
+                return None
+            if match != "no":
+                p, q = match
+                return True, f"Standard Irrational (sqrt({Rational(p, q)}))"
+            if abs(z.imag) <= _IMAG_TOL * max(abs(z), 1):
+                match = _small_rational(z.real / mpmath.pi)
+                if match is None:
+                    return None
+                if match != "no" and match[0] != 0:
+                    p, q = match
+                    return True, f"Standard Irrational ({Rational(p, q) * pi})"
+        return False, f"Complex Number/Expression: {num}"
+    except Exception:
+        return None
+
+def _is_clean_symbolic(num):
+    # Check if it's a simple root (e.g., sqrt(2), sqrt(3), 2*sqrt(2))
+    sq = simplify(num**2)
+    if sq.is_Rational:
+         if sq.q < MAX_DENOMINATOR:
+             return True, f"Standard Irrational (sqrt({sq}))"
+
+    # Rational multiples of pi (e.g. pi/4, 2*pi/3)
+    ratio = simplify(num / pi)
+    if ratio.is_Rational and ratio != 0 and ratio.q < MAX_DENOMINATOR:
+        return True, f"Standard Irrational ({ratio * pi})"
+
+    return False, f"Complex Number/Expression: {num}"
+
 def is_clean_number(num):
     """
     Determines if a number is 'clean' based on pedagogical standards.
-    Clean: Integers, Simple Fractions (denom < 20), Standard Irrationals (sqrt(2), sqrt(3), pi, e).
+    Clean: Integers, Simple Fractions (denom < 20), Standard Irrationals (sqrt(2), sqrt(3), pi multiples).
     """
     try:
         # Check for Integers
@@ -16,89 +113,358 @@ def is_clean_number(num):
         # Check for Rational
         if num.is_Rational:
             denom = num.q
-            if denom < 20:
+            if denom < MAX_DENOMINATOR:
                 return True, f"Simple Fraction (denom={denom})"
             else:
-                return False, f"Complex Fraction (denom={denom} >= 20)"
-        
-        # Check for specific clean irrationals
-        # We check if the number squared is a clean rational, or if it involves pi/e in a simple way
-        # This is heuristics-based for high school math
-        
-        # Check if it's a simple root (e.g., sqrt(2), sqrt(3), 2*sqrt(2))
-        sq = simplify(num**2)
-        if sq.is_Rational:
-             if sq.q < 20:
-                 return True, f"Standard Irrational (sqrt({sq}))"
-        
-        # Check floating point complexity as a fallback/heuristic
-        # If it has a clean decimal representation (e.g. 0.5, 0.25) it might be okay, but SymPy handles rationals better.
+                return False, f"Complex Fraction (denom={denom} >= {MAX_DENOMINATOR})"
         
-        return False, f"Complex Number/Expression: {num}"
+        # Check for specific clean irrationals: num^2 a clean rational, or a
+        # simple multiple of pi. Decided numerically when possible, since
+        # simplify() costs milliseconds to seconds per root.
+        verdict = _is_clean_numeric(num)
+        if verdict is not None:
+            return verdict
+        return _is_clean_symbolic(num)
 
     except Exception as e:
         return False, f"Error analyzing number: {e}"
 
-def verify_expression(expr_str):
+# --- Parse / solve memo ------------------------------------------------------
+# Parsed inputs are cached by normalized text; solution sets by a canonical
+# form of the equation, so "2y^2 - 10y + 12 = 0" reuses the solutions of
+# "x^2 - 5x + 6 = 0". The caches that count live in the sandbox workers;
+# their hit rates: solve_cache.worker_cache_stats().
+
+_OPERATOR_SPACE = re.compile(r"\s*([^\w\s])\s*")
+_TRANSFORMATIONS = (standard_transformations + (implicit_multiplication_application,))
+
+def _normalize(expr_str):
+    """Dedup key: same text up to whitespace around operators and ^ vs **."""
+    return _OPERATOR_SPACE.sub(r"\1", " ".join(expr_str.replace("**", "^").split()))
+
+def _parse_cached(expr_str):
+    """(lhs, rhs) of "lhs = rhs", or (expr, None) without "="; parse errors raise."""
+    def parse():
+        text = expr_str.replace("^", "**")
+        if "=" not in text:
+            return parse_expr(text, transformations=_TRANSFORMATIONS), None
+        lhs_str, rhs_str = text.split("=")
+        return (parse_expr(lhs_str, transformations=_TRANSFORMATIONS),
+                parse_expr(rhs_str, transformations=_TRANSFORMATIONS))
+    return parse_cache.get_or_compute(_normalize(expr_str), parse)
+
+def canonical_equation(equation, variable):
     """
-    Parses and solves/analyzes the expression.
-    Input: "x^2 - 5x + 6 = 0" or just "x^2 - 5x + 6"
+    Canonical form of equation = 0 solved for variable: expanded, symbols
+    renamed _c0, _c1... in name order, numeric content and sign divided out.
+    Returns (key, form, canonical symbols, original symbols); equations with
+    the same key have the same solutions.
     """
-    # Pre-processing for natural input
-    # 1. Replace ^ with **
-    expr_str = expr_str.replace("^", "**")
-    # 2. Handle = sign. If =, solve it. If not, just simplify/analyze structure (not fully implemented yet)
-    
-    transformations = (standard_transformations + (implicit_multiplication_application,))
-    
+    syms = sorted(equation.free_symbols, key=lambda sym: sym.name)
+    canonical = [Symbol(f"_c{i}") for i in range(len(syms))]
+    form = expand(equation.xreplace(dict(zip(syms, canonical))))
+    if form.is_Add or form.is_Mul:
+        _, form = form.as_content_primitive()
+    if form.could_extract_minus_sign():
+        form = -form
+    return (srepr(form), syms.index(variable)), form, canonical, syms
+
+def _solve_cached(equation, variable):
+    key, form, canonical, syms = canonical_equation(equation, variable)
+    solutions = solution_cache.get_or_compute(key, lambda: tuple(solve(form, canonical[key[1]])))
+    back = dict(zip(canonical, syms))
+    return [sol.xreplace(back) for sol in solutions]
+
+def _check_solutions(equation, result):
+    """Solves equation (= 0) and fills variable, solutions, details and ok of an analysis result."""
+    # Assume variable is x if not specified, or find free symbols
+    syms = list(equation.free_symbols)
+    if not syms:
+        result["error"] = "No variables found in equation"
+        return
+
+    # Solve for the first symbol found
+    x = syms[0]
+    solutions = _solve_cached(equation, x)
+    result["variable"] = str(x)
+    result["solutions"] = [str(sol) for sol in solutions]
+
+    all_clean = True
+    for sol in solutions:
+        is_clean, reason = is_clean_number(sol)
+        result["details"].append({"value": str(sol), "clean": is_clean, "reason": reason})
+        if not is_clean:
+            all_clean = False
+
+    result["ok"] = all_clean
+
+def analyze_expression(expr_str):
+    """
+    Parses and solves/analyzes the expression without printing.
+    Returns a dict: expression, kind ("equation"/"expression"), ok, equation,
+    variable, solutions (strings), details ([{"value", "clean", "reason"}]) and error.
+    """
+    result = {"expression": expr_str, "kind": None, "ok": False, "equation": None, "variable": None,
+              "solutions": [], "details": [], "error": None}
     try:
-        if "=" in expr_str:
-            lhs_str, rhs_str = expr_str.split("=")
-            lhs = parse_expr(lhs_str, transformations=transformations)
-            rhs = parse_expr(rhs_str, transformations=transformations)
+        lhs, rhs = _parse_cached(expr_str)
+        if rhs is not None:
+            result["kind"] = "equation"
             equation = lhs - rhs
-            
-            # Assume variable is x if not specified, or find free symbols
-            syms = list(equation.free_symbols)
-            if not syms:
-                return False, "No variables found in equation"
-            
-            # Solve for the first symbol found
-            x = syms[0]
-            solutions = solve(equation, x)
-            
-            print(f"🔍 Analyzing Equation: {lhs} = {rhs}")
-            print(f"👉 Solutions for {x}: {solutions}")
-            
-            all_clean = True
-            details = []
-            
-            for sol in solutions:
-                is_clean, reason = is_clean_number(sol)
-                status = "✅" if is_clean else "❌"
-                details.append(f"{status} {sol}: {reason}")
-                if not is_clean:
-                    all_clean = False
-            
-            return all_clean, details
+            result["equation"] = f"{lhs} = {rhs}"
+
+            _check_solutions(equation, result)
+            return result
 
         else:
             # Just an expression
-            expr = parse_expr(expr_str, transformations=transformations)
-            print(f"🔍 Analyzing Expression: {expr}")
-            # For expressions, maybe we check coefficients? 
+            result["kind"] = "expression"
+            expr = lhs
+            # For expressions, maybe we check coefficients?
             # For now, let's just say expressions are passed if they parse.
             # TODO: Add logic to check coefficients.
-            return True, ["Expression parsed successfully (No clean check for non-equations yet)"]
+            result["ok"] = True
+            result["details"].append({"value": str(expr), "clean": True,
+                                      "reason": "Expression parsed successfully (No clean check for non-equations yet)"})
+            return result
 
     except Exception as e:
-        return False, [f"Parsing Error: {e}"]
+        result["error"] = f"Parsing Error: {e}"
+        return result
+
+def analyze_latex(latex):
+    """
+    Clean-number check of the equations in an exercise's LaTeX (prose with
+    $...$ math), without printing. Every equation in one unknown is solved.
+    Returns {"ok", "checked", "messy", "errors", "equations"}: one
+    analyze_expression dict per equation ("expression" is its LaTeX).
+    ok is False only when some equation has a messy solution; equations
+    SymPy cannot solve are reported under "errors" but do not fail it.
+    """
+    equations = []
+    for parsed in exercise_equations(latex):
+        result = {"expression": parsed.math, "kind": "equation", "ok": False,
+                  "equation": f"{parsed.lhs} = {parsed.rhs}", "variable": None,
+                  "solutions": [], "details": [], "error": None}
+        try:
+            _check_solutions(parsed.expr, result)
+        except Exception as e:
+            result["error"] = f"Solve Error: {e}"
+        equations.append(result)
+    messy = sum(1 for r in equations if not r["ok"] and not r["error"])
+    return {
+        "ok": messy == 0,
+        "checked": len(equations),
+        "messy": messy,
+        "errors": sum(1 for r in equations if r["error"]),
+        "equations": equations,
+    }
+
+def verify_expression(expr_str):
+    """
+    Parses and solves/analyzes the expression.
+    Input: "x^2 - 5x + 6 = 0" or just "x^2 - 5x + 6"
+    """
+    result = analyze_expression(expr_str)
+    if result["error"]:
+        return False, [result["error"]]
+
+    if result["kind"] == "equation":
+        print(f"🔍 Analyzing Equation: {result['equation']}")
+        print(f"👉 Solutions for {result['variable']}: [{', '.join(result['solutions'])}]")
+        details = [f"{'✅' if d['clean'] else '❌'} {d['value']}: {d['reason']}" for d in result["details"]]
+        return result["ok"], details
+
+    print(f"🔍 Analyzing Expression: {result['details'][0]['value']}")
+    return True, [result["details"][0]["reason"]]
+
+# --- Batch verification ---------------------------------------------------
+# Unique expressions are solved in sandboxed worker processes (SymPy
+# solve/simplify is CPU-bound and holds the GIL), so bulk checks of a bank
+# scale with cores, and a pathological equation costs at most its time /
+# memory budget: it comes back as "timeout/undecidable" instead of hanging.
+# The pool is kept warm between calls: workers pay the SymPy import once.
+# Callers from several threads share it; a pool replaced (new size or limits)
+# or shut down while calls are in flight is closed by its last caller.
+
+_POOL = None
+_POOL_CONFIG = None
+_POOL_LOCK = threading.Lock()
+_POOL_CALLS = {}  # pool -> calls in flight
+
+def _timed_analyze(expr_str):
+    start = time.perf_counter()
+    result = analyze_expression(expr_str)
+    result["ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+def _detach_pool():
+    """Unsets the warm pool (_POOL_LOCK held); returns it if nothing runs on it, to be closed."""
+    global _POOL, _POOL_CONFIG
+    pool, _POOL, _POOL_CONFIG = _POOL, None, None
+    return pool if pool is not None and pool not in _POOL_CALLS else None
+
+@contextmanager
+def _pool(workers, cpu_seconds, memory_mb):
+    """
+    The warm pool, held for one batch of calls; None for workers keeps the
+    current size (default: up to 4 workers).
+    """
+    global _POOL, _POOL_CONFIG
+    idle = None
+    with _POOL_LOCK:
+        if workers is None:
+            workers = _POOL.workers if _POOL is not None else min(4, os.cpu_count() or 1)
+        config = (workers, cpu_seconds, memory_mb)
+        if _POOL is None or _POOL_CONFIG != config:
+            idle = _detach_pool()
+            _POOL = SandboxPool(workers, cpu_seconds=cpu_seconds, memory_mb=memory_mb,
+                                stats=cache_stats, on_stats=WORKER_CACHES.update)
+            _POOL_CONFIG = config
+        pool = _POOL
+        _POOL_CALLS[pool] = _POOL_CALLS.get(pool, 0) + 1
+    if idle is not None:
+        idle.close()
+    try:
+        yield pool
+    finally:
+        with _POOL_LOCK:
+            _POOL_CALLS[pool] -= 1
+            retired = _POOL_CALLS[pool] == 0 and pool is not _POOL
+            if _POOL_CALLS[pool] == 0:
+                del _POOL_CALLS[pool]
+        if retired:
+            pool.close()
+
+def shutdown_pool():
+    """Stops the warm worker pool (it is restarted on the next call); calls in flight finish first."""
+    with _POOL_LOCK:
+        idle = _detach_pool()
+    if idle is not None:
+        idle.close()
+
+atexit.register(shutdown_pool)
+
+def _from_sandbox(expr_str, run):
+    """analyze_expression-shaped dict from a SandboxPool result."""
+    if run["status"] == "ok":
+        result = run["value"]
+    else:
+        result = {"expression": expr_str, "kind": None, "ok": False, "equation": None, "variable": None,
+                  "solutions": [], "details": [], "error": None, "ms": run["ms"]}
+        if run["status"] in ("timeout", "memory"):
+            result["error"] = f"Timeout/undecidable: {run['error']}"
+        else:
+            result["error"] = f"Verification failed: {run['error']}"
+    result["status"] = run["status"]
+    return result
+
+def verify_sandboxed(expr_str, timeout=DEFAULT_TIMEOUT, cpu_seconds=DEFAULT_CPU_SECONDS,
+                     memory_mb=DEFAULT_MEMORY_MB):
+    """
+    analyze_expression in a warm, resource-limited worker. Adds "ms" and
+    "status" ("ok", "timeout", "memory", "error" or "crashed"); anything
+    but "ok" has ok=False and the reason in "error".
+    """
+    with _pool(None, cpu_seconds, memory_mb) as pool:
+        return _from_sandbox(expr_str, pool.run(_timed_analyze, expr_str, timeout))
+
+def verify_latex_sandboxed(latex, timeout=DEFAULT_TIMEOUT, cpu_seconds=DEFAULT_CPU_SECONDS,
+                           memory_mb=DEFAULT_MEMORY_MB):
+    """
+    analyze_latex in a warm, resource-limited worker, plus "status" and "ms"
+    as in verify_sandboxed. When the check cannot finish (timeout, memory,
+    crash) ok is None, i.e. undecided, and "error" says why.
+    """
+    with _pool(None, cpu_seconds, memory_mb) as pool:
+        run = pool.run(analyze_latex, latex, timeout)
+    if run["status"] == "ok":
+        report = run["value"]
+    else:
+        report = {"ok": None, "checked": 0, "messy": 0, "errors": 0, "equations": [],
+                  "error": f"Timeout/undecidable: {run['error']}"}
+    report["status"] = run["status"]
+    report["ms"] = run["ms"]
+    return report
+
+def verify_batch(expressions, workers=None, timeout=DEFAULT_TIMEOUT, cpu_seconds=DEFAULT_CPU_SECONDS,
+                 memory_mb=DEFAULT_MEMORY_MB, sandbox=True):
+    """
+    Verifies many expressions at once, without printing.
+    Duplicates (up to whitespace) are solved once; unique ones go to `workers`
+    sandboxed processes (default: CPU count), each call limited to `timeout`
+    wall-clock seconds, `cpu_seconds` of CPU and `memory_mb` of memory.
+    sandbox=False solves in-process with no limits.
+    Returns {"results", "total", "unique", "passed", "failed", "undecidable",
+    "workers", "elapsed_ms"}; results follow the input order, each a
+    verify_sandboxed dict plus "index" and "duplicate_of" (index of the first
+    identical expression, or None).
+    """
+    start = time.perf_counter()
+    expressions = list(expressions)
+    first_seen = {}
+    unique = []
+    for i, expr_str in enumerate(expressions):
+        key = _normalize(expr_str)
+        if key not in first_seen:
+            first_seen[key] = i
+            unique.append(expr_str)
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    if sandbox:
+        with _pool(workers, cpu_seconds, memory_mb) as pool:
+            runs = pool.map(_timed_analyze, unique, timeout)
+        solved = [_from_sandbox(expr, run) for expr, run in zip(unique, runs)]
+    else:
+        workers = 1
+        solved = [dict(_timed_analyze(expr), status="ok") for expr in unique]
+
+    by_key = {_normalize(expr): r for expr, r in zip(unique, solved)}
+    results = []
+    for i, expr_str in enumerate(expressions):
+        key = _normalize(expr_str)
+        first = first_seen[key]
+        item = dict(by_key[key], expression=expr_str, index=i)
+        item["duplicate_of"] = first if first != i else None
+        results.append(item)
+
+    passed = sum(1 for r in results if r["ok"])
+    return {
+        "results": results,
+        "total": len(results),
+        "unique": len(unique),
+        "passed": passed,
+        "failed": len(results) - passed,
+        "undecidable": sum(1 for r in results if r["status"] in ("timeout", "memory")),
+        "workers": workers,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Verify if math expressions conform to 'Clean Numbers' standards.")
-    parser.add_argument("expression", help="The math expression or equation to verify (e.g., 'x^2 - 5x + 6 = 0')")
+    parser.add_argument("expression", nargs="?", help="The math expression or equation to verify (e.g., 'x^2 - 5x + 6 = 0')")
+    parser.add_argument("--latex", action="store_true", help="Treat the argument as exercise LaTeX and check its $...$ equations")
+    parser.add_argument("--batch", metavar="FILE", help="Verify one expression per line of FILE ('-' for stdin)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --batch (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds per expression in --batch")
     args = parser.parse_args()
 
+    if args.batch:
+        stream = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+        with stream:
+            lines = [line.strip() for line in stream if line.strip()]
+        report = verify_batch(lines, workers=args.workers, timeout=args.timeout)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        sys.exit(0 if report["failed"] == 0 else 1)
+
+    if not args.expression:
+        parser.error("an expression or --batch FILE is required")
+
+    if args.latex:
+        report = analyze_latex(args.expression)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        sys.exit(0 if report["ok"] else 1)
+
     success, notes = verify_expression(args.expression)
     
     print("\n--- Verification Report ---")
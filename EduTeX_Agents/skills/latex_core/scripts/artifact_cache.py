@@ -0,0 +1,232 @@
+"""
+Content-addressed cache of compiled PDFs (and their logs).
+
+The same exam is previewed, downloaded and packaged again and again; each
+time the engine runs from scratch. compile_latex, create_package and
+DocumentBuilder look the document up here first. The key is a hash of:
+- the source,
+- the files it pulls in (\\input, \\include, \\includegraphics,
+  \\includesvg, \\lstinputlisting, bibliographies), followed into nested
+  .tex files,
+- the engine and its version,
+- the template version (the local .cls/.sty files, e.g. exam.cls),
+so any change to what the engine would read is a miss.
+
+Entries are <key>.pdf + <key>.log in one directory (EDUTEX_PDF_CACHE_DIR),
+shared between processes. A hit refreshes the entry's mtime and the
+oldest entries are evicted once the directory exceeds
+EDUTEX_PDF_CACHE_MB (LRU by size).
+"""
+import os
+import re
+import shutil
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from skills.latex_core.scripts.formats import engine_version, template_digest
+except ImportError:
+    from formats import engine_version, template_digest  # type: ignore[no-redef]
+
+CACHE_DIR = os.getenv("EDUTEX_PDF_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "edutex", "pdf"))
+CACHE_MAX_MB = int(os.getenv("EDUTEX_PDF_CACHE_MB", "512"))
+_KEY_VERSION = "1"  # bump when the key layout changes
+
+_INCLUDE = re.compile(
+    r"\\(input|include|includegraphics|includesvg|lstinputlisting|bibliography|addbibresource)"
+    r"\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}"
+)
+_COMMENT = re.compile(r"(?<!\\)%.*")
+_EXTENSIONS = {
+    "input": ("", ".tex"), "include": (".tex",), "lstinputlisting": ("",),
+    "includegraphics": ("", ".pdf", ".png", ".jpg", ".jpeg", ".eps"), "includesvg": (".svg", ""),
+    "bibliography": (".bib",), "addbibresource": ("",),
+}
+_MAX_DEPTH = 8  # nested \input levels followed
+
+
+def _resolve(name: str, command: str, dirs: Iterable[str]) -> Optional[str]:
+    for directory in dirs:
+        for ext in _EXTENSIONS[command]:
+            path = os.path.join(directory, name + ext)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def included_files(source: str, dirs: Iterable[str]) -> List[Tuple[str, Optional[str]]]:
+    """(name as written, resolved path or None) for every file the source pulls in, nested \\input included."""
+    dirs = list(dirs)
+    found: List[Tuple[str, Optional[str]]] = []
+    seen = set()
+    pending = [(source, 0)]
+    while pending:
+        text, depth = pending.pop()
+        for m in _INCLUDE.finditer(_COMMENT.sub("", text)):
+            command = m.group(1)
+            for name in (n.strip() for n in m.group(2).split(",")):
+                if not name or (command, name) in seen:
+                    continue
+                seen.add((command, name))
+                path = _resolve(name, command, dirs)
+                found.append((name, path))
+                if path and command in ("input", "include") and depth < _MAX_DEPTH:
+                    try:
+                        with open(path, "r", encoding="utf-8", errors="replace") as f:
+                            pending.append((f.read(), depth + 1))
+                    except OSError:
+                        pass
+    return found
+
+
+def compile_key(source: str, engine: str, dirs: Iterable[str]) -> str:
+    """Hash of source, included files, engine + version and template version."""
+    dirs = list(dirs)
+    digest = hashlib.sha256()
+    digest.update(f"{_KEY_VERSION}\n{engine}\n{engine_version(engine)}\n{template_digest(dirs)}\n".encode("utf-8"))
+    digest.update(source.encode("utf-8"))
+    for name, path in sorted(included_files(source, dirs), key=lambda item: item[0]):
+        digest.update(f"\n{name}\n".encode("utf-8"))
+        if path is None:
+            digest.update(b"<missing>")
+            continue
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b"<unreadable>")
+    return digest.hexdigest()
+
+
+def output_path(file_path: str, ext: str, output_dir: Optional[str] = None) -> str:
+    """<output_dir>/<name><ext> for file_path; by default the current directory, where the engine writes."""
+    return os.path.join(output_dir or os.getcwd(), os.path.splitext(os.path.basename(file_path))[0] + ext)
+
+
+class ArtifactCache:
+    """PDF + log per compile_key in one directory, LRU-evicted beyond max_bytes."""
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".pdf", base + ".log"
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(pdf path, log path or None) of a cached compile, or None."""
+        pdf, log = self._paths(key)
+        try:
+            os.utime(pdf)  # most recently used
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return pdf, (log if os.path.exists(log) else None)
+
+    def put(self, key: str, pdf_path: str, log_path: Optional[str] = None):
+        """Stores copies of a fresh PDF (and log), then evicts down to max_bytes."""
+        if self.max_bytes <= 0 or not os.path.isfile(pdf_path):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        pdf, log = self._paths(key)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        # log first: a visible .pdf always has its log
+        if log_path and os.path.isfile(log_path):
+            shutil.copyfile(log_path, log + suffix)
+            os.replace(log + suffix, log)
+        shutil.copyfile(pdf_path, pdf + suffix)
+        os.replace(pdf + suffix, pdf)
+        with self._lock:
+            self.stores += 1
+        self.evict()
+
+    def restore(self, key: str, file_path: str, output_dir: Optional[str] = None) -> Optional[str]:
+        """Copies a cached PDF/log to where compiling file_path would write them; the PDF path or None."""
+        cached = self.get(key)
+        if cached is None:
+            return None
+        pdf, log = cached
+        target = output_path(file_path, ".pdf", output_dir)
+        try:
+            shutil.copyfile(pdf, target)
+            if log:
+                shutil.copyfile(log, output_path(file_path, ".log", output_dir))
+        except OSError as e:
+            print(f"Warning: Could not restore cached PDF: {e}")
+            return None
+        return target
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(last use, size incl. log, key) per entry."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".pdf"):
+                continue
+            key = name[:-len(".pdf")]
+            pdf, log = self._paths(key)
+            try:
+                stat = os.stat(pdf)
+            except OSError:
+                continue
+            size = stat.st_size + (os.path.getsize(log) if os.path.exists(log) else 0)
+            entries.append((stat.st_mtime, size, key))
+        return entries
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        for _, _, key in self._entries():
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with self._lock:
+            self.hits = self.misses = self.stores = self.evictions = 0
+
+    def stats(self) -> Dict[str, object]:
+        entries = self._entries()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            counts = {"stores": self.stores, "evictions": self.evictions}
+        total = hits + misses
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            **counts,
+        }
+
+
+ARTIFACTS = ArtifactCache()
@@ -1,6 +1,6 @@
 import sys
 import os
-import subprocess
+import json
 import time
 
 # Attempt to import AI libraries gracefully
@@ -18,6 +18,13 @@ except ImportError:
 
 from typing import Optional, Literal
 
+try:
+    from skills.latex_core.scripts.compile_pool import get_pool
+    from skills.latex_core.scripts.formats import FORMATS
+except ImportError:
+    from compile_pool import get_pool  # type: ignore[no-redef]
+    from formats import FORMATS  # type: ignore[no-redef]
+
 class Fixer:
     """
     Handles AI-powered LaTeX error fixing.
@@ -79,9 +86,16 @@ CODE:
             print(f"AI Fix failed: {e}")
             return None
 
-def compile_latex(file_path):
+def compile_latex(file_path, engine=None, use_formats=True, use_cache=True, priority="interactive"):
     """
     Compiles a LaTeX file with self-healing capabilities.
+    The engine is detected from the source unless given (fontspec needs
+    xelatex); templates with the endofdump marker compile against a
+    precompiled format (see formats.py) unless use_formats is False.
+    A document compiled before (same source, inputs, engine and template)
+    gets its PDF and log from the PDF cache unless use_cache is False.
+    Compiles run on the shared compile pool (compile_pool.py) in a temporary
+    directory; only the PDF and log land in the current directory.
     """
     if not os.path.exists(file_path):
         print(f"Error: File {file_path} not found.")
@@ -90,71 +104,81 @@ def compile_latex(file_path):
     fixer = Fixer()
     max_retries = 3
     current_try = 0
+    suspect_format = None
+    pool = get_pool()
 
     while current_try <= max_retries:
         print(f"Compiling {file_path} (Attempt {current_try + 1}/{max_retries + 1})...")
-        
-        try:
-            # Run pdflatex
-            # We use capture_output=True to get stdout/stderr for the log
-            result = subprocess.run(
-                ['pdflatex', '-interaction=nonstopmode', file_path], 
-                check=True, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                text=True # Ensure output is string
-            )
-            
-            # If successful, run again for references (standard practice) but only if first time
-            if current_try == 0:
-                subprocess.run(['pdflatex', '-interaction=nonstopmode', file_path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            
-            print(f"Compilation successful! Created {file_path.replace('.tex', '.pdf')}")
+        result = pool.compile(file_path, priority, engine=engine, use_formats=use_formats, use_cache=use_cache)
+
+        if result["cached"]:
+            print(f"Compilation skipped: {result['pdf']} restored from the PDF cache.")
+            return True
+
+        if result["ok"]:
+            # The document compiles cold but not with its format: drop the format
+            if suspect_format:
+                FORMATS.discard(suspect_format)
+            print(f"Compilation successful! Created {result['pdf']} ({result['passes']} passes, "
+                  f"{result['compile_ms']:.0f} ms)")
             return True
 
-        except subprocess.CalledProcessError as e:
-            print("Compilation failed.")
-            error_log = e.stdout[-2000:] # Capture last 2000 chars of output which usually has the error
+        if result["status"] == "missing":
+            print(f"Error: {result['error']}. Please install a TeX distribution.")
+            return False
+
+        print(f"Compilation failed ({result['status']}: {result['error']}).")
+        if result["format"]:
+            # Rule out a stale or broken format before blaming the document
+            print("   Retrying without the precompiled format...")
+            suspect_format, use_formats = result["format"], False
+            continue
+        suspect_format = None  # fails cold as well: the document is at fault
+        if result["status"] != "error":
+            # Timeout or resource limit: not something an edit of the source can fix
+            return False
+        error_log = result["log_text"][-2000:] # Last 2000 chars of output usually have the error
+        
+        if not fixer.enabled:
+            print("Tip: Set GEMINI_API_KEY or OPENAI_API_KEY to enable auto-fixing!")
+            print("Error output snippet:")
+            print(error_log[-500:])
+            return False
+        
+        if current_try < max_retries:
+            print("Attempting self-healing...")
+            with open(file_path, 'r', encoding='utf-8') as f:
+                code = f.read()
             
-            if not fixer.enabled:
-                print("Tip: Set GEMINI_API_KEY or OPENAI_API_KEY to enable auto-fixing!")
-                print("Error output snippet:")
-                print(error_log[-500:])
-                return False
+            fixed_code = fixer.try_fix(code, error_log)
             
-            if current_try < max_retries:
-                print("Attempting self-healing...")
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    code = f.read()
+            if fixed_code:
+                # Backup original
+                backup_path = file_path + f".bak{current_try}"
+                with open(backup_path, 'w', encoding='utf-8') as f:
+                    f.write(code)
+                print(f"   Backup saved to {backup_path}")
                 
-                fixed_code = fixer.try_fix(code, error_log)
-                
-                if fixed_code:
-                    # Backup original
-                    backup_path = file_path + f".bak{current_try}"
-                    with open(backup_path, 'w', encoding='utf-8') as f:
-                        f.write(code)
-                    print(f"   Backup saved to {backup_path}")
-                    
-                    # Write fix
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(fixed_code)
-                    print("   Applied AI fix. Retrying...")
-                    current_try += 1
-                    time.sleep(1) # Brief pause
-                else:
-                    print("   AI could not generate a fix. Stopping.")
-                    return False
+                # Write fix
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(fixed_code)
+                print("   Applied AI fix. Retrying...")
+                current_try += 1
+                time.sleep(1) # Brief pause
             else:
-                print("Max retries reached.")
+                print("   AI could not generate a fix. Stopping.")
                 return False
-                
-        except FileNotFoundError:
-            print("Error: 'pdflatex' command not found. Please install a TeX distribution.")
+        else:
+            print("Max retries reached.")
             return False
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python compile.py [file.tex]")
+    files = [arg for arg in sys.argv[1:] if arg != "--stats"]
+    if not files:
+        print("Usage: python compile.py [file.tex ...] [--stats]")
     else:
-        compile_latex(sys.argv[1])
+        for file in files:
+            compile_latex(file)
+        if "--stats" in sys.argv:
+            # queue wait vs compile time per priority, passes, statuses
+            print(json.dumps(get_pool().stats(), indent=2))
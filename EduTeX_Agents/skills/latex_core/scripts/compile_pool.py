@@ -0,0 +1,395 @@
+"""
+Concurrent LaTeX compiles in isolated, resource-limited job directories.
+
+Running the engine in the caller's CWD leaves .aux/.log next to the source
+and makes two compiles of the same name clobber each other. CompilePool
+runs N jobs at once, each in its own temporary directory (on tmpfs when
+EDUTEX_COMPILE_TMPDIR points at one, e.g. /dev/shm); \\input files and
+exam.cls are found through TEXINPUTS and only the PDF and log are copied
+out. Per engine run (set by a small exec shim, not preexec_fn, which is
+unsafe with the worker threads):
+- CPU time (RLIMIT_CPU, SIGXCPU -> "cpu"; SIGKILL at the hard limit too),
+- address space (RLIMIT_AS, allocation failure -> "memory"),
+- size of any written file (RLIMIT_FSIZE, SIGXFSZ -> "output_limit"),
+- wall-clock timeout (-> "timeout").
+
+Jobs wait in a priority queue: interactive previews go before bulk
+packaging, FIFO within a priority. Each job runs only the passes it needs
+(rerun.py) and reports how many. Cached PDFs (artifact_cache.py) are
+returned at submit time without queueing. Per-priority queue wait and
+compile time (count, mean, p50, p95, max) are kept in stats(); compile.py
+and package_assembler.py print them with --stats.
+
+RLIMITs need the `resource` module (Unix); elsewhere only the timeout applies.
+"""
+import os
+import sys
+import time
+import queue
+import atexit
+import shutil
+import signal
+import itertools
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+try:
+    import resource  # type: ignore
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+try:
+    from skills.latex_core.scripts.artifact_cache import ARTIFACTS, compile_key, output_path
+    from skills.latex_core.scripts.formats import detect_engine, first_error, input_dirs, latex_command, latex_env, warm_format
+    from skills.latex_core.scripts.rerun import MAX_PASSES, aux_state, rerun_reasons, uses_page_count
+except ImportError:
+    from artifact_cache import ARTIFACTS, compile_key, output_path  # type: ignore[no-redef]
+    from formats import detect_engine, first_error, input_dirs, latex_command, latex_env, warm_format  # type: ignore[no-redef]
+    from rerun import MAX_PASSES, aux_state, rerun_reasons, uses_page_count  # type: ignore[no-redef]
+
+PRIORITIES = {"interactive": 0, "bulk": 1}
+
+DEFAULT_WORKERS = int(os.getenv("EDUTEX_COMPILE_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_TMPDIR = os.getenv("EDUTEX_COMPILE_TMPDIR") or None   # e.g. /dev/shm
+DEFAULT_TIMEOUT = float(os.getenv("EDUTEX_COMPILE_TIMEOUT", "180"))        # wall-clock seconds per run
+DEFAULT_CPU_SECONDS = int(os.getenv("EDUTEX_COMPILE_CPU_SECONDS", "120"))  # CPU seconds per run
+DEFAULT_MEMORY_MB = int(os.getenv("EDUTEX_COMPILE_MEMORY_MB", "2048"))     # address space per run
+DEFAULT_MAX_OUTPUT_MB = int(os.getenv("EDUTEX_COMPILE_MAX_OUTPUT_MB", "100"))  # per written file
+
+_WINDOW = 512  # recent jobs kept for percentiles
+_CPU_GRACE = 5  # seconds between SIGXCPU (soft limit) and SIGKILL (hard limit)
+_MEMORY_ERRORS = ("memory exhausted", "out of memory", "cannot allocate", "can't allocate")
+
+# Sets the RLIMITs in the child and execs the engine: python -c _LIMIT_SHIM cpu memory output cmd...
+# (limits are capped at the hard limits already in place; 0 = no limit)
+_LIMIT_SHIM = """\
+import os, resource, sys
+def limit(kind, soft, hard):
+    current = resource.getrlimit(kind)[1]
+    if current != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current), min(hard, current)
+    resource.setrlimit(kind, (soft, hard))
+cpu, memory, output = (int(value) for value in sys.argv[1:4])
+if cpu:
+    limit(resource.RLIMIT_CPU, cpu, cpu + %d)
+if memory:
+    limit(resource.RLIMIT_AS, memory, memory)
+if output:
+    limit(resource.RLIMIT_FSIZE, output, output)
+os.execvp(sys.argv[4], sys.argv[4:])
+""" % _CPU_GRACE
+
+
+def _limited(cmd: List[str], cpu_seconds: Optional[int], memory_mb: Optional[int],
+             max_output_mb: Optional[int]) -> List[str]:
+    """cmd run through _LIMIT_SHIM."""
+    mb = 1024 * 1024
+    return [sys.executable, "-c", _LIMIT_SHIM, str(cpu_seconds or 0), str((memory_mb or 0) * mb),
+            str((max_output_mb or 0) * mb)] + cmd
+
+
+def _run_engine(cmd: List[str], cwd: str, env: Dict[str, str], timeout: Optional[float]) -> Tuple[int, str, float]:
+    """
+    (returncode, output, CPU seconds used) of one engine run; raises
+    subprocess.TimeoutExpired. With `resource` the child is reaped with
+    os.wait4 for its own CPU time (RUSAGE_CHILDREN mixes in other workers).
+    """
+    if not HAS_RESOURCE:
+        run = subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             timeout=timeout)
+        return run.returncode, run.stdout.decode("utf-8", "replace"), 0.0
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output: List[bytes] = []
+    reader = threading.Thread(target=lambda: output.append(proc.stdout.read()), daemon=True)
+    reader.start()
+    reader.join(timeout)
+    if reader.is_alive():
+        proc.kill()
+        proc.wait()
+        reader.join()
+        proc.stdout.close()
+        raise subprocess.TimeoutExpired(cmd, timeout, output=b"".join(output))
+    _, wait_status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    proc.stdout.close()
+    return proc.returncode, b"".join(output).decode("utf-8", "replace"), usage.ru_utime + usage.ru_stime
+
+
+def _status(returncode: int, log: str, cpu_used: float = 0.0, cpu_seconds: Optional[int] = None) -> str:
+    if returncode == 0:
+        return "ok"
+    if returncode < 0:
+        signum = -returncode
+        if signum == getattr(signal, "SIGXCPU", None):
+            return "cpu"
+        # SIGKILL is the CPU hard limit only if the run got there (else e.g. the OOM killer)
+        if signum == getattr(signal, "SIGKILL", None) and cpu_seconds and cpu_used >= cpu_seconds + _CPU_GRACE - 1:
+            return "cpu"
+        if signum == getattr(signal, "SIGXFSZ", None):
+            return "output_limit"
+        return "crashed"
+    lowered = log[-4000:].lower()
+    if any(marker in lowered for marker in _MEMORY_ERRORS):
+        return "memory"
+    return "error"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PoolStats:
+    """Per-priority job counts, statuses, queue wait and compile time."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._priorities: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, priority: str) -> Dict[str, Any]:
+        return self._priorities.setdefault(priority, {
+            "jobs": 0, "cached": 0, "statuses": {}, "wait_ms": deque(maxlen=_WINDOW),
+            "compile_ms": deque(maxlen=_WINDOW), "wait_total": 0.0, "compile_total": 0.0,
+            "wait_max": 0.0, "compile_max": 0.0, "passes": 0,
+        })
+
+    def record(self, priority: str, status: str, wait_ms: float, compile_ms: float, passes: int = 0,
+               cached: bool = False):
+        with self._lock:
+            entry = self._entry(priority)
+            entry["jobs"] += 1
+            entry["statuses"][status] = entry["statuses"].get(status, 0) + 1
+            if cached:
+                entry["cached"] += 1
+                return
+            entry["passes"] += passes
+            entry["wait_ms"].append(wait_ms)
+            entry["compile_ms"].append(compile_ms)
+            entry["wait_total"] += wait_ms
+            entry["compile_total"] += compile_ms
+            entry["wait_max"] = max(entry["wait_max"], wait_ms)
+            entry["compile_max"] = max(entry["compile_max"], compile_ms)
+
+    @staticmethod
+    def _summary(values: Deque[float], total: float, maximum: float, count: int) -> Dict[str, float]:
+        recent = list(values)
+        return {"mean": round(total / count, 1) if count else 0.0, "p50": round(_percentile(recent, 0.5), 1),
+                "p95": round(_percentile(recent, 0.95), 1), "max": round(maximum, 1)}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for priority, entry in sorted(self._priorities.items()):
+                compiled = entry["jobs"] - entry["cached"]
+                result[priority] = {
+                    "jobs": entry["jobs"],
+                    "cached": entry["cached"],
+                    "statuses": dict(entry["statuses"]),
+                    "passes_per_compile": round(entry["passes"] / compiled, 2) if compiled else 0.0,
+                    "wait_ms": self._summary(entry["wait_ms"], entry["wait_total"], entry["wait_max"], compiled),
+                    "compile_ms": self._summary(entry["compile_ms"], entry["compile_total"],
+                                                entry["compile_max"], compiled),
+                }
+            return result
+
+
+class CompilePool:
+    """
+    N worker threads driving engine subprocesses, fed by a priority queue.
+    Workers start on first submit; submit() is thread-safe.
+    """
+    def __init__(self, workers: int = DEFAULT_WORKERS, tmp_root: Optional[str] = DEFAULT_TMPDIR,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT, cpu_seconds: Optional[int] = DEFAULT_CPU_SECONDS,
+                 memory_mb: Optional[int] = DEFAULT_MEMORY_MB, max_output_mb: Optional[int] = DEFAULT_MAX_OUTPUT_MB):
+        self.workers = max(1, workers)
+        self.tmp_root = tmp_root if tmp_root and os.path.isdir(tmp_root) else None
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_output_mb = max_output_mb
+        self.metrics = PoolStats()
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._running = 0
+        self._closed = False
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._worker, name=f"latex-compile-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, file_path: str, priority: str = "bulk", engine: Optional[str] = None,
+               output_dir: Optional[str] = None, use_formats: bool = True, use_cache: bool = True) -> "Future":
+        """
+        Queues a compile of file_path; the Future resolves to compile()'s
+        result. PDF and log go to output_dir (default: the current directory).
+        """
+        if self._closed:
+            raise RuntimeError("CompilePool is closed")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r} (expected one of {', '.join(PRIORITIES)})")
+        future: "Future" = Future()
+        output_dir = os.path.abspath(output_dir or os.getcwd())
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            source = f.read()
+        engine = engine or detect_engine(source)
+        dirs = input_dirs(file_path)
+        job = {"file_path": file_path, "source": source, "engine": engine, "dirs": dirs,
+               "output_dir": output_dir, "priority": priority, "use_formats": use_formats,
+               "key": compile_key(source, engine, dirs) if use_cache else None, "queued": time.perf_counter()}
+        if job["key"]:
+            pdf = ARTIFACTS.restore(job["key"], file_path, output_dir)
+            if pdf:
+                self.metrics.record(priority, "ok", 0.0, 0.0, cached=True)
+                future.set_result(self._result(job, "ok", pdf=pdf, log=output_path(file_path, ".log", output_dir),
+                                               cached=True))
+                return future
+        self._start()
+        self._queue.put((PRIORITIES[priority], next(self._seq), job, future))
+        return future
+
+    def compile(self, file_path: str, priority: str = "interactive", **kwargs) -> Dict[str, Any]:
+        """
+        Compiles and waits: {"ok", "status", "error", "pdf", "log", "log_text",
+        "engine", "format", "passes", "reruns", "cached", "wait_ms", "compile_ms",
+        "priority"}; reruns lists why each pass after the first was needed.
+        status is ok, error, missing (no engine), timeout, cpu, memory,
+        output_limit or crashed.
+        """
+        return self.submit(file_path, priority, **kwargs).result()
+
+    def _worker(self):
+        while True:
+            _, _, job, future = self._queue.get()
+            if job is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._running += 1
+            try:
+                result = self._run(job)
+            except Exception as e:
+                result = self._result(job, "crashed", error=f"{type(e).__name__}: {e}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+            self.metrics.record(job["priority"], result["status"], result["wait_ms"], result["compile_ms"],
+                                result["passes"])
+            future.set_result(result)
+
+    @staticmethod
+    def _result(job: Dict[str, Any], status: str, **fields) -> Dict[str, Any]:
+        result = {"ok": status == "ok", "status": status, "error": None, "pdf": None, "log": None,
+                  "log_text": "", "engine": job["engine"], "format": None, "passes": 0, "reruns": [], "cached": False,
+                  "wait_ms": 0.0, "compile_ms": 0.0, "priority": job["priority"]}
+        result.update(fields)
+        return result
+
+    def _run(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        wait_ms = (start - job["queued"]) * 1000
+        file_path = job["file_path"]
+        name = os.path.basename(file_path)
+        fmt = warm_format(job["source"], job["engine"], job["dirs"]) if job["use_formats"] else None
+        cmd = latex_command(job["engine"], name, fmt)
+        env = latex_env(job["dirs"])
+        if shutil.which(cmd[0], path=env.get("PATH")) is None:
+            return self._result(job, "missing", error=f"'{job['engine']}' command not found", format=fmt,
+                                wait_ms=round(wait_ms, 1))
+        if HAS_RESOURCE:
+            cmd = _limited(cmd, self.cpu_seconds, self.memory_mb, self.max_output_mb)
+        page_count = uses_page_count(job["source"])
+        status, log_text, error, passes, reruns = "ok", "", None, 0, []
+        pdf = log = None
+        with tempfile.TemporaryDirectory(prefix="edutex-compile-", dir=self.tmp_root) as work:
+            with open(os.path.join(work, name), 'w', encoding='utf-8') as f:
+                f.write(job["source"])
+            while passes < MAX_PASSES:
+                passes += 1
+                before = aux_state(work, name, page_count)
+                try:
+                    returncode, log_text, cpu_used = _run_engine(cmd, work, env, self.timeout)
+                    status = _status(returncode, log_text, cpu_used, self.cpu_seconds)
+                except subprocess.TimeoutExpired as e:
+                    log_text = e.stdout.decode("utf-8", "replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+                    status, error = "timeout", f"no result within {self.timeout}s"
+                except FileNotFoundError:
+                    status, error = "missing", f"'{job['engine']}' command not found"
+                if status != "ok":
+                    break
+                reasons = rerun_reasons(log_text, before, aux_state(work, name, page_count))
+                if not reasons:
+                    break
+                if passes < MAX_PASSES:
+                    reruns.append("; ".join(reasons))
+            built_pdf = output_path(name, ".pdf", work)
+            built_log = output_path(name, ".log", work)
+            if status == "ok" and not os.path.exists(built_pdf):
+                status, error = "error", "no PDF produced"
+            if os.path.exists(built_pdf):  # nonstopmode often still writes one after errors
+                pdf = output_path(name, ".pdf", job["output_dir"])
+                shutil.copyfile(built_pdf, pdf)
+            if os.path.exists(built_log):
+                log = output_path(name, ".log", job["output_dir"])
+                shutil.copyfile(built_log, log)
+            if status == "ok" and job["key"]:
+                ARTIFACTS.put(job["key"], built_pdf, built_log)
+        if status not in ("ok", "missing") and error is None:
+            error = {"cpu": f"CPU limit of {self.cpu_seconds}s exceeded",
+                     "memory": f"memory limit of {self.memory_mb} MB exceeded",
+                     "output_limit": f"output file larger than {self.max_output_mb} MB",
+                     "crashed": "engine crashed"}.get(status) or first_error(log_text)
+        return self._result(job, status, error=error, pdf=pdf, log=log, log_text=log_text, format=fmt,
+                            passes=passes, reruns=reruns, wait_ms=round(wait_ms, 1),
+                            compile_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = self._running
+        return {"workers": self.workers, "queued": self._queue.qsize(), "running": running,
+                "tmp_root": self.tmp_root or tempfile.gettempdir(), "priorities": self.metrics.stats()}
+
+    def close(self):
+        """Lets queued jobs finish, then stops the workers."""
+        self._closed = True
+        with self._lock:
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put((len(PRIORITIES), next(self._seq), None, None))  # after every real job
+        for thread in threads:
+            thread.join(self.timeout)
+
+
+_pool: Optional[CompilePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> CompilePool:
+    """The process-wide pool, configured from EDUTEX_COMPILE_* variables."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CompilePool()
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(shutdown_pool)
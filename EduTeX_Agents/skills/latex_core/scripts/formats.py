@@ -0,0 +1,303 @@
+"""
+Precompiled LaTeX formats (mylatexformat) for the exam preamble.
+
+Every exam starts with the same heavy preamble (exam.cls pulls in tikz,
+tkz-euclide, tcolorbox, tabularray, mdframed..., then babel), which the
+engine reads again on every pass of every document. TemplateRegistry puts
+a `\\csname endofdump\\endcsname` line after the part that depends only on
+the style; everything above it is dumped once per engine with
+mylatexformat into a .fmt kept on disk, and documents are compiled with
+-fmt, which skips straight to the marker. The marker is \\relax in a normal
+run, so the same file still compiles without a format.
+
+Formats are keyed by engine, engine version, the dumped preamble and the
+local .cls/.sty files, so editing exam.cls or upgrading TeX builds a new
+one. A preamble that cannot be dumped (XeTeX refuses to dump OpenType
+fonts, so with xelatex nothing above the marker may load one; exam.cls
+loads fontawesome5 \\AtEndPreamble for that reason) is recorded as failed
+next to the formats and those documents compile from cold.
+
+Usage: python formats.py [--styles scientific ...] [--engines xelatex ...]
+"""
+import os
+import re
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import subprocess
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ENGINES = ("pdflatex", "xelatex", "lualatex")
+STYLES = ("classic", "modern", "scientific")  # exam.cls options
+DUMP_MARKER = "\\csname endofdump\\endcsname"
+FORMAT_DIR = os.getenv("EDUTEX_FORMAT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "edutex", "formats"))
+BUILD_TIMEOUT = 300  # seconds per format dump
+
+# Same layout as core/template_registry.py: EduTeX/assets/latex/exam.cls
+TEMPLATES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../../assets/latex'))
+
+# ini-mode binary that loads "&<engine>" and dumps the extended format
+_INI_BINARIES = {"pdflatex": ("pdftex",), "xelatex": ("xetex",), "lualatex": ("luahbtex", "luatex")}
+_MAGIC = re.compile(r"^%\s*!\s*TEX\s+(?:TS-)?program\s*=\s*(\w+)", re.I | re.M)
+_UNICODE_PACKAGES = re.compile(r"\\usepackage\s*(?:\[[^\]]*\])?\s*\{[^}]*\b(?:fontspec|unicode-math|polyglossia)\b")
+_CLASS = re.compile(r"\\documentclass\s*(?:\[([^\]]*)\])?\s*\{([^}]*)\}")
+
+
+def detect_engine(source: str) -> str:
+    """The "% !TEX program" line if any, xelatex for fontspec/unicode-math/polyglossia, else pdflatex."""
+    preamble = source.split("\\begin{document}", 1)[0]
+    m = _MAGIC.search(preamble)
+    if m and m.group(1).lower() in ENGINES:
+        return m.group(1).lower()
+    return "xelatex" if _UNICODE_PACKAGES.search(preamble) else "pdflatex"
+
+
+def split_preamble(source: str) -> Optional[Tuple[str, str]]:
+    """(part to dump, rest of the file) at the endofdump marker; None without a marker in the preamble."""
+    index = source.find(DUMP_MARKER)
+    begin = source.find("\\begin{document}")
+    if index < 0 or 0 <= begin < index:
+        return None
+    return source[:index], source[index:]
+
+
+def input_dirs(file_path: Optional[str] = None) -> List[str]:
+    """Where \\documentclass{exam} and \\input are looked up: CWD, the file's folder, the templates."""
+    dirs = [os.getcwd()]
+    if file_path:
+        dirs.append(os.path.dirname(os.path.abspath(file_path)))
+    dirs.append(TEMPLATES_DIR)
+    return list(dict.fromkeys(d for d in dirs if os.path.isdir(d)))
+
+
+def latex_env(dirs: Iterable[str]) -> Dict[str, str]:
+    """os.environ with dirs prepended to TEXINPUTS (the empty entry keeps the default path)."""
+    env = dict(os.environ)
+    env["TEXINPUTS"] = os.pathsep.join(list(dirs) + [env.get("TEXINPUTS", "")])
+    return env
+
+
+def latex_command(engine: str, file_path: str, fmt: Optional[str] = None) -> List[str]:
+    cmd = [engine, "-interaction=nonstopmode"]
+    if fmt:
+        cmd.append(f"-fmt={fmt}")
+    return cmd + [file_path]
+
+
+@lru_cache(maxsize=None)
+def engine_version(engine: str) -> Optional[str]:
+    """First line of `<engine> --version`, None when the engine is not installed."""
+    try:
+        result = subprocess.run([engine, "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    lines = result.stdout.splitlines()
+    return lines[0].strip() if lines else ""
+
+
+def _local_inputs(dirs: Iterable[str]) -> Dict[str, str]:
+    """name -> path of the .cls/.sty files in dirs (earlier dirs win, as in TEXINPUTS)."""
+    found: Dict[str, str] = {}
+    for directory in dirs:
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith((".cls", ".sty")) and name not in found:
+                found[name] = os.path.join(directory, name)
+    return found
+
+
+def template_digest(dirs: Iterable[str] = ()) -> str:
+    """Hash of the local .cls/.sty files (exam.cls and friends): the template version."""
+    digest = hashlib.sha256()
+    for name, path in sorted(_local_inputs(dirs).items()):
+        try:
+            with open(path, "rb") as f:
+                digest.update(f"\n{name}\n".encode("utf-8") + f.read())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+def format_key(engine: str, preamble: str, dirs: Iterable[str] = ()) -> str:
+    """<engine>-<class>-<hash>; the hash covers engine version, preamble and local .cls/.sty contents."""
+    digest = hashlib.sha256()
+    digest.update(f"{engine}\n{engine_version(engine)}\n{preamble}\n{template_digest(dirs)}".encode("utf-8"))
+    m = _CLASS.search(preamble)
+    label = re.sub(r"\W+", "", m.group(2)) if m else "doc"
+    return f"{engine}-{label}-{digest.hexdigest()[:16]}"
+
+
+def first_error(log: str) -> str:
+    """The first TeX error ("! ...") of a log, or its last line."""
+    for line in log.splitlines():
+        if line.startswith("!"):
+            return line[1:].strip()
+    lines = [line for line in log.splitlines() if line.strip()]
+    return lines[-1].strip() if lines else "no output"
+
+
+class FormatCache:
+    """
+    .fmt files by format_key in one directory, built on first use.
+    Builds are serialized per key; a failed build leaves a .failed note
+    so it is not retried until the inputs change (or clear() is called).
+    """
+    def __init__(self, directory: str = FORMAT_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._building: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.builds = 0
+        self.failures = 0
+        self.build_ms = 0.0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".fmt")
+
+    def get(self, engine: str, preamble: str, dirs: Iterable[str] = ()) -> Optional[str]:
+        """Path of the format for preamble on engine, or None when it cannot be built."""
+        if engine not in ENGINES or engine_version(engine) is None:
+            return None
+        dirs = list(dirs)
+        key = format_key(engine, preamble, dirs)
+        path = self.path(key)
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+        with key_lock:
+            if os.path.exists(path):
+                with self._lock:
+                    self.hits += 1
+                return path
+            if os.path.exists(path[:-len(".fmt")] + ".failed"):
+                return None
+            start = time.perf_counter()
+            error = self._build(engine, key, preamble, dirs)
+            with self._lock:
+                self.build_ms += (time.perf_counter() - start) * 1000
+                if error:
+                    self.failures += 1
+                else:
+                    self.builds += 1
+        if error:
+            print(f"Warning: Could not build {engine} format {key}: {error}. Compiling without it.")
+            return None
+        return path
+
+    def _build(self, engine: str, key: str, preamble: str, dirs: List[str]) -> Optional[str]:
+        """Dumps the format into the cache directory; returns an error message on failure."""
+        binary = next((b for b in _INI_BINARIES[engine] if shutil.which(b)), None)
+        if binary is None:
+            return f"{' / '.join(_INI_BINARIES[engine])} not found"
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix="edutex-fmt-") as work:
+            with open(os.path.join(work, key + ".tex"), "w", encoding="utf-8") as f:
+                f.write(f"{preamble}{DUMP_MARKER}\n\\begin{{document}}\n\\end{{document}}\n")
+            cmd = [binary, "-ini", "-interaction=nonstopmode", "-halt-on-error", f"-jobname={key}",
+                   f"&{engine}", "mylatexformat.ltx", f"{key}.tex"]
+            try:
+                result = subprocess.run(cmd, cwd=work, env=latex_env(dirs), stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, text=True, errors="replace",
+                                        timeout=BUILD_TIMEOUT)
+                log = result.stdout
+                built = os.path.join(work, key + ".fmt")
+                error = None if result.returncode == 0 and os.path.exists(built) else first_error(log)
+            except subprocess.TimeoutExpired:
+                log, error = "", f"timed out after {BUILD_TIMEOUT}s"
+            except OSError as e:
+                log, error = "", str(e)
+            if error:
+                with open(os.path.join(self.directory, key + ".failed"), "w", encoding="utf-8") as f:
+                    f.write(f"{error}\n\n{log[-4000:]}")
+                return error
+            # Copy under a temporary name and rename, so a concurrent compile never sees half a file
+            partial = self.path(key) + f".{os.getpid()}.tmp"
+            shutil.copyfile(built, partial)
+            os.replace(partial, self.path(key))
+        return None
+
+    def discard(self, path: str):
+        """Removes a format that turned out unusable; the next get() rebuilds it."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """Removes every format and failure note."""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith((".fmt", ".failed")):
+                    self.discard(os.path.join(self.directory, name))
+        with self._lock:
+            self.hits = self.builds = self.failures = 0
+            self.build_ms = 0.0
+
+    def stats(self) -> Dict[str, object]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            names = []
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "formats": sum(name.endswith(".fmt") for name in names),
+                "failed": sum(name.endswith(".failed") for name in names),
+                "hits": self.hits,
+                "builds": self.builds,
+                "failures": self.failures,
+                "build_ms": round(self.build_ms, 1),
+            }
+
+
+FORMATS = FormatCache()
+
+
+def warm_format(source: str, engine: str, dirs: Iterable[str] = ()) -> Optional[str]:
+    """Format to compile source with, or None (no marker, EDUTEX_LATEX_FORMATS=0 or no format)."""
+    if os.getenv("EDUTEX_LATEX_FORMATS", "1") == "0":
+        return None
+    parts = split_preamble(source)
+    if parts is None:
+        return None
+    return FORMATS.get(engine, parts[0], dirs)
+
+
+def prebuild(styles: Iterable[str] = STYLES, engines: Iterable[str] = ("xelatex",),
+             cache: Optional[FormatCache] = None) -> Dict[Tuple[str, str], Optional[str]]:
+    """Builds the format of every style x engine of the exam template; (style, engine) -> path or None."""
+    try:
+        from core.template_registry import TemplateRegistry
+    except ImportError:
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+        from core.template_registry import TemplateRegistry  # type: ignore[no-redef]
+    cache = cache or FORMATS
+    registry = TemplateRegistry()
+    built = {}
+    for style in styles:
+        parts = split_preamble(registry.get_preamble(style))
+        for engine in engines:
+            built[(style, engine)] = cache.get(engine, parts[0], input_dirs()) if parts else None
+    return built
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prebuild the precompiled formats of the exam template.")
+    parser.add_argument("--styles", nargs="+", default=list(STYLES), choices=STYLES)
+    parser.add_argument("--engines", nargs="+", default=["xelatex"], choices=ENGINES)
+    parser.add_argument("--clear", action="store_true", help="Remove cached formats and failure notes first")
+    args = parser.parse_args()
+
+    if args.clear:
+        FORMATS.clear()
+    for (style, engine), path in prebuild(args.styles, args.engines).items():
+        print(f"{style:<11} {engine:<9} {path or 'not available'}")
+    print(FORMATS.stats())
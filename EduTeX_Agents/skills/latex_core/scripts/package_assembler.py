@@ -1,7 +1,12 @@
 import sys
 import os
+import json
 import shutil
-import subprocess
+
+try:
+    from skills.latex_core.scripts.compile_pool import get_pool
+except ImportError:
+    from compile_pool import get_pool  # type: ignore[no-redef]
 
 def create_package(input_file):
     """
@@ -19,16 +24,18 @@ def create_package(input_file):
         os.makedirs(folder_name)
         print(f"📂 Created folder: {folder_name}")
 
-    # Compile PDF (using existing compile script if available, else simple logic)
-    # Asking pdflatex twice
+    # Compile PDF on the shared compile pool, behind interactive previews
+    # (identical sources come from the shared PDF cache)
     print("⚙️  Compiling PDF...")
-    try:
-        subprocess.run(['pdflatex', '-interaction=nonstopmode', input_file], check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(['pdflatex', '-interaction=nonstopmode', input_file], check=True, stdout=subprocess.DEVNULL)
-    except subprocess.CalledProcessError:
-        print(f"⚠️ Warning: Compilation had errors (or just warnings).")
-    except FileNotFoundError:
-        print("❌ Error: pdflatex not found.")
+    result = get_pool().compile(input_file, priority="bulk")
+    if result["cached"]:
+        print("⚡ PDF restored from cache")
+    elif result["status"] == "missing":
+        print(f"❌ Error: {result['engine']} not found.")
+    elif not result["ok"]:
+        print(f"⚠️ Warning: Compilation had errors ({result['status']}: {result['error']}).")
+    else:
+        print(f"✅ Compiled in {result['passes']} pass(es)")
 
     # Move files
     extensions = ['.tex', '.pdf']
@@ -56,7 +63,12 @@ def create_package(input_file):
     print(f"✅ Package ready at: {folder_name}/")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python package_assembler.py [main_file.tex]")
+    files = [arg for arg in sys.argv[1:] if arg != "--stats"]
+    if not files:
+        print("Usage: python package_assembler.py [main_file.tex ...] [--stats]")
     else:
-        create_package(sys.argv[1])
+        for file in files:
+            create_package(file)
+        if "--stats" in sys.argv:
+            # queue wait vs compile time per priority, passes, statuses
+            print(json.dumps(get_pool().stats(), indent=2))
@@ -0,0 +1,65 @@
+"""
+latexmk-style rerun detection.
+
+A second pass is only needed when the first one wrote something the
+document reads back: labels and page marks in the .aux (\\newlabel,
+\\pgfsyspdfmark for the remember-picture title pages...), the table of
+contents/figures/tables, hyperref bookmarks or beamer navigation.
+After each pass the pool compares those files with their state before
+the pass (a missing file counts as empty) and scans the log for the
+packages' own "Rerun" warnings; it stops as soon as neither fires, or
+after MAX_PASSES.
+
+Boilerplate .aux lines that no pass reads back (\\relax, babel and
+hyperref setup) are ignored, and so is the total page count unless the
+document prints it (lastpage, \\PreviousTotalPages).
+"""
+import os
+import re
+import hashlib
+from typing import Dict, List
+
+MAX_PASSES = 5  # as latexmk
+AUX_EXTENSIONS = (".aux", ".toc", ".lof", ".lot", ".out", ".nav", ".snm")
+
+_RERUN = re.compile(
+    r"^.*(?:Rerun to get|Label\(s\) may have changed|Please rerun|Rerun LaTeX|rerun LaTeX"
+    r"|Table widths have changed|Rerun to adjust).*$",
+    re.M,
+)
+_AUX_BOILERPLATE = re.compile(
+    r"^\\(?:relax|providecommand|catcode|babel@aux|selectlanguage|HyperFirstAtBeginDocument|AtBeginDocument"
+    r"|global\s*\\let|bibstyle|bibdata|citation)\b"
+)
+_PAGE_COUNT = re.compile(r"^\\gdef\s*\\@abspage@last\b")
+_USES_PAGE_COUNT = re.compile(r"LastPage|TotalPages|abspage@last")
+
+
+def uses_page_count(source: str) -> bool:
+    return bool(_USES_PAGE_COUNT.search(source))
+
+
+def aux_state(directory: str, name: str, page_count: bool = False) -> Dict[str, str]:
+    """extension -> hash of what later passes read from <stem><ext> in directory ("" if none)."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    state = {}
+    for ext in AUX_EXTENSIONS:
+        try:
+            with open(os.path.join(directory, stem + ext), 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        except OSError:
+            text = ""
+        if ext == ".aux":
+            text = "\n".join(
+                line for line in text.splitlines()
+                if not _AUX_BOILERPLATE.match(line) and (page_count or not _PAGE_COUNT.match(line))
+            )
+        state[ext] = hashlib.sha1(text.encode("utf-8")).hexdigest() if text.strip() else ""
+    return state
+
+
+def rerun_reasons(log: str, before: Dict[str, str], after: Dict[str, str]) -> List[str]:
+    """Why another pass is needed (empty when the output is final)."""
+    reasons = list(dict.fromkeys(m.group(0).strip() for m in _RERUN.finditer(log)))
+    reasons += [f"{ext} changed" for ext in AUX_EXTENSIONS if before.get(ext, "") != after.get(ext, "")]
+    return reasons
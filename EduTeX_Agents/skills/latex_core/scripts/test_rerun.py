@@ -0,0 +1,63 @@
+import sys
+import os
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from skills.latex_core.scripts.rerun import AUX_EXTENSIONS, aux_state, rerun_reasons, uses_page_count
+
+BOILERPLATE = "\\relax\n\\providecommand\\babel@aux[2]{}\n\\babel@aux{greek}{}\n\\gdef \\@abspage@last{2}\n"
+
+
+def write(directory, name, text):
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_missing_files_count_as_empty(tmp_path):
+    state = aux_state(str(tmp_path), "exam.tex")
+    assert state == {ext: "" for ext in AUX_EXTENSIONS}
+    assert rerun_reasons("Output written on exam.pdf (2 pages).", state, aux_state(str(tmp_path), "exam.tex")) == []
+
+
+def test_boilerplate_aux_needs_no_rerun(tmp_path):
+    before = aux_state(str(tmp_path), "exam.tex")
+    write(tmp_path, "exam.aux", BOILERPLATE)
+    after = aux_state(str(tmp_path), "exam.tex")
+    assert after[".aux"] == ""
+    assert rerun_reasons("", before, after) == []
+
+
+def test_labels_and_toc_trigger_a_rerun(tmp_path):
+    before = aux_state(str(tmp_path), "exam.tex")
+    write(tmp_path, "exam.aux", BOILERPLATE + "\\newlabel{eq:1}{{1}{1}}\n\\pgfsyspdfmark {pgfid1}{0}{0}\n")
+    write(tmp_path, "exam.toc", "\\contentsline {section}{Άσκηση 1}{1}\n")
+    after = aux_state(str(tmp_path), "exam.tex")
+    assert rerun_reasons("", before, after) == [".aux changed", ".toc changed"]
+    # the next pass writes the same files: done
+    assert rerun_reasons("", after, aux_state(str(tmp_path), "exam.tex")) == []
+
+
+def test_page_count_only_when_the_document_prints_it(tmp_path):
+    write(tmp_path, "exam.aux", "\\gdef \\@abspage@last{1}\n")
+    one_page = aux_state(str(tmp_path), "exam.tex"), aux_state(str(tmp_path), "exam.tex", page_count=True)
+    write(tmp_path, "exam.aux", "\\gdef \\@abspage@last{2}\n")
+    two_pages = aux_state(str(tmp_path), "exam.tex"), aux_state(str(tmp_path), "exam.tex", page_count=True)
+    assert rerun_reasons("", one_page[0], two_pages[0]) == []
+    assert rerun_reasons("", one_page[1], two_pages[1]) == [".aux changed"]
+
+    assert uses_page_count(r"\usepackage{lastpage} Σελίδα \thepage\ από \pageref{LastPage}")
+    assert uses_page_count(r"\thepage/\PreviousTotalPages")
+    assert not uses_page_count(r"\documentclass{exam}\begin{document}\thepage\end{document}")
+
+
+def test_log_warnings_trigger_a_rerun_once_each():
+    log = ("LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.\n"
+           "Package longtable Warning: Table widths have changed. Rerun LaTeX.\n"
+           "LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.\n"
+           "Output written on exam.pdf (1 page).\n")
+    assert rerun_reasons(log, {}, {}) == [
+        "LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.",
+        "Package longtable Warning: Table widths have changed. Rerun LaTeX.",
+    ]
+    assert rerun_reasons("Output written on exam.pdf (1 page).\n", {}, {}) == []